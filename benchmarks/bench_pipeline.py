@@ -0,0 +1,323 @@
+"""
+Offline benchmark of the parsers and scorers on recorded responses.
+
+Every case runs on the fixtures in benchmarks/fixtures at realistic size and
+at 100x (more entries, rows or lines), with network access blocked. Results
+are appended to benchmarks/results/history.jsonl keyed by git commit, and each
+run is compared with the latest run of another commit (or --baseline).
+
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --filter kgml --scales 1 10 100
+    python -m benchmarks.bench_pipeline --baseline 4db0641 --fail-on-regression
+"""
+import argparse
+import functools
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PIPELINE_DIR = os.path.join(REPO_ROOT, "src", "geneInfoFetching")
+RESULTS_PATH = os.path.join(REPO_ROOT, "benchmarks", "results", "history.jsonl")
+
+# The pipeline modules import each other by bare name (run from their own folder)
+sys.path.insert(0, PIPELINE_DIR)
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks import fixtures
+
+
+class Case:
+    """`setup(scale)` builds fresh arguments outside the timed region; `run(*args)` is timed"""
+
+    def __init__(self, name, setup, run):
+        self.name = name
+        self.setup = setup
+        self.run = run
+
+
+def block_network():
+    def refuse(*args, **kwargs):
+        raise RuntimeError("Network access during an offline benchmark")
+    socket.socket.connect = refuse
+    socket.create_connection = refuse
+    socket.getaddrinfo = refuse
+
+
+def unbound(cls):
+    """Instance of a Tk app class without running __init__, enough to call its parsing methods"""
+    return object.__new__(cls)
+
+
+def pipeline_cases():
+    import pandas as pd
+    import parser
+    import pathway
+    import Score
+    import interactome
+    import propagation
+    import gene_paths
+    import kgml_parallel
+    from ph import KGMLGeneInteractionUtils
+    from src.common.minhash_index import MinHashLSHIndex
+
+    gene = fixtures.CANDIDATE_GENE
+    cached = functools.lru_cache(maxsize=None)
+
+    @cached
+    def sections(scale):
+        return KGMLGeneInteractionUtils.extract_entry_and_relation_blocks(fixtures.scaled_kgml(scale))
+
+    @cached
+    def entry_ids(scale):
+        return parser.parse_entries(sections(scale).entry_lines, gene)["entry_ids"].iloc[0]
+
+    @cached
+    def relations(scale):
+        return parser.parse_relations(entry_ids(scale), sections(scale).relation_lines)
+
+    @cached
+    def pathway_results(scale):
+        return pathway.process_pathway(
+            fixtures.scaled_kgml(scale), gene, pd.DataFrame(columns=["gene_id", "pathway"]), pd.DataFrame(), "path:hsa04110"
+        )
+
+    @cached
+    def gene_index(scale):
+        # Every gene of the KGML gets a pathway set, so no lookup falls back to KEGG
+        links = fixtures.gene_pathway_links(scale)
+        for gene_id in pathway_results(scale)[1]["gene_id"]:
+            links.setdefault(f"hsa:{gene_id}", set()).add("path:hsa04110")
+        return build_index(links)
+
+    def build_index(links):
+        index = MinHashLSHIndex()
+        for key, items in links.items():
+            index.add(key, items)
+        return index
+
+    reference = sorted(fixtures.gene_pathway_links(1)[f"hsa:{gene}"])
+
+    def top_genes(scale):
+        counts = pathway_results(scale)[1]
+        top = counts.groupby("gene_id")["pathway"].nunique().reset_index(name="pathway_count")
+        return top, reference, gene_index(scale)
+
+    @cached
+    def components(scale):
+        top, _, index = top_genes(scale)
+        scored = pathway.compute_similarity_scores(top.copy(), reference, index)
+        return Score.build_components(scored, pathway_results(scale)[0], pd.DataFrame(columns=["gene_id", "correlation"]))
+
+    @cached
+    def graph(scale):
+        return interactome.Interactome.from_edges([interactome.kgml_gene_edges(fixtures.scaled_kgml(scale))])
+
+    weights = {"relation_score": 0.5, "similarity_score": 2.0, "correlation": 1.0}
+
+    return [
+        Case("kgml.extract_blocks", lambda n: (fixtures.scaled_kgml(n),),
+             KGMLGeneInteractionUtils.extract_entry_and_relation_blocks),
+        Case("parser.parse_entries", lambda n: (sections(n).entry_lines, gene), parser.parse_entries),
+        Case("parser.parse_relations", lambda n: (entry_ids(n), sections(n).relation_lines), parser.parse_relations),
+        Case("parser.map_entry_ids_to_gene_ids", lambda n: (sections(n).entry_lines, relations(n)),
+             parser.map_entry_ids_to_gene_ids),
+        Case("pathway.update_gene_pathway_counts",
+             lambda n: (sections(n).entry_lines, pd.DataFrame(columns=["gene_id", "pathway"]), set(), "path:hsa04110"),
+             pathway.update_gene_pathway_counts),
+        Case("pathway.process_pathway",
+             lambda n: (fixtures.scaled_kgml(n), gene, pd.DataFrame(columns=["gene_id", "pathway"]), pd.DataFrame(), "path:hsa04110"),
+             pathway.process_pathway),
+        Case("Score.mappingScore", lambda n: (pathway_results(n)[0].copy(),), Score.mappingScore),
+        Case("pathway.compute_similarity_scores", top_genes, pathway.compute_similarity_scores),
+        Case("Score.build_components",
+             lambda n: (components(n)[["gene_id", "pathway_count", "similarity_score"]].drop_duplicates("gene_id"),
+                        pathway_results(n)[0], pd.DataFrame(columns=["gene_id", "correlation"])),
+             Score.build_components),
+        Case("Score.rescore", lambda n: (Score.ScoreComponents(components(n)), weights),
+             lambda scorer, w: scorer.score(w)),
+        Case("interactome.kgml_gene_edges", lambda n: (fixtures.scaled_kgml(n),), interactome.kgml_gene_edges),
+        # What a parse worker does per document (process start-up and transfer are not included)
+        Case("kgml_parallel.parse_kgml", lambda n: (fixtures.scaled_kgml(n),), kgml_parallel.parse_kgml),
+        Case("kgml_parallel.gene_frames", lambda n: ([("path:hsa04110", kgml_parallel.parse_kgml(fixtures.scaled_kgml(n)))], gene),
+             kgml_parallel.gene_frames),
+        Case("interactome.relation_rows", lambda n: (graph(n), gene), interactome.Interactome.relation_rows),
+        # One walk per gene of a 50-gene list (a disease's GENE section), batched as one seed matrix
+        Case("propagation.rwr_50_seeds", lambda n: (propagation.Propagator(graph(n)), [[g] for g in graph(n).genes[:50]]),
+             propagation.Propagator.run),
+        Case("gene_paths.k_shortest_paths", lambda n: (gene_paths.PathFinder(graph(n), directed=False), gene,
+                                                       int(graph(n).genes[-1])),
+             lambda finder, source, target: finder.k_shortest_paths(source, target, k=5)),
+        Case("minhash.build_gene_index", lambda n: (fixtures.gene_pathway_links(n),), build_index),
+        Case("pathway.find_similar_genes", lambda n: (gene, reference, gene_index(n)), pathway.find_similar_genes),
+    ]
+
+
+def flat_file_cases():
+    from src.clasa import DiseaseGeneApp1
+    from src.disease_search.SimilarDiseases import DiseaseGeneApp
+    from src.geneInfoFetching.GeneInfoFetcher import GeneInfoApp
+    from src.geneMedicines.GeneClick import GeneDrugTargetFinder
+
+    disease = lambda n: fixtures.scaled_flat_file("kegg/ds_H00031.txt", n)
+    gene = lambda n: fixtures.scaled_flat_file("kegg/hsa_672.txt", n)
+
+    def gene_click(text):
+        finder = GeneDrugTargetFinder("672")
+        data = finder.parse_kegg_response(text)
+        return finder.extract_diseases(data), finder.extract_drug_targets(data)
+
+    cases = [
+        Case("clasa.parse_kegg_disease", lambda n: (unbound(DiseaseGeneApp1), disease(n)),
+             DiseaseGeneApp1.parse_kegg_disease),
+        Case("SimilarDiseases.parse_kegg_disease", lambda n: (unbound(DiseaseGeneApp), disease(n), "H00031"),
+             DiseaseGeneApp.parse_kegg_disease),
+        Case("GeneInfoFetcher.parse_kegg_response", lambda n: (unbound(GeneInfoApp), gene(n)),
+             GeneInfoApp.parse_kegg_response),
+        Case("GeneClick.parse_and_extract", lambda n: (gene(n),), gene_click),
+    ]
+
+    try:
+        from src.geneInfoFetching.GeneGraph import GeneDrugTargetFinder as GraphFinder
+    except ImportError as e:
+        print(f"Skipping GeneGraph cases: {e}")
+    else:
+        def gene_graph(text):
+            finder = GraphFinder("672")
+            data = finder.parse_kegg_response(text)
+            return finder.extract_diseases(data), finder.extract_drug_targets(data)
+        cases.append(Case("GeneGraph.parse_and_extract", lambda n: (gene(n),), gene_graph))
+    return cases
+
+
+def html_and_json_cases():
+    from src.api import openTargetsDrugEvidence
+    from src.clasa import DiseaseGeneApp1
+    from src.disease_search.SimilarDiseases import DiseaseGeneApp
+
+    def esearch(text):
+        return json.loads(text)["esearchresult"]["idlist"][0]
+
+    return [
+        Case("clasa.parse_drugs_from_html",
+             lambda n: (unbound(DiseaseGeneApp1), fixtures.scaled_drug_html(n), "breast cancer", "H00031"),
+             DiseaseGeneApp1.parse_drugs_from_html),
+        Case("SimilarDiseases.parse_drugs_html",
+             lambda n: (unbound(DiseaseGeneApp), fixtures.scaled_drug_html(n), "breast cancer", "H00031"),
+             DiseaseGeneApp.parse_drugs_html),
+        Case("openTargets.parse_drug_evidence", lambda n: (fixtures.scaled_known_drugs(n),),
+             lambda text: openTargetsDrugEvidence.parse_drug_evidence(json.loads(text))),
+        Case("ncbi.esearch_idlist", lambda n: (fixtures.read("ncbi/esearch_BRCA1.json"),), esearch),
+    ]
+
+
+def measure(case, scale, min_time, max_runs):
+    """Median/min milliseconds per call; runs until `min_time` seconds have been timed (at least 5 runs)"""
+    case.run(*case.setup(scale))  # warm-up: lazy imports, regex caches
+    timings = []
+    total = 0.0
+    while len(timings) < 5 or (total < min_time and len(timings) < max_runs):
+        args = case.setup(scale)
+        start = time.perf_counter()
+        case.run(*args)
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed * 1000)
+        total += elapsed
+    return {"median_ms": statistics.median(timings), "min_ms": min(timings), "runs": len(timings)}
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", True
+
+
+def load_history():
+    if not os.path.exists(RESULTS_PATH):
+        return []
+    with open(RESULTS_PATH, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def baseline_results(history, commit, baseline=None):
+    """{(case, scale): record} from the latest run of `baseline`, or of the latest other commit"""
+    runs = [r for r in history if (r["commit"].startswith(baseline) if baseline else r["commit"] != commit)]
+    if not runs:
+        return None, {}
+    run_id = runs[-1]["run_id"]
+    return runs[-1]["commit"], {(r["case"], r["scale"]): r for r in runs if r["run_id"] == run_id}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--scales", type=int, nargs="+", default=[1, 100])
+    arg_parser.add_argument("--filter", default="", help="only run cases whose name contains this text")
+    arg_parser.add_argument("--min-time", type=float, default=0.2, help="seconds of timed runs per case and scale")
+    arg_parser.add_argument("--max-runs", type=int, default=200)
+    arg_parser.add_argument("--baseline", help="commit to compare with (default: latest other commit in history)")
+    arg_parser.add_argument("--threshold", type=float, default=0.25, help="slowdown ratio reported as a regression")
+    arg_parser.add_argument("--no-save", action="store_true")
+    arg_parser.add_argument("--fail-on-regression", action="store_true")
+    args = arg_parser.parse_args()
+
+    block_network()
+    cases = pipeline_cases() + flat_file_cases() + html_and_json_cases()
+    cases = [case for case in cases if args.filter in case.name]
+
+    commit, dirty = git_commit()
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    history = load_history()
+    baseline_commit, baseline = baseline_results(history, commit, args.baseline)
+
+    print(f"commit {commit}{' (dirty)' if dirty else ''}, comparing with {baseline_commit or 'nothing'}\n")
+    print(f"{'case':<40}{'scale':>6}{'median ms':>12}{'min ms':>10}{'runs':>6}{'vs base':>10}")
+
+    records = []
+    regressions = []
+    for case in cases:
+        for scale in args.scales:
+            result = measure(case, scale, args.min_time, args.max_runs)
+            record = {"run_id": run_id, "commit": commit, "dirty": dirty, "python": platform.python_version(),
+                      "case": case.name, "scale": scale, **result}
+            records.append(record)
+
+            change = ""
+            previous = baseline.get((case.name, scale))
+            if previous:
+                ratio = result["median_ms"] / previous["median_ms"] - 1
+                change = f"{ratio:+.0%}"
+                # Ignore sub-0.05 ms differences, which are timer noise rather than regressions
+                if ratio > args.threshold and result["median_ms"] - previous["median_ms"] > 0.05:
+                    change += " !"
+                    regressions.append((case.name, scale, ratio))
+            print(f"{case.name[:39]:<40}{scale:>6}{result['median_ms']:>12.3f}{result['min_ms']:>10.3f}"
+                  f"{result['runs']:>6}{change:>10}")
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+        with open(RESULTS_PATH, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        print(f"\nSaved {len(records)} results to {os.path.relpath(RESULTS_PATH, REPO_ROOT)}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%} against {baseline_commit}:")
+        for name, scale, ratio in regressions:
+            print(f"  {name} (scale {scale}): {ratio:+.0%}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Quality and latency benchmark for the gene-name spell checker.
+
+Generates misspellings of known symbols (random deletions, insertions and
+substitutions) and reports top-1 accuracy and per-query latency of:
+
+  fallback-ngram      NgramMatcher on its own (cdist + TF-IDF rerank, no threshold)
+  suggest             the full suggest_gene_name pipeline
+  suggest-many        the batch API, timed as one call
+
+Symbols come from list.txt; without it a synthetic list is generated.
+
+    python -m benchmarks.bench_spell_checker
+    python -m benchmarks.bench_spell_checker --queries 500 --edits 1
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+import spell_checker
+
+
+def synthetic_symbols(count, rng):
+    alphabet = string.ascii_uppercase + string.digits
+    symbols = set()
+    while len(symbols) < count:
+        symbols.add(rng.choice(string.ascii_uppercase) + "".join(rng.choice(alphabet) for _ in range(rng.randint(2, 7))))
+    return sorted(symbols)
+
+
+def misspell(symbol, edits, rng):
+    for _ in range(edits):
+        i = rng.randrange(len(symbol))
+        c = rng.choice(string.ascii_uppercase + string.digits)
+        op = rng.choice("dis") if len(symbol) > 3 else rng.choice("is")
+        if op == "d":
+            symbol = symbol[:i] + symbol[i + 1:]
+        elif op == "i":
+            symbol = symbol[:i] + c + symbol[i:]
+        else:
+            symbol = symbol[:i] + c + symbol[i + 1:]
+    return symbol
+
+
+def run_engine(name, suggest, queries, targets):
+    latencies = []
+    correct = 0
+    missed = 0
+    for query, target in zip(queries, targets):
+        start = time.perf_counter()
+        result = suggest(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if result == target:
+            correct += 1
+        elif not result or result == "No close match found":
+            missed += 1
+    latencies.sort()
+    return {
+        "engine": name,
+        "accuracy": correct / len(queries),
+        "no_match": missed / len(queries),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+        "total_s": sum(latencies) / 1000,
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--queries", type=int, default=300)
+    arg_parser.add_argument("--edits", type=int, default=2, help="edits applied to each query")
+    arg_parser.add_argument("--min-length", type=int, default=6,
+                            help="only misspell symbols this long")
+    arg_parser.add_argument("--synthetic", type=int, default=40000, help="synthetic list size when list.txt is missing")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    rng = random.Random(args.seed)
+    gene_list = spell_checker.load_normalized_gene_list()
+    if not gene_list:
+        print(f"{spell_checker.GENE_LIST_PATH} not found, using {args.synthetic} synthetic symbols")
+        gene_list = synthetic_symbols(args.synthetic, rng)
+
+    candidates = [s for s in gene_list if len(s) >= args.min_length]
+    targets = rng.sample(candidates, min(args.queries, len(candidates)))
+    queries = [misspell(t, args.edits, rng) for t in targets]
+
+    start = time.perf_counter()
+    matcher = spell_checker.get_ngram_matcher(gene_list)
+    spell_checker.get_symbol_index(gene_list)
+    print(f"{len(gene_list)} symbols, {len(queries)} queries with {args.edits} edit(s); "
+          f"indexes built in {time.perf_counter() - start:.2f}s")
+
+    engines = [
+        ("fallback-ngram", lambda q: matcher.match([q])[0][0][0]),
+        ("suggest", lambda q: spell_checker.suggest_gene_name(q, gene_list=gene_list)),
+    ]
+
+    rows = [run_engine(name, suggest, queries, targets) for name, suggest in engines]
+
+    start = time.perf_counter()
+    batch = spell_checker.suggest_many(queries, gene_list)
+    elapsed = time.perf_counter() - start
+    rows.append({
+        "engine": "suggest-many",
+        "accuracy": sum(batch[q] == t for q, t in zip(queries, targets)) / len(queries),
+        "no_match": sum(batch[q] == "No close match found" for q in queries) / len(queries),
+        "p50_ms": elapsed * 1000 / len(queries),
+        "p95_ms": float("nan"),
+        "total_s": elapsed,
+    })
+
+    print(f"\n{'engine':<20}{'accuracy':>10}{'no match':>10}{'p50 ms':>10}{'p95 ms':>10}{'total s':>10}")
+    for row in rows:
+        print(f"{row['engine']:<20}{row['accuracy']:>10.3f}{row['no_match']:>10.3f}"
+              f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['total_s']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Recorded KEGG / NCBI / OpenTargets responses for offline benchmarks, plus
+helpers that scale them up (more entries, rows or lines) to stress the parsers.
+
+    kegg/hsa04110.kgml                   GET /get/hsa04110/kgml (trimmed)
+    kegg/hsa_672.txt                     GET /get/hsa:672
+    kegg/ds_H00031.txt                   GET /get/H00031
+    kegg/link_pathway_hsa.tsv            GET /link/pathway/hsa (excerpt)
+    kegg/drug_search_breast_cancer.html  kegg-bin/search?from=disease&q=breast+cancer&display=drug
+    ncbi/esearch_BRCA1.json              esearch.fcgi?db=gene&term=BRCA1[gene]...
+    opentargets/knownDrugs_TP53.json     knownDrugs GraphQL query for ENSG00000141510
+"""
+import json
+import os
+import re
+
+FIXTURE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Gene the KGML fixture is analysed for; scaling keeps its ID so every copy still relates to it
+CANDIDATE_GENE = "672"
+
+
+def path(name: str) -> str:
+    return os.path.join(FIXTURE_DIR, name)
+
+
+def read(name: str) -> str:
+    with open(path(name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def read_json(name: str):
+    return json.loads(read(name))
+
+
+def _offset_ids(text: str, pattern: str, offset: int, keep=()) -> str:
+    """Add `offset` to the number captured by `pattern`, except for IDs in `keep`"""
+    def shift(match):
+        number = match.group(1)
+        if number in keep:
+            return match.group(0)
+        start, end = match.start(1) - match.start(0), match.end(1) - match.start(0)
+        return match.group(0)[:start] + str(int(number) + offset) + match.group(0)[end:]
+    return re.sub(pattern, shift, text)
+
+
+def scaled_kgml(scale: int = 1, name: str = "kegg/hsa04110.kgml") -> str:
+    """KGML with `scale` copies of every entry and relation (entry and gene IDs offset per copy)"""
+    text = read(name)
+    if scale == 1:
+        return text
+
+    lines = text.split("\n")
+    first_block = next(i for i, line in enumerate(lines) if line.strip().startswith(("<entry", "<relation")))
+    last_block = max(i for i, line in enumerate(lines) if line.strip() in ("</entry>", "</relation>"))
+    header, body, footer = lines[:first_block], "\n".join(lines[first_block:last_block + 1]), lines[last_block + 1:]
+
+    copies = []
+    for k in range(scale):
+        copy = _offset_ids(body, r'(?:id|entry1|entry2)="(\d+)"', k * 10000)
+        copy = _offset_ids(copy, r'hsa:(\d+)', k * 1000000, keep=(CANDIDATE_GENE,))
+        copies.append(copy)
+    return "\n".join(header + copies + footer)
+
+
+def scaled_flat_file(name: str, scale: int = 1, sections=("PATHWAY", "GENE", "DISEASE", "DRUG", "DRUG_TARGET")) -> str:
+    """KEGG flat file with the lines of `sections` repeated `scale` times"""
+    text = read(name)
+    if scale == 1:
+        return text
+
+    lines = text.split("\n")
+    out = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line and not line.startswith(" ") and line[:12].strip() in sections:
+            # Header line plus its continuation lines (indented by 12 columns)
+            end = i + 1
+            while end < len(lines) and lines[end].startswith(" " * 12):
+                end += 1
+            out.extend(lines[i:end])
+            for _ in range(scale - 1):
+                out.append(" " * 12 + line[12:])
+                out.extend(lines[i + 1:end])
+            i = end
+        else:
+            out.append(line)
+            i += 1
+    return "\n".join(out)
+
+
+def scaled_drug_html(scale: int = 1, name: str = "kegg/drug_search_breast_cancer.html") -> str:
+    """Drug search page with every result row repeated `scale` times"""
+    text = read(name)
+    rows = re.findall(r"<tr><td.*?</tr>\n", text)
+    return text.replace("".join(rows), "".join(rows) * scale)
+
+
+def scaled_known_drugs(scale: int = 1, name: str = "opentargets/knownDrugs_TP53.json") -> str:
+    """OpenTargets knownDrugs response with `scale` times as many rows, as raw JSON text"""
+    data = read_json(name)
+    known = data["data"]["target"]["knownDrugs"]
+    known["rows"] = known["rows"] * scale
+    known["count"] = len(known["rows"])
+    return json.dumps(data)
+
+
+def gene_pathway_links(scale: int = 1, name: str = "kegg/link_pathway_hsa.tsv"):
+    """{"hsa:<gene>": {"path:hsa..."}} as returned by Logic.fetch_gene_pathway_links, with `scale` copies of every gene"""
+    links = {}
+    for line in read(name).splitlines():
+        gene, pathway = line.split("\t")
+        gene_id = int(gene.split(":")[1])
+        for k in range(scale):
+            links.setdefault(f"hsa:{gene_id + k * 1000000}", set()).add(pathway)
+    return links
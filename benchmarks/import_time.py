@@ -0,0 +1,108 @@
+"""
+Import-time benchmark for application startup.
+
+Runs `python -X importtime -c "import <modules>"` in a fresh interpreter and
+reports the cumulative import cost plus the heaviest modules. By default the
+modules are those imported before the window first shows: src.main and the
+tab it opens (STARTUP_IMPORTS). Exits with status 1 when the total exceeds
+the budget or when a module that should be loaded lazily (Qt, torch,
+pandas, ...) is imported at startup.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget-ms 300 --runs 5
+    python -m benchmarks.import_time --modules src.clasa
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import List
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# What main() imports synchronously: the module itself, then show_section1()
+# imports the first tab before the event loop starts. Keep in sync with src/main.py.
+STARTUP_IMPORTS = [
+    "src.main",
+    "src.geneInfoFetching.GeneInfoFetcher",
+]
+
+# Modules the startup path must not pull in; each tab or action imports them on first use
+FORBIDDEN_AT_STARTUP = [
+    "PyQt5", "pyvis", "pandas", "networkx", "webview",
+    "torch", "accelerate", "sentence_transformers", "faiss",
+    "bs4", "numpy", "selenium",
+]
+
+_LINE_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(modules: List[str]):
+    """Return ({module: (self_us, cumulative_us)}, top_level_cumulative_us) for one cold import of modules, in order"""
+    statement = f"import {', '.join(modules)}"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{statement} failed:\n{result.stderr[-2000:]}")
+
+    loaded = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = int(match.group(1)), int(match.group(2)), match.group(3), match.group(4)
+        loaded[name] = (self_us, cumulative_us)
+        if len(indent) == 1:  # top-level import, its cumulative time covers its children
+            total += cumulative_us
+    return loaded, total
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--modules", nargs="+", default=STARTUP_IMPORTS,
+                            help="modules imported in order (default: the startup path)")
+    arg_parser.add_argument("--runs", type=int, default=3)
+    arg_parser.add_argument("--budget-ms", type=float, default=500.0)
+    arg_parser.add_argument("--top", type=int, default=15)
+    args = arg_parser.parse_args()
+
+    totals = []
+    modules = {}
+    for _ in range(args.runs):
+        modules, total = measure(args.modules)
+        totals.append(total / 1000.0)
+
+    median_ms = statistics.median(totals)
+    print(f"import {', '.join(args.modules)}: median {median_ms:.1f} ms over {args.runs} runs "
+          f"(min {min(totals):.1f}, max {max(totals):.1f}, budget {args.budget_ms:.0f})")
+
+    print("\nHeaviest modules (self time, last run):")
+    for name, (self_us, cumulative_us) in sorted(modules.items(), key=lambda m: -m[1][0])[:args.top]:
+        print(f"  {self_us / 1000.0:8.1f} ms  {cumulative_us / 1000.0:8.1f} ms cumulative  {name}")
+
+    loaded_forbidden = sorted({
+        name for name in modules
+        for forbidden in FORBIDDEN_AT_STARTUP
+        if name == forbidden or name.startswith(forbidden + ".")
+    })
+
+    failed = False
+    if loaded_forbidden:
+        print(f"\nFAIL: heavy modules imported at startup: {', '.join(loaded_forbidden)}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"\nFAIL: startup imports take {median_ms:.1f} ms, budget is {args.budget_ms:.0f} ms")
+        failed = True
+
+    if not failed:
+        print("\nOK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
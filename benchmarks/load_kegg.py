@@ -0,0 +1,186 @@
+"""
+Load test of the KEGG fetch paths against the local mock server.
+
+Runs each workload at several concurrency levels and reports throughput,
+latency percentiles, failed calls and HTTP retries (403/5xx answered by the
+mock), so scaling and retry behaviour can be measured without calling KEGG.
+
+    python -m benchmarks.load_kegg
+    python -m benchmarks.load_kegg --latency 0.2 --jitter 0.1 --rate-limit 3 --concurrency 1 2 4
+    python -m benchmarks.load_kegg --url http://127.0.0.1:8765 --workload gene_run
+    python -m benchmarks.load_kegg --workload gene_entry --background 8   # lookups during a disease scan
+
+The mock is started in-process unless --url points at a running one
+(python -m benchmarks.mock_kegg).
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(REPO_ROOT, "src", "geneInfoFetching"))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks import mock_kegg
+
+
+def workloads():
+    from ph import Logic
+    from src.clasa import DiseaseGeneApp1
+    from src.geneMedicines.GeneClick import GeneDrugTargetFinder
+
+    disease_app = object.__new__(DiseaseGeneApp1)
+
+    def gene_run(gene):
+        # What process_gene used to download: the gene's pathways, then their KGMLs one by one
+        return Logic.fetch_first_kgmls(Logic.fetch_pathways_for_gene(gene))
+
+    def gene_run_streamed(gene):
+        # What process_gene does now: KGMLs download a few at a time and each is parsed on arrival
+        import pandas as pd
+        import pathway
+
+        counts, relations = pd.DataFrame(columns=["gene_id", "pathway"]), pd.DataFrame()
+        for pathway_id, kgml in Logic.iter_kgmls(Logic.fetch_pathways_for_gene(gene)):
+            relations, counts = pathway.process_pathway(kgml, gene, counts, relations, pathway_id)
+        return relations
+
+    return {
+        "pathways": lambda gene: Logic.fetch_pathways_for_gene(gene),
+        "kgml": lambda gene: Logic.fetch_first_kgmls([f"path:hsa0{4000 + gene % 1000}"]),
+        "gene_entry": lambda gene: GeneDrugTargetFinder(str(gene)).get_kegg_gene_info(f"hsa:{gene}"),
+        # A few popular entries requested over and over; overlapping calls share one download
+        "gene_entry_hot": lambda gene: GeneDrugTargetFinder(str(gene)).get_kegg_gene_info(f"hsa:{gene % 4 + 1}"),
+        "disease_entry": lambda gene: disease_app.get_kegg_disease(f"H{gene % 400 + 1:05d}"),
+        "gene_run": gene_run,
+        "gene_run_streamed": gene_run_streamed,
+    }
+
+
+@contextmanager
+def background_scan(threads):
+    """`threads` loops fetching disease entries at background priority, like a similar-disease scan"""
+    from src.common import endpoints, http
+    from src.common.scheduler import BACKGROUND, request_priority
+
+    stop = threading.Event()
+
+    def scan(offset):
+        with request_priority(BACKGROUND):
+            i = offset
+            while not stop.is_set():
+                http.get(endpoints.kegg_rest(f"get/H{i % 400 + 1:05d}"))
+                i += threads
+
+    workers = [threading.Thread(target=scan, args=(i,), daemon=True) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join()
+
+
+def run_level(call, concurrency, requests_count, rng, background=0):
+    from src.common.scheduler import INTERACTIVE, with_priority
+    from src.common.tracing import NETWORK, tracer
+
+    genes = [rng.randint(1, 100000) for _ in range(requests_count)]
+    latencies = []
+    failures = 0
+
+    def timed(gene):
+        start = time.perf_counter()
+        try:
+            call(gene)
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, e
+
+    with background_scan(background):
+        tracer.clear()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            # The measured calls stand for user lookups; unmarked threads would run at background priority
+            for latency, error in pool.map(with_priority(timed, INTERACTIVE), genes):
+                latencies.append(latency * 1000)
+                failures += error is not None
+        wall = time.perf_counter() - start
+
+    # Requests of the measured calls only, not the background scan's
+    http_spans = [s for s in tracer.spans if s.category == NETWORK and s.attrs.get("priority") != "background"]
+    attempts = sum(s.attrs.get("attempts", 1) for s in http_spans)
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "calls_per_s": requests_count / wall,
+        "http_per_s": attempts / wall,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+        "p99_ms": latencies[int(0.99 * (len(latencies) - 1))],
+        "failed": failures,
+        "retries": attempts - len(http_spans),
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--url", help="base URL of a running mock (default: start one in-process)")
+    arg_parser.add_argument("--workload", nargs="+", default=["pathways", "kgml", "gene_entry", "gene_entry_hot", "disease_entry", "gene_run", "gene_run_streamed"])
+    arg_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    arg_parser.add_argument("--requests", type=int, default=100, help="calls per workload and concurrency level")
+    arg_parser.add_argument("--retries", type=int, default=None, help="GENERT_HTTP_RETRIES for the run")
+    arg_parser.add_argument("--backoff", type=float, default=None, help="GENERT_HTTP_BACKOFF for the run")
+    arg_parser.add_argument("--background", type=int, default=0,
+                            help="threads scanning disease entries at background priority during each level")
+    mock_kegg.add_config_arguments(arg_parser)
+    args = arg_parser.parse_args()
+
+    server = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        server = mock_kegg.start(mock_kegg.config_from_args(args))
+        base_url = server.base_url
+
+    os.environ["GENERT_KEGG_REST_URL"] = base_url
+    os.environ["GENERT_KEGG_WEB_URL"] = base_url
+    # Disease lookups are recorded in the local search index; keep the user's cache out of it
+    os.environ["GENERT_CACHE_DIR"] = tempfile.mkdtemp(prefix="genert-load-")
+    if args.retries is not None:
+        os.environ["GENERT_HTTP_RETRIES"] = str(args.retries)
+    if args.backoff is not None:
+        os.environ["GENERT_HTTP_BACKOFF"] = str(args.backoff)
+
+    from src.common.tracing import tracer
+    tracer.enable()
+
+    available = workloads()
+    rng = random.Random(args.seed)
+    print(f"Mock KEGG at {base_url}: latency {args.latency}s +/- {args.jitter}s, error rate {args.error_rate}, "
+          f"403 rate {args.forbidden_rate}, rate limit {args.rate_limit or 'off'}/s")
+    print(f"\n{'workload':<16}{'conc':>6}{'calls/s':>10}{'http/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'p99 ms':>10}{'failed':>8}{'retries':>9}")
+    for name in args.workload:
+        for concurrency in args.concurrency:
+            row = run_level(available[name], concurrency, args.requests, rng, args.background)
+            print(f"{name:<16}{row['concurrency']:>6}{row['calls_per_s']:>10.1f}{row['http_per_s']:>10.1f}"
+                  f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}"
+                  f"{row['failed']:>8}{row['retries']:>9}")
+
+    if server is not None:
+        print(f"\nMock responses per status: {dict(sorted(server.stats.items()))}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
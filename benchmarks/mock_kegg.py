@@ -0,0 +1,220 @@
+"""
+Local stand-in for rest.kegg.jp / www.kegg.jp that replays the fixtures in
+benchmarks/fixtures, with configurable latency, jitter, server errors and
+403 rate limiting (what KEGG answers when a client sends too many requests).
+
+    python -m benchmarks.mock_kegg --port 8765 --latency 0.15 --jitter 0.05 --rate-limit 3
+    GENERT_KEGG_REST_URL=http://127.0.0.1:8765 GENERT_KEGG_WEB_URL=http://127.0.0.1:8765 python -m src.main
+
+Routes (anything else is a 404):
+    /get/<pathway>/kgml         hsa04110 KGML, renamed to the requested pathway
+    /get/<hsa:gene>             BRCA1 gene entry, renamed to the requested gene
+    /get/<H00000>               breast cancer disease entry, renamed to the requested disease
+    /link/pathway/hsa[:<gene>]  gene -> pathway links (made up, but stable, for unknown genes)
+    /link/pathway/disease       disease -> pathway links
+    /list/pathway/hsa           human pathway list (the pathways of the link fixture)
+    /list/disease               disease list
+    /find/disease/<query>       diseases whose name contains the query
+    /kegg-bin/search?...        drug search result page
+    /_stats                     request counts per status, as JSON
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from benchmarks import fixtures
+
+SYNTHETIC_DISEASES = 400
+
+
+class MockConfig:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, forbidden_rate=0.0, rate_limit=0.0, seed=None):
+        self.latency = latency                # seconds added to every response
+        self.jitter = jitter                  # +/- seconds, uniform
+        self.error_rate = error_rate          # share of requests answered with 500
+        self.forbidden_rate = forbidden_rate  # share of requests answered with 403 regardless of load
+        self.rate_limit = rate_limit          # requests per second before answering 403 (0 = unlimited)
+        self.random = random.Random(seed)
+
+
+class KeggData:
+    """Responses built once from the fixtures"""
+
+    def __init__(self):
+        self.kgml = fixtures.read("kegg/hsa04110.kgml")
+        self.gene = fixtures.read("kegg/hsa_672.txt")
+        self.disease = fixtures.read("kegg/ds_H00031.txt")
+        self.drug_html = fixtures.read("kegg/drug_search_breast_cancer.html")
+
+        self.gene_links = {}
+        for line in fixtures.read("kegg/link_pathway_hsa.tsv").splitlines():
+            gene, pathway = line.split("\t")
+            self.gene_links.setdefault(gene, []).append(pathway)
+        self.pathways = sorted({p for pathways in self.gene_links.values() for p in pathways})
+
+        self.diseases = [("H00031", "Breast cancer")] + [
+            (f"H{i:05d}", f"Synthetic disease {i}") for i in range(1, SYNTHETIC_DISEASES + 1) if i != 31
+        ]
+        disease_pathways = re.findall(r"hsa\d{5}", self.disease.split("\nPATHWAY", 1)[1].split("\nGENE", 1)[0])
+        self.disease_links = {"H00031": [f"path:{p}" for p in disease_pathways]}
+        for disease_id, _ in self.diseases[1:]:
+            self.disease_links[disease_id] = self.pick_pathways(disease_id)
+
+    def pick_pathways(self, key):
+        rng = random.Random(key)
+        return rng.sample(self.pathways, rng.randint(2, min(8, len(self.pathways))))
+
+    def links_for_gene(self, gene):
+        return self.gene_links.get(gene) or self.pick_pathways(gene)
+
+    def response(self, path):
+        """(status, content type, body) for a request path"""
+        parts = [unquote(p) for p in urlsplit(path).path.strip("/").split("/")]
+        text = "text/plain; charset=utf-8"
+
+        if parts[0] == "get" and len(parts) == 3 and parts[2] == "kgml":
+            pathway = parts[1].replace("path:", "")
+            return 200, "application/xml", self.kgml.replace("hsa04110", pathway)
+        if parts[0] == "get" and len(parts) == 2:
+            entry = parts[1].replace("ds:", "")
+            if re.fullmatch(r"H\d{5}", entry):
+                return 200, text, self.disease.replace("H00031", entry, 1)
+            gene = entry.replace("hsa:", "")
+            if gene.isdigit():
+                return 200, text, self.gene.replace("672", gene, 1)
+        if parts[:2] == ["link", "pathway"] and len(parts) == 3:
+            if parts[2] == "hsa":
+                return 200, text, "".join(f"{g}\t{p}\n" for g, pathways in self.gene_links.items() for p in pathways)
+            if parts[2].startswith("hsa:"):
+                return 200, text, "".join(f"{parts[2]}\t{p}\n" for p in self.links_for_gene(parts[2]))
+            if parts[2] == "disease":
+                return 200, text, "".join(f"ds:{d}\t{p}\n" for d, pathways in self.disease_links.items() for p in pathways)
+        if parts == ["list", "pathway", "hsa"]:
+            return 200, text, "".join(f"{p.replace('path:', '')}\tPathway {p[-5:]} - Homo sapiens (human)\n" for p in self.pathways)
+        if parts == ["list", "disease"]:
+            return 200, text, "".join(f"ds:{d}\t{name}\n" for d, name in self.diseases)
+        if parts[:2] == ["find", "disease"] and len(parts) == 3:
+            query = parts[2].lower()
+            return 200, text, "".join(f"ds:{d}\t{name}\n" for d, name in self.diseases if query in name.lower())
+        if parts[:2] == ["kegg-bin", "search"]:
+            return 200, "text/html; charset=utf-8", self.drug_html
+        return 404, text, ""
+
+
+class MockKeggServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: MockConfig):
+        super().__init__(address, MockKeggHandler)
+        self.config = config
+        self.data = KeggData()
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, status):
+        with self._lock:
+            self.stats[status] = self.stats.get(status, 0) + 1
+
+    def over_rate_limit(self):
+        """Fixed one-second window, like KEGG's per-client limit"""
+        if not self.config.rate_limit:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start, self._window_count = now, 0
+            self._window_count += 1
+            return self._window_count > self.config.rate_limit
+
+    def draw(self):
+        with self._lock:
+            delay = self.config.latency + self.config.random.uniform(-self.config.jitter, self.config.jitter)
+            return max(0.0, delay), self.config.random.random(), self.config.random.random()
+
+
+class MockKeggHandler(BaseHTTPRequestHandler):
+    server: MockKeggServer
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without this each keep-alive response waits for a delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path == "/_stats":
+            return self.send(200, "application/json", json.dumps(self.server.stats))
+
+        delay, error_draw, forbidden_draw = self.server.draw()
+        time.sleep(delay)
+        config = self.server.config
+        if self.server.over_rate_limit() or forbidden_draw < config.forbidden_rate:
+            status, content_type, body = 403, "text/plain", "Forbidden"
+        elif error_draw < config.error_rate:
+            status, content_type, body = 500, "text/plain", "Internal Server Error"
+        else:
+            status, content_type, body = self.server.data.response(self.path)
+        self.server.record(status)
+        self.send(status, content_type, body)
+
+    def send(self, status, content_type, body):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start(config: MockConfig = None, host="127.0.0.1", port=0) -> MockKeggServer:
+    """Serve in a daemon thread (port 0 picks a free port); stop with server.shutdown()"""
+    server = MockKeggServer((host, port), config or MockConfig())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_config_arguments(arg_parser):
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="seconds added to each response")
+    arg_parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of uniform jitter")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="share of 500 responses")
+    arg_parser.add_argument("--forbidden-rate", type=float, default=0.0, help="share of random 403 responses")
+    arg_parser.add_argument("--rate-limit", type=float, default=0.0, help="requests/s before answering 403 (0 = off)")
+    arg_parser.add_argument("--seed", type=int, default=None)
+
+
+def config_from_args(args) -> MockConfig:
+    return MockConfig(args.latency, args.jitter, args.error_rate, args.forbidden_rate, args.rate_limit, args.seed)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    add_config_arguments(arg_parser)
+    args = arg_parser.parse_args()
+
+    server = MockKeggServer((args.host, args.port), config_from_args(args))
+    print(f"Mock KEGG on {server.base_url}; point the app at it with")
+    print(f"  GENERT_KEGG_REST_URL={server.base_url} GENERT_KEGG_WEB_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nRequests per status: {server.stats}")
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
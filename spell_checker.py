@@ -1,43 +1,329 @@
+import bisect
+import hashlib
 import os
+import threading
 import numpy as np
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
-import faiss
-from rapidfuzz import process
+from rapidfuzz import fuzz, process
 from rapidfuzz.distance import Levenshtein
-from openai import OpenAI
 
 load_dotenv()
 
+GENE_LIST_PATH = "list.txt"
+# Lowest n-gram score accepted as a correction; weaker matches are more often wrong than right
+NGRAM_THRESHOLD = 0.75
+
+_gene_list_cache = {"mtime": None, "genes": [], "normalized": []}
+_warned_missing_list = False
+
+
+def gene_list_path():
+    """list.txt in the working directory, else the copy next to this module"""
+    if os.path.exists(GENE_LIST_PATH):
+        return GENE_LIST_PATH
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), GENE_LIST_PATH)
+
+
 def load_gene_list():
+    """Read list.txt once; it is only re-read when the file changes"""
     try:
-        with open("list.txt", "r") as file:
-            return [line.strip() for line in file.readlines()]
+        path = gene_list_path()
+        mtime = os.path.getmtime(path)
+        if _gene_list_cache["mtime"] != mtime:
+            with open(path, "r") as file:
+                _gene_list_cache["genes"] = [line.strip() for line in file.readlines()]
+            _gene_list_cache["normalized"] = [g.strip().upper() for g in _gene_list_cache["genes"]]
+            _gene_list_cache["mtime"] = mtime
+        return _gene_list_cache["genes"]
     except Exception:
         return []
 
-def build_index(gene_list):
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    embeddings = model.encode(gene_list)
-    index = faiss.IndexFlatL2(embeddings.shape[1])
-    index.add(np.array(embeddings))
-    return model, index
-
-def retrieve_candidates(user_input, model, index, gene_list, top_k=3):
-    user_vec = model.encode([user_input])
-    distances, indices = index.search(np.array(user_vec), top_k)
-    candidates = [gene_list[i] for i in indices[0]]
-    return candidates, distances[0], user_vec
-
-def fuzzy_match(user_input, gene_list, threshold=85):
-    if len(user_input) <= 4:
-        threshold = 70
-    match, score, _ = process.extractOne(user_input, gene_list)
-    return match if score >= threshold else None
-
-def find_closest_levenshtein(user_input, gene_list):
+
+def load_normalized_gene_list():
+    """Upper-cased gene symbols, cached alongside the raw list"""
+    load_gene_list()
+    return _gene_list_cache["normalized"]
+
+
+def gene_list_hash(gene_list):
+    return hashlib.sha1("\n".join(gene_list).encode("utf-8")).hexdigest()[:16]
+
+
+class SymbolIndex:
+    """
+    SymSpell-style deletion dictionary over gene symbols.
+
+    Every symbol is filed under all strings obtained by deleting up to
+    `max_distance` characters. Two words within edit distance k share a
+    k-deletion variant, so a lookup only generates the input's own deletes
+    and verifies the few symbols found there, instead of scanning the list.
+
+    Deeper indexes grow combinatorially, so lookups asking for more than
+    `max_distance` edits (suggest_gene_name allows len/3, 3+ for long
+    symbols) are capped at it; further misspellings are left to the n-gram
+    matcher.
+    """
+
+    def __init__(self, symbols, max_distance=2):
+        self.symbols = list(dict.fromkeys(symbols))
+        self.symbol_set = set(self.symbols)
+        self.max_distance = max_distance
+        self._deletes = {}
+
+        for i, symbol in enumerate(self.symbols):
+            for variant in self._deletes_of(symbol, max_distance):
+                # Most variants belong to a single symbol; store a bare int to save memory
+                current = self._deletes.get(variant)
+                if current is None:
+                    self._deletes[variant] = i
+                elif isinstance(current, int):
+                    self._deletes[variant] = (current, i)
+                else:
+                    self._deletes[variant] = current + (i,)
+
+    @staticmethod
+    def _deletes_of(word, depth):
+        variants = {word}
+        frontier = {word}
+        for _ in range(depth):
+            frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+            variants |= frontier
+        return variants
+
+    def lookup(self, term, max_distance=None):
+        """All (symbol, distance) pairs within max_distance, closest first"""
+        k = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        if term in self.symbol_set:
+            return [(term, 0)]
+
+        candidates = set()
+        for variant in self._deletes_of(term, k):
+            found = self._deletes.get(variant)
+            if found is None:
+                continue
+            if isinstance(found, int):
+                candidates.add(found)
+            else:
+                candidates.update(found)
+
+        matches = []
+        for i in candidates:
+            symbol = self.symbols[i]
+            distance = Levenshtein.distance(term, symbol, score_cutoff=k)
+            if distance <= k:
+                matches.append((symbol, distance))
+        matches.sort(key=lambda m: (m[1], abs(len(m[0]) - len(term)), m[0]))
+        return matches
+
+    def closest(self, term, max_distance=None):
+        matches = self.lookup(term, max_distance)
+        return matches[0][0] if matches else None
+
+
+_symbol_index = None
+_symbol_index_lock = threading.Lock()
+
+
+def get_symbol_index(gene_list):
+    """Process-wide SymbolIndex, rebuilt only when the gene list changes"""
+    global _symbol_index
+    with _symbol_index_lock:
+        if _symbol_index is not None and (_symbol_index[0] is gene_list or _symbol_index[1] == gene_list_hash(gene_list)):
+            return _symbol_index[2]
+        index = SymbolIndex(gene_list)
+        _symbol_index = (gene_list, gene_list_hash(gene_list), index)
+        return index
+
+
+class NgramMatcher:
+    """
+    Vectorised matcher for inputs too far from any symbol for the deletion index.
+
+    A whole batch of inputs is scored against every symbol with one rapidfuzz
+    cdist call (normalised edit similarity, all cores). The best candidates per
+    input are then reranked with the cosine between TF-IDF vectors of their
+    character 1-3 grams (with start and end markers), kept in a sparse matrix.
+    """
+
+    NGRAM_SIZES = (1, 2, 3)
+    EDIT_WEIGHT = 0.8
+
+    def __init__(self, symbols):
+        from scipy import sparse
+
+        self.symbols = list(dict.fromkeys(symbols))
+        self._vocab = {}
+        rows, cols = [], []
+        for i, symbol in enumerate(self.symbols):
+            for gram in self._ngrams(symbol):
+                rows.append(i)
+                cols.append(self._vocab.setdefault(gram, len(self._vocab)))
+
+        counts = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(self.symbols), len(self._vocab))
+        )
+        document_freq = np.bincount(counts.indices, minlength=len(self._vocab))
+        self._idf = (np.log((1 + len(self.symbols)) / (1 + document_freq)) + 1).astype(np.float32)
+        self.matrix = self._normalise(counts.multiply(self._idf).tocsr())
+
+    @classmethod
+    def _ngrams(cls, word):
+        padded = f"^{word}$"
+        return [padded[i:i + n] for n in cls.NGRAM_SIZES for i in range(len(padded) - n + 1)]
+
+    @staticmethod
+    def _normalise(matrix):
+        from scipy import sparse
+
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.diags(1 / norms).dot(matrix).tocsr()
+
+    def vectorise(self, inputs):
+        from scipy import sparse
+
+        rows, cols, values = [], [], []
+        for i, word in enumerate(inputs):
+            for gram in self._ngrams(word):
+                col = self._vocab.get(gram)
+                if col is not None:  # n-grams unseen in the symbol list cannot match anything
+                    rows.append(i)
+                    cols.append(col)
+                    values.append(self._idf[col])
+        vectors = sparse.csr_matrix(
+            (np.asarray(values, dtype=np.float32), (rows, cols)),
+            shape=(len(inputs), len(self._vocab))
+        )
+        return self._normalise(vectors)
+
+    def match(self, inputs, top_k=1, candidates=20, chunk_size=128):
+        """For every input, the top_k (symbol, score) pairs with score in [0, 1]"""
+        inputs = [word.strip().upper() for word in inputs]
+        results = []
+        for start in range(0, len(inputs), chunk_size):
+            chunk = inputs[start:start + chunk_size]
+            edit = process.cdist(chunk, self.symbols, scorer=fuzz.ratio, dtype=np.float32, workers=-1) / 100
+            vectors = self.vectorise(chunk)
+
+            keep = min(candidates, len(self.symbols))
+            shortlist = np.argpartition(-edit, keep - 1, axis=1)[:, :keep]
+
+            # TF-IDF cosine of every (input, candidate) pair, separating candidates
+            # at the same edit distance by the rare n-grams they share
+            flat = shortlist.ravel()
+            owners = np.repeat(np.arange(len(chunk)), keep)
+            cosine = np.asarray(self.matrix[flat].multiply(vectors[owners]).sum(axis=1)).reshape(shortlist.shape)
+
+            scores = self.EDIT_WEIGHT * np.take_along_axis(edit, shortlist, axis=1) + (1 - self.EDIT_WEIGHT) * cosine
+            order = np.argsort(-scores, axis=1, kind="stable")[:, :top_k]
+            for row in range(len(chunk)):
+                results.append([(self.symbols[shortlist[row, b]], float(scores[row, b])) for b in order[row]])
+        return results
+
+
+_ngram_matcher = None
+_ngram_lock = threading.Lock()
+
+
+def get_ngram_matcher(gene_list):
+    """Process-wide NgramMatcher, rebuilt only when the gene list changes"""
+    global _ngram_matcher
+    with _ngram_lock:
+        if _ngram_matcher is None or _ngram_matcher[0] is not gene_list:
+            _ngram_matcher = (gene_list, NgramMatcher(gene_list))
+        return _ngram_matcher[1]
+
+
+def ngram_match(user_inputs, gene_list, threshold=NGRAM_THRESHOLD):
+    """Best symbol for each input (None below threshold) from one vectorised call"""
+    matches = get_ngram_matcher(gene_list).match(user_inputs)
+    return [best[0][0] if best and best[0][1] >= threshold else None for best in matches]
+
+
+class PrefixIndex:
+    """Sorted gene symbols; completing a prefix is two bisects instead of a scan"""
+
+    def __init__(self, symbols):
+        self.symbols = sorted(set(symbols))
+
+    def complete(self, prefix, limit=10):
+        prefix = prefix.strip().upper()
+        if not prefix:
+            return []
+        start = bisect.bisect_left(self.symbols, prefix)
+        end = bisect.bisect_left(self.symbols, prefix + "\uffff")
+        # Shorter symbols first, so typing "TP5" offers TP53 before TP53BP1
+        return sorted(self.symbols[start:end], key=lambda s: (len(s), s))[:limit]
+
+
+_prefix_index = None
+
+
+def get_prefix_index(gene_list=None):
+    global _prefix_index
+    gene_list = gene_list if gene_list is not None else load_normalized_gene_list()
+    if _prefix_index is None or _prefix_index[0] is not gene_list:
+        _prefix_index = (gene_list, PrefixIndex(gene_list))
+    return _prefix_index[1]
+
+
+def complete_gene_name(prefix, limit=10):
+    """Gene symbols starting with `prefix`, for autocomplete"""
+    return get_prefix_index().complete(prefix, limit)
+
+
+def warm_up_gene_indexes():
+    """Build the prefix, deletion and n-gram indexes in a background thread so the first search does not wait"""
+    def build():
+        gene_list = load_normalized_gene_list()
+        if gene_list:
+            get_prefix_index(gene_list)
+            get_symbol_index(gene_list)
+            get_ngram_matcher(gene_list)
+
+    threading.Thread(target=build, daemon=True).start()
+
+
+def find_closest_levenshtein(user_input, gene_list, max_distance=None):
+    """Closest symbol by edit distance; with max_distance set, None when nothing is that close"""
+    index = get_symbol_index(gene_list)
+    match = index.closest(user_input, max_distance)
+    if match is not None or max_distance is not None:
+        return match
     return min(gene_list, key=lambda g: Levenshtein.distance(user_input, g))
 
+def suggest_many(user_inputs, gene_list=None):
+    """
+    Correct a whole batch of symbols (e.g. an uploaded gene panel).
+
+    Returns {input: suggestion}. Exact and near matches come from the
+    deletion index; only inputs with no symbol within the allowed edit
+    distance fall back to the n-gram matcher.
+    """
+    gene_list = gene_list if gene_list is not None else load_normalized_gene_list()
+    if not gene_list:
+        return {user_input: "No gene list found" for user_input in user_inputs}
+
+    index = get_symbol_index(gene_list)
+    suggestions = {}
+    misses = []
+    for raw_input in user_inputs:
+        user_input = raw_input.strip().upper()
+        if raw_input in suggestions:
+            continue
+
+        max_allowed_dist = max(1, len(user_input) // 3)
+        suggestions[raw_input] = index.closest(user_input, max_allowed_dist)
+        if suggestions[raw_input] is None:
+            misses.append(raw_input)
+
+    # Everything the index could not place is scored in one vectorised batch
+    if misses:
+        for raw_input, match in zip(misses, ngram_match(misses, gene_list)):
+            suggestions[raw_input] = match
+    return {raw_input: match or "No close match found" for raw_input, match in suggestions.items()}
+
 def ask_llm_for_correction(user_input, suggestions, distances):
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
@@ -53,6 +339,7 @@ If none are correct, respond with "No close match found".
 """
 
     try:
+        from openai import OpenAI
         client = OpenAI(api_key=api_key)
         response = client.chat.completions.create(
             model="gpt-3.5-turbo",
@@ -63,38 +350,56 @@ If none are correct, respond with "No close match found".
     except Exception:
         return suggestions[0] if suggestions else "No close match found"
 
-def suggest_gene_name(user_input):
-    gene_list = [g.strip().upper() for g in load_gene_list()]
+def suggest_gene_name(user_input, gene_list=None):
+    gene_list = gene_list if gene_list is not None else load_normalized_gene_list()
     if not gene_list:
         return "No gene list found"
 
     user_input = user_input.strip().upper()
 
     # Exact match
-    if user_input in gene_list:
+    if user_input in get_symbol_index(gene_list).symbol_set:
         return user_input
 
-    # Fuzzy match with dynamic threshold for short names
-    fuzzy = fuzzy_match(user_input, gene_list, threshold=80 if len(user_input) <= 5 else 85)
-    if fuzzy:
-        return fuzzy
-
-    # Levenshtein fallback
-    lev_match = find_closest_levenshtein(user_input, gene_list)
+    # Levenshtein via the deletion index (len/3 edits, at most its depth of 2); a stronger signal than n-gram similarity
     max_allowed_dist = max(1, len(user_input) // 3)  # e.g., 4-letter input allows dist 1
-    if Levenshtein.distance(user_input, lev_match) <= max_allowed_dist:
+    lev_match = find_closest_levenshtein(user_input, gene_list, max_allowed_dist)
+    if lev_match:
         return lev_match
 
-    #fallback
-    if len(user_input) > 5:
-        model, index = build_index(gene_list)
-        candidates, distances, _ = retrieve_candidates(user_input, model, index, gene_list)
-        if distances[0] < 0.4:
-            return candidates[0]
+    # Fallback: character n-grams from the prebuilt matcher, like suggest_many
+    match = ngram_match([user_input], gene_list)[0]
+    if match:
+        return match
 
-    # 5. Nothing worked
+    # Nothing close enough
     return "No close match found"
 
+def validate_gene_name(user_input):
+    """
+    Check a symbol against the local gene list before it is sent to NCBI.
+
+    Returns (symbol, known): `symbol` is the input if it is a known symbol,
+    otherwise the closest correction (None when nothing is close); `known`
+    tells whether the input itself is in the list. Without a gene list the
+    input is passed through unchanged, and a warning is printed once.
+    """
+    global _warned_missing_list
+    user_input = user_input.strip().upper()
+    gene_list = load_normalized_gene_list()
+    if not gene_list:
+        if not _warned_missing_list:
+            _warned_missing_list = True
+            print(f"{GENE_LIST_PATH} not found ({gene_list_path()}): gene names are not checked for typos")
+        return user_input, True
+    if user_input in get_symbol_index(gene_list).symbol_set:
+        return user_input, True
+
+    suggestion = suggest_gene_name(user_input)
+    if suggestion in ("No close match found", "No gene list found"):
+        suggestion = None
+    return suggestion, False
+
 if __name__ == "__main__":
     examples = ["bc1", "akt", "tp5", "sos1", "abcd"]
     for gene in examples:
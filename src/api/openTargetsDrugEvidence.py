@@ -1,4 +1,5 @@
-import requests
+from src.common import http
+from src.common.tracing import PARSE, traced
 
 API_URL = "https://api.platform.opentargets.org/api/v4/graphql"
 TARGET_GENE = "ENSG00000141510"  # TP53
@@ -31,12 +32,13 @@ def query_open_targets_api():
     payload = {"query": graphql_query}
     headers = {"Content-Type": "application/json"}
 
-    response = requests.post(API_URL, json=payload, headers=headers)
+    response = http.post(API_URL, json=payload, headers=headers)
     if response.status_code != 200:
         raise Exception(f"API request failed: {response.status_code} - {response.reason}")
     return response.json()
 
 
+@traced("OpenTargets response parse", PARSE)
 def parse_drug_evidence(response_json):
     try:
         known_drugs = response_json["data"]["target"]["knownDrugs"]
@@ -1,9 +1,18 @@
-import requests
 import re
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
 from tkinter.font import Font
-from bs4 import BeautifulSoup
+
+from src.common import endpoints, http
+from src.common.disease_index import loaded_disease_index, record_disease_entry, warm_up_disease_index
+from src.common.prefetch import get_prefetcher
+from src.common.scheduler import mark_interactive, with_priority
+from src.common.tracing import PARSE, traced
+from src.common.virtual_list import VirtualTreeview
+
+# Search results whose details are fetched ahead of a double-click
+PREFETCH_TOP_N = 3
 
 
 class DiseaseGeneApp1:
@@ -28,6 +37,13 @@ class DiseaseGeneApp1:
         # Create UI
         self.create_widgets()
 
+        # Offline name index for instant and search-as-you-type lookups
+        self.live_search_job = None
+        warm_up_disease_index()
+
+        # Disease whose details were requested last; slower earlier lookups are not shown over it
+        self.details_request = None
+
     def create_widgets(self):
         main_frame = ttk.Frame(self.root, padding="10")
         main_frame.pack(fill=tk.BOTH, expand=True)
@@ -41,6 +57,7 @@ class DiseaseGeneApp1:
         self.disease_entry = ttk.Entry(search_frame, width=40)
         self.disease_entry.pack(side=tk.LEFT, padx=10)
         self.disease_entry.bind('<Return>', lambda e: self.search_disease())
+        self.disease_entry.bind('<KeyRelease>', self.schedule_live_search)
 
         search_btn = ttk.Button(search_frame, text="Search by Name", command=self.search_disease)
         search_btn.pack(side=tk.LEFT, padx=5)
@@ -63,24 +80,20 @@ class DiseaseGeneApp1:
         self.search_results_frame = ttk.Frame(self.notebook)
         self.notebook.add(self.search_results_frame, text="Search Results")
 
-        # Treeview for search results
-        self.results_tree = ttk.Treeview(self.search_results_frame,
-                                         columns=('disease_id', 'disease_name'),
-                                         show='headings')
-        self.results_tree.heading('disease_id', text='Disease ID')
-        self.results_tree.heading('disease_name', text='Disease Name')
-
-        # Configure column widths
-        self.results_tree.column('disease_id', width=100)
-        self.results_tree.column('disease_name', width=400)
-
-        # Add scrollbar
-        results_scrollbar = ttk.Scrollbar(self.search_results_frame, orient="vertical", command=self.results_tree.yview)
-        self.results_tree.configure(yscrollcommand=results_scrollbar.set)
-
-        # Pack search results widgets
-        self.results_tree.pack(side="left", fill="both", expand=True)
-        results_scrollbar.pack(side="right", fill="y")
+        # Filter on the loaded results (applied to the data, not the widgets)
+        filter_frame = ttk.Frame(self.search_results_frame)
+        filter_frame.pack(fill=tk.X, pady=(5, 0))
+        ttk.Label(filter_frame, text="Filter:").pack(side=tk.LEFT, padx=5)
+        self.results_filter_var = tk.StringVar()
+        self.results_filter_var.trace_add("write", lambda *args: self.results_tree.set_filter(self.results_filter_var.get()))
+        ttk.Entry(filter_frame, textvariable=self.results_filter_var, width=30).pack(side=tk.LEFT)
+
+        # Virtualised list for search results (broad queries return 1000+ rows)
+        self.results_tree = VirtualTreeview(self.search_results_frame,
+                                            columns=('disease_id', 'disease_name'),
+                                            headings=('Disease ID', 'Disease Name'),
+                                            widths=(100, 400))
+        self.results_tree.pack(fill="both", expand=True)
 
         # Bind double-click to load disease details
         self.results_tree.bind("<Double-1>", self.on_result_double_click)
@@ -128,41 +141,21 @@ class DiseaseGeneApp1:
         details_notebook.add(pathways_frame, text="Pathways")
 
         # Pathways treeview
-        self.pathways_tree = ttk.Treeview(pathways_frame, columns=('id', 'name'), show='headings')
-        self.pathways_tree.heading('id', text='Pathway ID')
-        self.pathways_tree.heading('name', text='Pathway Name')
-        self.pathways_tree.column('id', width=100)
-        self.pathways_tree.column('name', width=400)
-
-        pathways_scrollbar = ttk.Scrollbar(pathways_frame, orient="vertical", command=self.pathways_tree.yview)
-        self.pathways_tree.configure(yscrollcommand=pathways_scrollbar.set)
-
-        self.pathways_tree.pack(side="left", fill="both", expand=True)
-        pathways_scrollbar.pack(side="right", fill="y")
+        self.pathways_tree = VirtualTreeview(pathways_frame, columns=('id', 'name'),
+                                             headings=('Pathway ID', 'Pathway Name'),
+                                             widths=(100, 400))
+        self.pathways_tree.pack(fill="both", expand=True)
 
         # Genes tab
         genes_frame = ttk.Frame(details_notebook)
         details_notebook.add(genes_frame, text="Genes")
 
         # Genes treeview
-        self.genes_tree = ttk.Treeview(genes_frame,
-                                       columns=('name', 'detail', 'hsa', 'ko'),
-                                       show='headings')
-        self.genes_tree.heading('name', text='Gene Name')
-        self.genes_tree.heading('detail', text='Details')
-        self.genes_tree.heading('hsa', text='HSA ID')
-        self.genes_tree.heading('ko', text='KO ID')
-
-        self.genes_tree.column('name', width=150)
-        self.genes_tree.column('detail', width=250)
-        self.genes_tree.column('hsa', width=100)
-        self.genes_tree.column('ko', width=100)
-
-        genes_scrollbar = ttk.Scrollbar(genes_frame, orient="vertical", command=self.genes_tree.yview)
-        self.genes_tree.configure(yscrollcommand=genes_scrollbar.set)
-
-        self.genes_tree.pack(side="left", fill="both", expand=True)
-        genes_scrollbar.pack(side="right", fill="y")
+        self.genes_tree = VirtualTreeview(genes_frame,
+                                          columns=('name', 'detail', 'hsa', 'ko'),
+                                          headings=('Gene Name', 'Details', 'HSA ID', 'KO ID'),
+                                          widths=(150, 250, 100, 100))
+        self.genes_tree.pack(fill="both", expand=True)
 
         # Drugs tab (new)
         drugs_frame = ttk.Frame(details_notebook)
@@ -190,11 +183,40 @@ class DiseaseGeneApp1:
         status_bar = ttk.Label(self.root, textvariable=self.status_var, relief=tk.SUNKEN)
         status_bar.pack(fill=tk.X)
 
-    def search_disease(self):
-        """Search for a disease by name in the KEGG database"""
+    def schedule_live_search(self, event):
+        """Debounce keystrokes and search the local index while the user types"""
+        if event.keysym in ('Return', 'Up', 'Down', 'Left', 'Right', 'Tab'):
+            return
+        if self.live_search_job is not None:
+            self.root.after_cancel(self.live_search_job)
+        self.live_search_job = self.root.after(150, lambda: self.search_disease(live=True))
+
+    def search_disease(self, live=False):
+        """Search for a disease by name, offline when the local index is loaded, else via KEGG"""
+        self.live_search_job = None
         disease_name = self.disease_entry.get().strip()
         if not disease_name:
-            messagebox.showwarning("Input Error", "Please enter a disease name")
+            if not live:
+                messagebox.showwarning("Input Error", "Please enter a disease name")
+            return
+
+        index = loaded_disease_index()
+        if index is not None:
+            results = index.search(disease_name)
+            self.results_tree.set_rows(results, keep_position=False)
+            self.prefetch_details(results)
+            if results:
+                self.status_var.set(f"Found {len(results)} results for '{disease_name}'")
+                self.notebook.select(0)
+            elif live:
+                self.status_var.set(f"No diseases match '{disease_name}'")
+            else:
+                messagebox.showinfo("No Results", f"No diseases found matching '{disease_name}'")
+                self.status_var.set("No results found")
+            return
+
+        if live:
+            # Index still loading; typing should not trigger network searches
             return
 
         self.status_var.set(f"Searching for {disease_name}...")
@@ -202,11 +224,11 @@ class DiseaseGeneApp1:
 
         try:
             # Clear previous results
-            self.results_tree.delete(*self.results_tree.get_children())
+            self.results_tree.clear()
 
             # Search KEGG via REST API
-            search_url = f'https://rest.kegg.jp/find/disease/{disease_name}'
-            response = requests.get(search_url)
+            search_url = endpoints.kegg_rest(f'find/disease/{disease_name}')
+            response = http.get(search_url)
 
             if response.status_code != 200:
                 messagebox.showerror("Error", f"Search failed with status code: {response.status_code}")
@@ -225,8 +247,9 @@ class DiseaseGeneApp1:
                     disease_desc = parts[1]
                     results.append((disease_id, disease_desc))
 
-                    # Add to treeview
-                    self.results_tree.insert('', 'end', values=(disease_id, disease_desc))
+            # Only the visible rows are rendered
+            self.results_tree.set_rows(results, keep_position=False)
+            self.prefetch_details(results)
 
             if not results:
                 messagebox.showinfo("No Results", f"No diseases found matching '{disease_name}'")
@@ -260,32 +283,53 @@ class DiseaseGeneApp1:
         self.display_disease_details(disease_id)
 
     def display_disease_details(self, disease_id):
-        """Display detailed information about a disease"""
+        """Display detailed information about a disease; the lookup runs off the Tk thread"""
+        self.details_request = disease_id
         self.status_var.set(f"Loading details for {disease_id}...")
-        self.root.update()
+        # Started from the Tk thread, so the lookup keeps the user's priority
+        threading.Thread(target=with_priority(self.load_disease_view), args=(disease_id,), daemon=True).start()
 
+    def load_disease_view(self, disease_id):
+        """Worker for display_disease_details: fetch entry and drugs, then hand each to the Tk thread"""
+        # Already parsed when the row was prefetched; a prefetch still running is joined, not repeated
+        prefetcher = get_prefetcher()
         try:
-            # Fetch disease data
-            disease_data = self.get_kegg_disease(disease_id)
+            disease_data = prefetcher.get(("clasa.disease", disease_id), self.get_kegg_disease, disease_id)
+        except Exception as e:
+            self.root.after(0, self.show_details_error, disease_id, str(e))
+            return
+        self.root.after(0, self.show_disease_details, disease_id, disease_data)
 
-            if not disease_data:
-                messagebox.showerror("Error", f"Could not retrieve details for {disease_id}")
-                self.status_var.set("Data retrieval failed")
-                return
+        if disease_data:
+            drugs = prefetcher.get(("clasa.drugs", disease_id), self.load_drugs, disease_data["name"], disease_id)
+            self.root.after(0, self.show_disease_drugs, disease_id, disease_data["name"], drugs)
 
-            # Update the UI with disease details
-            self.update_disease_details_ui(disease_data)
+    def show_disease_details(self, disease_id, disease_data):
+        if disease_id != self.details_request:
+            return
+        if not disease_data:
+            messagebox.showerror("Error", f"Could not retrieve details for {disease_id}")
+            self.status_var.set("Data retrieval failed")
+            return
 
-            # Fetch and display drug information
-            disease_name = disease_data["name"]
-            self.fetch_drug_info(disease_name, disease_id)
+        try:
+            # Update the UI with disease details; drugs follow when their search returns
+            self.update_disease_details_ui(disease_data)
+            self.drugs_tree.delete(*self.drugs_tree.get_children())
 
             # Switch to the details tab
             self.notebook.select(1)  # Select the disease details tab
-            self.status_var.set(f"Loaded details for {disease_id}")
-
+            self.status_var.set(f"Loaded details for {disease_id}, searching drugs...")
         except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+            self.show_details_error(disease_id, str(e))
+
+    def show_disease_drugs(self, disease_id, disease_name, drugs):
+        if disease_id == self.details_request:
+            self.show_drug_info(disease_name, drugs)
+
+    def show_details_error(self, disease_id, message):
+        if disease_id == self.details_request:
+            messagebox.showerror("Error", f"An error occurred: {message}")
             self.status_var.set("Error occurred")
 
     def update_disease_details_ui(self, disease_data):
@@ -302,50 +346,79 @@ class DiseaseGeneApp1:
         self.description_text.config(state=tk.DISABLED)
 
         # Update pathways
-        self.pathways_tree.delete(*self.pathways_tree.get_children())
-        for pathway in disease_data["pathways"]:
-            self.pathways_tree.insert('', 'end', values=(pathway["id"], pathway["name"]))
+        self.pathways_tree.set_rows(
+            [(pathway["id"], pathway["name"]) for pathway in disease_data["pathways"]],
+            keep_position=False
+        )
 
         # Update genes
-        self.genes_tree.delete(*self.genes_tree.get_children())
-        for gene in disease_data["genes"]:
-            self.genes_tree.insert('', 'end', values=(
+        self.genes_tree.set_rows([
+            (
                 gene["name"],
                 gene["detail"],
                 f"HSA:{gene['hsa']}" if gene['hsa'] else "",
                 f"KO:{gene['ko']}" if gene['ko'] else ""
-            ))
-
-    def fetch_drug_info(self, disease_name, disease_id):
-        """Fetch drug information for a disease from KEGG"""
-        self.status_var.set(f"Fetching drug information for {disease_name}...")
-        self.root.update()
+            )
+            for gene in disease_data["genes"]
+        ], keep_position=False)
+
+    def prefetch_details(self, results):
+        """Fetch the top results' details in the background; a double-click on one of them is then instant"""
+        get_prefetcher().prefetch_all(
+            (("clasa.disease", disease_id), self.load_disease_details, (disease_id,))
+            for disease_id, _ in results[:PREFETCH_TOP_N]
+        )
+
+    def load_disease_details(self, disease_id):
+        """
+        Disease data of a prefetched row, or None when the entry cannot be
+        retrieved; its drugs are cached under their own key, and only when the
+        drug search succeeded, so a failed search is retried on opening.
+        Runs in prefetch threads, so it does not touch the UI.
+        """
+        disease_data = self.get_kegg_disease(disease_id)
+        if disease_data:
+            get_prefetcher().get(("clasa.drugs", disease_id), self.load_drugs, disease_data["name"], disease_id)
+        return disease_data
 
+    def load_drugs(self, disease_name, disease_id):
+        """fetch_drug_info, with None for any failure"""
         try:
-            # Clear previous drug results
-            self.drugs_tree.delete(*self.drugs_tree.get_children())
+            return self.fetch_drug_info(disease_name, disease_id)
+        except Exception as e:
+            print(f"Drug fetch error: {str(e)}")
+            return None
 
-            # Construct the drug search URL
-            search_url = f"https://www.kegg.jp/kegg-bin/search?from=disease&q={disease_name.replace(' ', '+')}&display=drug&search_gene=1&target=compound%2bdrug%2bdgroup%2bdisease"
-            response = requests.get(search_url)
+    def fetch_drug_info(self, disease_name, disease_id):
+        """Drugs of a disease from the KEGG drug search, None when the search fails"""
+        # Construct the drug search URL
+        search_url = endpoints.kegg_web(f"kegg-bin/search?from=disease&q={disease_name.replace(' ', '+')}&display=drug&search_gene=1&target=compound%2bdrug%2bdgroup%2bdisease")
+        response = http.get(search_url)
 
-            if response.status_code != 200:
-                self.status_var.set(f"Failed to fetch drug information (Status: {response.status_code})")
-                return
+        if response.status_code != 200:
+            print(f"Failed to fetch drug information (Status: {response.status_code})")
+            return None
 
-            drugs = self.parse_drugs_from_html(response.text, disease_name, disease_id)
+        return self.parse_drugs_from_html(response.text, disease_name, disease_id)
 
-            for drug in drugs:
-                self.drugs_tree.insert('', 'end', values=(drug["drug_id"], drug["name"]))
+    def show_drug_info(self, disease_name, drugs):
+        # Clear previous drug results
+        self.drugs_tree.delete(*self.drugs_tree.get_children())
 
-            self.status_var.set(f"Found {len(drugs)} drugs for {disease_name}")
+        if drugs is None:
+            self.status_var.set(f"Failed to fetch drug information for {disease_name}")
+            return
 
-        except Exception as e:
-            self.status_var.set(f"Error fetching drug information: {str(e)}")
-            print(f"Drug fetch error: {str(e)}")
+        for drug in drugs:
+            self.drugs_tree.insert('', 'end', values=(drug["drug_id"], drug["name"]))
+
+        self.status_var.set(f"Found {len(drugs)} drugs for {disease_name}")
 
+    @traced("KEGG drug HTML parse", PARSE)
     def parse_drugs_from_html(self, html_text, disease_name, disease_id):
         """Parse drug info from KEGG drug search HTML result"""
+        from bs4 import BeautifulSoup  # loaded on first drug lookup, not at startup
+
         soup = BeautifulSoup(html_text, 'html.parser')
         drug_table = soup.find("table", class_="list1")
         if not drug_table:
@@ -393,13 +466,20 @@ class DiseaseGeneApp1:
         Returns:
             dict: A dictionary containing parsed disease information
         """
-        url = f'https://rest.kegg.jp/get/{disease_id}'
-        response = requests.get(url)
+        url = endpoints.kegg_rest(f'get/{disease_id}')
+        response = http.get(url)
 
         if response.status_code != 200:
             print(f'Error retrieving disease details: {response.status_code}')
             return None
 
+        disease_data = self.parse_kegg_disease(response.text)
+        record_disease_entry(disease_data["entry"] or disease_id, disease_data["name"], disease_data["description"])
+        return disease_data
+
+    @traced("KEGG disease flat file parse", PARSE)
+    def parse_kegg_disease(self, text):
+        """Parse a KEGG disease flat file into the dictionary returned by get_kegg_disease"""
         # Initialize data structure
         disease_data = {
             "entry": "",
@@ -415,7 +495,7 @@ class DiseaseGeneApp1:
         section_content = []
 
         # Process each line
-        lines = response.text.split('\n')
+        lines = text.split('\n')
         i = 0
         while i < len(lines):
             line = lines[i]
@@ -523,6 +603,7 @@ class DiseaseGeneApp1:
 
 
 def main():
+    mark_interactive()
     root = tk.Tk()
     app = DiseaseGeneApp1(root)
     root.mainloop()
@@ -0,0 +1,329 @@
+import atexit
+import bisect
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from src.common import endpoints, http
+from src.common.storage import cache_dir
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def merge_names(current: str, new: str) -> str:
+    """The ';'-separated synonyms of both, in order and without case-insensitive duplicates"""
+    names: Dict[str, str] = {}
+    for name in f"{current};{new}".split(";"):
+        name = name.strip()
+        if name:
+            names.setdefault(name.lower(), name)
+    return "; ".join(names.values())
+
+
+def bounded_levenshtein(a: str, b: str, max_distance: int) -> int:
+    """Edit distance, stopping early once it exceeds max_distance (returns max_distance + 1)"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+class DiseaseSearchIndex:
+    """
+    Local inverted index over KEGG disease names, synonyms and descriptions.
+
+    Tokens are kept in a sorted list so prefix lookups are a bisect, and every
+    token is also filed under its character trigrams so misspelt words can be
+    matched by edit distance without scanning the whole vocabulary. Names come
+    from /list/disease; descriptions are added as disease entries are fetched.
+    `dirty` tells whether entries changed since the last load or save.
+    """
+
+    NAME_WEIGHT = 3
+    DESCRIPTION_WEIGHT = 1
+
+    def __init__(self):
+        self.entries: Dict[str, Dict[str, str]] = {}
+        self.built_at = 0.0
+        self.dirty = False
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._disease_tokens: Dict[str, Set[str]] = {}
+        self._vocab: List[str] = []
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, disease_id: str, name: str, description: str = "") -> bool:
+        """
+        Add or update a disease; `name` may hold several synonyms separated by
+        ';', which are merged into the known ones. Returns whether the entry
+        changed.
+        """
+        with self._lock:
+            entry = self.entries.setdefault(disease_id, {"name": "", "description": ""})
+            merged = merge_names(entry["name"], name)
+            description = description or entry["description"]
+            if disease_id in self._disease_tokens and (merged, description) == (entry["name"], entry["description"]):
+                return False
+            entry["name"] = merged
+            entry["description"] = description
+
+            # Re-index the whole entry so tokens of a replaced description do not linger
+            self._unindex(disease_id)
+            self._index_tokens(disease_id, tokenize(entry["name"]), self.NAME_WEIGHT)
+            self._index_tokens(disease_id, tokenize(entry["description"]), self.DESCRIPTION_WEIGHT)
+            self.dirty = True
+            return True
+
+    def search(self, query: str, limit: Optional[int] = None, fuzzy: bool = True) -> List[Tuple[str, str]]:
+        """
+        Return (disease_id, name) pairs for diseases matching every query token.
+
+        Each token matches as a prefix, so partially typed words work; when a
+        token has no prefix match and fuzzy is on, tokens within a small edit
+        distance are used instead. Name hits rank above description hits.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self._lock:
+            return self._search(query, tokens, limit, fuzzy)
+
+    def _search(self, query: str, tokens: List[str], limit: Optional[int], fuzzy: bool) -> List[Tuple[str, str]]:
+        scores: Optional[Dict[str, int]] = None
+        for token in tokens:
+            token_scores = self._match_token(token, fuzzy)
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {d: scores[d] + s for d, s in token_scores.items() if d in scores}
+            if not scores:
+                return []
+
+        query_lower = query.strip().lower()
+        ranked = sorted(
+            scores.items(),
+            key=lambda item: (
+                not self.entries[item[0]]["name"].lower().startswith(query_lower),
+                -item[1],
+                item[0]
+            )
+        )
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(disease_id, self.entries[disease_id]["name"]) for disease_id, _ in ranked]
+
+    def _match_token(self, token: str, fuzzy: bool) -> Dict[str, int]:
+        scores: Dict[str, int] = {}
+        for vocab_token in self._prefix_tokens(token):
+            for disease_id, weight in self._postings[vocab_token].items():
+                # Whole-word hits count double compared with prefix hits
+                score = weight * (2 if vocab_token == token else 1)
+                scores[disease_id] = max(scores.get(disease_id, 0), score)
+
+        if not scores and fuzzy and len(token) >= 4:
+            for vocab_token in self._fuzzy_tokens(token):
+                for disease_id, weight in self._postings[vocab_token].items():
+                    scores[disease_id] = max(scores.get(disease_id, 0), weight)
+        return scores
+
+    def _prefix_tokens(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self._vocab, prefix)
+        end = bisect.bisect_left(self._vocab, prefix + "\uffff")
+        return self._vocab[start:end]
+
+    def _fuzzy_tokens(self, token: str) -> List[str]:
+        max_distance = 1 if len(token) < 8 else 2
+        candidates: Dict[str, int] = {}
+        for trigram in self._token_trigrams(token):
+            for vocab_token in self._trigrams.get(trigram, ()):
+                candidates[vocab_token] = candidates.get(vocab_token, 0) + 1
+
+        # Each edit destroys at most 3 of the len(token) padded trigrams
+        min_shared = max(1, len(token) - 3 * max_distance)
+        return [
+            vocab_token for vocab_token, shared in candidates.items()
+            if shared >= min_shared and bounded_levenshtein(token, vocab_token, max_distance) <= max_distance
+        ]
+
+    @staticmethod
+    def _token_trigrams(token: str) -> Set[str]:
+        padded = f"^{token}$"
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def _index_tokens(self, disease_id: str, tokens: Iterable[str], weight: int):
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                bisect.insort(self._vocab, token)
+                for trigram in self._token_trigrams(token):
+                    self._trigrams.setdefault(trigram, set()).add(token)
+            postings[disease_id] = max(postings.get(disease_id, 0), weight)
+            self._disease_tokens.setdefault(disease_id, set()).add(token)
+
+    def _unindex(self, disease_id: str):
+        for token in self._disease_tokens.pop(disease_id, ()):
+            postings = self._postings[token]
+            postings.pop(disease_id, None)
+            if postings:
+                continue
+            del self._postings[token]
+            del self._vocab[bisect.bisect_left(self._vocab, token)]
+            for trigram in self._token_trigrams(token):
+                tokens = self._trigrams[trigram]
+                tokens.discard(token)
+                if not tokens:
+                    del self._trigrams[trigram]
+
+    # Persistence
+
+    def save(self, path: str):
+        """Write the entries atomically; concurrent savers each use their own temporary file"""
+        with self._lock:
+            fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix=".tmp",
+                                            dir=os.path.dirname(path) or ".")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump({"built_at": self.built_at, "entries": self.entries}, f)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self.dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> "DiseaseSearchIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        index = cls()
+        index.built_at = data.get("built_at", 0.0)
+        for disease_id, entry in data["entries"].items():
+            index.add(disease_id, entry.get("name", ""), entry.get("description", ""))
+        index.dirty = False
+        return index
+
+    def refresh_from_kegg(self):
+        """Reload all disease names from /list/disease (descriptions already indexed are kept)"""
+        response = http.get(endpoints.kegg_rest("list/disease"))
+        response.raise_for_status()
+
+        for line in response.text.split("\n"):
+            parts = line.split("\t")
+            if len(parts) >= 2:
+                self.add(parts[0].replace("ds:", "").strip(), parts[1].strip())
+        self.built_at = time.time()
+
+
+_index: Optional[DiseaseSearchIndex] = None
+_index_lock = threading.Lock()
+MAX_INDEX_AGE = 7 * 24 * 3600
+SAVE_DELAY = 30.0  # seconds new entries may wait before the index is written
+
+_save_timer: Optional[threading.Timer] = None
+_save_timer_lock = threading.Lock()
+
+
+def index_path() -> str:
+    return os.path.join(cache_dir("search"), "diseases.json")
+
+
+def get_disease_index(max_age: float = MAX_INDEX_AGE) -> DiseaseSearchIndex:
+    """Process-wide index, loaded from the local cache and refreshed from KEGG when stale"""
+    global _index
+    with _index_lock:
+        if _index is not None:
+            return _index
+
+        path = index_path()
+        index = DiseaseSearchIndex.load(path) if os.path.exists(path) else DiseaseSearchIndex()
+        if time.time() - index.built_at > max_age:
+            try:
+                index.refresh_from_kegg()
+                index.save(path)
+            except Exception as e:
+                # Offline: keep whatever the cache had
+                if not len(index):
+                    raise
+                print(f"Disease index refresh failed, using cached copy: {e}")
+        _index = index
+        return _index
+
+
+def loaded_disease_index() -> Optional[DiseaseSearchIndex]:
+    """The index if it has already been loaded, without blocking the caller"""
+    return _index
+
+
+def warm_up_disease_index():
+    """Load the index in a background thread so the first search does not wait for it"""
+    def load():
+        try:
+            get_disease_index()
+        except Exception as e:
+            print(f"Disease index unavailable, searches will use KEGG: {e}")
+
+    threading.Thread(target=load, daemon=True).start()
+
+
+def record_disease_entry(disease_id: str, name: str, description: str = ""):
+    """
+    Index name and description of a fetched disease entry. The index is
+    written once SAVE_DELAY seconds after the first unsaved change, so a scan
+    fetching hundreds of entries saves it once, not per entry. Entries
+    without a name (an empty or partial response) are not indexed.
+    """
+    index = _index
+    if index is None or not disease_id or not (name or "").strip():
+        return
+    if index.add(disease_id, name, description):
+        _schedule_save()
+
+
+def _schedule_save():
+    global _save_timer
+    with _save_timer_lock:
+        if _save_timer is None:
+            _save_timer = threading.Timer(SAVE_DELAY, flush_disease_index)
+            _save_timer.daemon = True
+            _save_timer.start()
+
+
+def flush_disease_index():
+    """Save the index now if it has unsaved entries; called at the end of scans and at exit"""
+    global _save_timer
+    with _save_timer_lock:
+        if _save_timer is not None:
+            _save_timer.cancel()
+            _save_timer = None
+    index = _index
+    if index is None or not index.dirty:
+        return
+    try:
+        index.save(index_path())
+    except OSError as e:
+        print(f"Could not save disease index: {e}")
+
+
+atexit.register(flush_disease_index)
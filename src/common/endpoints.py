@@ -0,0 +1,30 @@
+import os
+from urllib.parse import urlsplit
+
+KEGG_REST_DEFAULT = "https://rest.kegg.jp"
+KEGG_WEB_DEFAULT = "https://www.kegg.jp"
+
+
+def kegg_rest(path: str = "") -> str:
+    """URL on the KEGG REST API, e.g. kegg_rest("get/hsa:672").
+
+    The base can be overridden with GENERT_KEGG_REST_URL (e.g. a local mock
+    server, see benchmarks/mock_kegg.py). It is read on every call, so tests
+    can switch it after the app modules are imported.
+    """
+    base = os.getenv("GENERT_KEGG_REST_URL", KEGG_REST_DEFAULT).rstrip("/")
+    return f"{base}/{path.lstrip('/')}"
+
+
+def kegg_web(path: str = "") -> str:
+    """URL on the KEGG website (kegg-bin search pages), overridable with GENERT_KEGG_WEB_URL"""
+    base = os.getenv("GENERT_KEGG_WEB_URL", KEGG_WEB_DEFAULT).rstrip("/")
+    return f"{base}/{path.lstrip('/')}"
+
+
+def configured_hosts() -> dict:
+    """Host (with port) -> service name for the bases currently configured"""
+    return {
+        urlsplit(kegg_rest()).netloc: "KEGG",
+        urlsplit(kegg_web()).netloc: "KEGG",
+    }
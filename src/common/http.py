@@ -0,0 +1,130 @@
+import os
+import random
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.common.endpoints import configured_hosts
+from src.common.scheduler import PRIORITY_NAMES, current_priority, get_scheduler
+from src.common.singleflight import flights
+from src.common.tracing import NETWORK, span
+
+# Host -> service name used in span names, so the summary groups calls per API
+SERVICES = {
+    "rest.kegg.jp": "KEGG",
+    "www.kegg.jp": "KEGG",
+    "eutils.ncbi.nlm.nih.gov": "NCBI",
+    "search.rcsb.org": "RCSB",
+    "maayanlab.cloud": "ARCHS4",
+    "api.platform.opentargets.org": "OpenTargets",
+}
+
+# Transient statuses worth retrying; KEGG also answers 403 when a client goes over its rate limit
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+SERVICE_RETRY_STATUSES = {"KEGG": {403}}
+MAX_RETRY_DELAY = 30.0
+
+# (connect, read) seconds; a hung socket would otherwise hold a scheduler slot forever
+DEFAULT_TIMEOUT = (10.0, 60.0)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def service_name(url: str) -> str:
+    parts = urlsplit(url)
+    return SERVICES.get(parts.hostname or "") or configured_hosts().get(parts.netloc) or parts.hostname or ""
+
+
+def session() -> requests.Session:
+    """
+    Process-wide Session shared by all threads, so short-lived worker threads
+    reuse connections instead of each leaving a pool behind. Each host's pool
+    holds as many connections as the scheduler lets run at once.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            scheduler = get_scheduler()
+            pool_size = max([scheduler.default_budget, *scheduler.budgets.values()])
+            adapter = HTTPAdapter(pool_connections=len(SERVICES), pool_maxsize=pool_size)
+            _session = requests.Session()
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def default_timeout():
+    """GENERT_HTTP_TIMEOUT (seconds, applies to connect and read) or DEFAULT_TIMEOUT"""
+    value = os.getenv("GENERT_HTTP_TIMEOUT")
+    return float(value) if value else DEFAULT_TIMEOUT
+
+
+def retry_delay(attempt: int, response: Optional[requests.Response] = None) -> float:
+    """Retry-After when the server sends one, else exponential backoff with jitter"""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), MAX_RETRY_DELAY)
+    backoff = float(os.getenv("GENERT_HTTP_BACKOFF", "0.5"))
+    return min(backoff * 2 ** attempt * (0.5 + random.random()), MAX_RETRY_DELAY)
+
+
+def request(method: str, url: str, retries: Optional[int] = None, **kwargs) -> requests.Response:
+    """
+    requests.request wrapped in a network span tagged with service, status,
+    response size, attempts and priority, each attempt run in a slot of the
+    service's budget (see src/common/scheduler.py). Connection errors, timeouts and transient
+    statuses are retried `retries` times (GENERT_HTTP_RETRIES, default 2);
+    the last response is returned as is, so callers keep checking status codes.
+    Without an explicit `timeout`, default_timeout() applies to every attempt.
+    """
+    kwargs.setdefault("timeout", default_timeout())
+    service = service_name(url)
+    scheduler = get_scheduler()
+    retries = int(os.getenv("GENERT_HTTP_RETRIES", "2")) if retries is None else retries
+    retry_statuses = RETRY_STATUSES | SERVICE_RETRY_STATUSES.get(service, set())
+
+    with span(f"{service} {method}", NETWORK, url=url) as s:
+        attempt = 0
+        while True:
+            try:
+                # One slot per attempt, so backoff sleeps leave the service to other requests
+                with scheduler.slot(service):
+                    response = session().request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= retries:
+                    raise
+                time.sleep(retry_delay(attempt))
+            else:
+                if response.status_code not in retry_statuses or attempt >= retries:
+                    break
+                time.sleep(retry_delay(attempt, response))
+            attempt += 1
+
+        if s is not None:
+            s.attrs["status"] = response.status_code
+            s.attrs["bytes"] = len(response.content)
+            s.attrs["attempts"] = attempt + 1
+            s.attrs["priority"] = PRIORITY_NAMES.get(current_priority(), current_priority())
+        return response
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """
+    GET through request(). Identical GETs (same URL and arguments) in flight at
+    the same time share one request and its Response; streamed ones are not shared.
+    Only calls of the same priority share, so a click never waits in a background queue.
+    """
+    if kwargs.get("stream"):
+        return request("GET", url, **kwargs)
+    key = ("GET", url, repr(sorted(kwargs.items())), current_priority())
+    return flights().do(key, request, "GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
@@ -0,0 +1,238 @@
+import os
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def jaccard(set1: Set[str], set2: Set[str]) -> float:
+    """Exact Jaccard similarity, 0.0 when either set is empty (same rule as calculate_similarity)"""
+    if not set1 or not set2:
+        return 0.0
+    union = len(set1 | set2)
+    return len(set1 & set2) / union if union > 0 else 0.0
+
+
+class MinHashLSHIndex:
+    """
+    Approximate Jaccard index over string sets (e.g. pathway IDs of a disease or gene).
+
+    Every set is stored as a row of `num_perm` MinHash values in a uint32 NumPy array.
+    The rows are split into `bands` bands of `num_perm // bands` rows; two sets become
+    candidates when at least one band matches exactly. More bands means higher recall
+    and more candidates to score, fewer bands means faster but stricter retrieval.
+    The candidate threshold is roughly (1 / bands) ** (1 / rows).
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 64, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        # a < 2^31 and x < 2^32 keep a*x + b below 2^64, so uint64 never overflows
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+
+        self.keys: List[str] = []
+        self.sets: List[frozenset] = []
+        self.signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self._key_to_row: Dict[str, int] = {}
+        self._buckets: List[Dict[bytes, List[int]]] = [defaultdict(list) for _ in range(bands)]
+        self._pending: List[np.ndarray] = []
+
+    def __len__(self):
+        return len(self._key_to_row)
+
+    def __contains__(self, key):
+        return key in self._key_to_row
+
+    @property
+    def threshold(self) -> float:
+        """Approximate Jaccard similarity at which a pair has a 50% chance of becoming a candidate"""
+        return (1.0 / self.bands) ** (1.0 / self.rows)
+
+    def signature(self, items: Iterable[str]) -> np.ndarray:
+        hashes = np.fromiter(
+            (zlib.crc32(str(item).encode("utf-8")) for item in items),
+            dtype=np.uint64
+        )
+        if hashes.size == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def add(self, key: str, items: Iterable[str]):
+        """Add or replace the set stored under `key`; a replaced set keeps its row"""
+        items = frozenset(items)
+        sig = self.signature(items)
+        row = self._key_to_row.get(key)
+
+        if row is None:
+            row = len(self.keys)
+            self.keys.append(key)
+            self.sets.append(items)
+            self._key_to_row[key] = row
+            self._pending.append(sig)
+        else:
+            self._unindex_row(row)
+            self.signatures[row] = sig
+            self.sets[row] = items
+
+        if items:
+            self._index_row(row, sig)
+
+    def remove(self, key: str):
+        row = self._key_to_row.pop(key, None)
+        if row is None:
+            return
+        self._unindex_row(row)
+        # Keep row numbers stable; an emptied set is never returned as a candidate and save() drops it
+        self.sets[row] = frozenset()
+
+    def get_set(self, key: str) -> Optional[frozenset]:
+        row = self._key_to_row.get(key)
+        return self.sets[row] if row is not None else None
+
+    def query(
+        self,
+        items: Iterable[str],
+        top_n: int = 50,
+        rescore: bool = True,
+        exact_set: Optional[Callable[[str], Set[str]]] = None,
+        exclude: Iterable[str] = (),
+        max_workers: int = 4
+    ) -> List[Tuple[str, float]]:
+        """
+        Return up to `top_n` (key, score) pairs sorted by descending similarity.
+
+        Candidates come from the LSH buckets and are ranked by estimated Jaccard.
+        With `rescore=True` they are rescored with exact Jaccard against the
+        stored sets, so the returned numbers match a brute-force scan over the
+        same sets. `exact_set(key)` optionally supplies fresher sets (e.g. a
+        network fetch); it is called for the final top-N only, `max_workers`
+        at a time.
+        """
+        items = frozenset(items)
+        if not items or not self.keys:
+            return []
+
+        self._flush()
+        sig = self.signature(items)
+        excluded = set(exclude)
+
+        candidates = set()
+        for band, bucket_key in enumerate(self._band_keys(sig)):
+            candidates.update(self._buckets[band].get(bucket_key, ()))
+        candidates = [row for row in candidates if self.keys[row] not in excluded and self.sets[row]]
+        if not candidates:
+            return []
+
+        rows = np.fromiter(candidates, dtype=np.int64)
+        estimates = (self.signatures[rows] == sig).mean(axis=1)
+
+        # Oversample before rescoring so estimation noise does not push true hits out of the top-N
+        keep = min(len(rows), top_n * 2 if rescore else top_n)
+        order = np.argsort(-estimates, kind="stable")[:keep]
+
+        results = []
+        for idx in order:
+            row = rows[idx]
+            score = jaccard(items, self.sets[row]) if rescore else float(estimates[idx])
+            if score > 0:
+                results.append((self.keys[row], score))
+        results.sort(key=lambda x: -x[1])
+        results = results[:top_n]
+
+        if rescore and exact_set is not None and results:
+            keys = [key for key, _ in results]
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                fresh = list(pool.map(exact_set, keys))
+            results = [(key, jaccard(items, set(other or ()))) for key, other in zip(keys, fresh)]
+            results = sorted((r for r in results if r[1] > 0), key=lambda x: -x[1])
+        return results
+
+    def save(self, path: str):
+        self._flush()
+        # Only live rows; removed keys are compacted away
+        rows = sorted(self._key_to_row.values())
+        sets = [self.sets[row] for row in rows]
+        members = [item for s in sets for item in sorted(s)]
+        offsets = np.cumsum([0] + [len(s) for s in sets])
+        np.savez_compressed(
+            path,
+            keys=np.array([self.keys[row] for row in rows], dtype=str),
+            members=np.array(members, dtype=str),
+            offsets=offsets,
+            signatures=self.signatures[rows],
+            params=np.array([self.num_perm, self.bands]),
+            a=self._a,
+            b=self._b
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "MinHashLSHIndex":
+        data = np.load(path)
+        num_perm, bands = (int(x) for x in data["params"])
+        index = cls(num_perm=num_perm, bands=bands)
+        index._a = data["a"]
+        index._b = data["b"]
+
+        keys = data["keys"].tolist()
+        members = data["members"].tolist()
+        offsets = data["offsets"]
+
+        index.keys = keys
+        index.sets = [frozenset(members[offsets[i]:offsets[i + 1]]) for i in range(len(keys))]
+        index.signatures = data["signatures"]
+        index._key_to_row = {key: row for row, key in enumerate(keys)}
+        for row, sig in enumerate(index.signatures):
+            if index.sets[row]:
+                index._index_row(row, sig)
+        return index
+
+    @classmethod
+    def load_or_build(
+        cls,
+        path: str,
+        build: Callable[[], Dict[str, Iterable[str]]],
+        refresh: bool = False,
+        **kwargs
+    ) -> "MinHashLSHIndex":
+        """Load a saved index from `path`, or build it from a {key: items} mapping and save it"""
+        if not refresh and os.path.exists(path):
+            return cls.load(path)
+
+        index = cls(**kwargs)
+        for key, items in build().items():
+            index.add(key, items)
+        index.save(path)
+        return index
+
+    def _flush(self):
+        if self._pending:
+            self.signatures = np.vstack([self.signatures] + self._pending)
+            self._pending = []
+
+    def _band_keys(self, sig: np.ndarray) -> List[bytes]:
+        return [sig[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def _unindex_row(self, row: int):
+        self._flush()
+        for band, bucket_key in enumerate(self._band_keys(self.signatures[row])):
+            rows = self._buckets[band].get(bucket_key)
+            if rows and row in rows:
+                rows.remove(row)
+
+    def _index_row(self, row: int, sig: np.ndarray):
+        for band, bucket_key in enumerate(self._band_keys(sig)):
+            self._buckets[band][bucket_key].append(row)
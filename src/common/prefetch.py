@@ -0,0 +1,148 @@
+"""
+Speculative prefetch of the entries a user is likely to open next.
+
+When a result list is shown, the front ends hand the top rows to
+Prefetcher.prefetch_all: each is fetched and parsed in the background at
+PREFETCH priority (src/common/scheduler.py), the lowest one, so it only
+uses slots interactive and background requests leave free, and the parsed
+result is kept in a small shared cache. Opening the entry then goes through
+Prefetcher.get, which returns the cached result right away.
+
+The budget is bounded three ways: a couple of worker threads, a cap on
+queued prefetches (a new list replaces the predictions of the previous
+one), and an LRU cache with expiry. get() never waits for a prefetch that
+is still queued, because the queue may sit behind background work; it
+fetches at the caller's priority instead. A prefetch that has already
+started is joined rather than repeated, and concurrent get() calls for one
+key share a single fetch (src/common/singleflight.py).
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Sequence, Tuple
+
+from src.common.scheduler import PREFETCH, request_priority
+from src.common.singleflight import flights
+from src.common.tracing import span
+
+PrefetchItem = Tuple[Hashable, Callable, Sequence]  # (cache key, fetch function, its arguments)
+
+
+class Prefetcher:
+    def __init__(self, max_workers: int = 2, max_pending: int = 8, max_entries: int = 128, ttl: float = 300.0):
+        self.max_pending = max_pending
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="genert-prefetch")
+        self._cache: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._pending: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"prefetched": 0, "hits": 0, "misses": 0, "joined": 0, "dropped": 0, "failed": 0}
+
+    def cached(self, key: Hashable) -> Tuple[bool, Any]:
+        """(found, result) from the cache; expired entries count as missing"""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return False, None
+            stored_at, result = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._cache[key]
+                return False, None
+            self._cache.move_to_end(key)
+            return True, result
+
+    def store(self, key: Hashable, result: Any):
+        """Cache a result; None (nothing found or a failed request) is not kept"""
+        if result is None:
+            return
+        with self._lock:
+            self._cache[key] = (time.monotonic(), result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def prefetch(self, key: Hashable, fn: Callable, *args) -> bool:
+        """Start fetching `fn(*args)` in the background unless it is cached, pending or over budget"""
+        if self.cached(key)[0]:
+            return False
+        with self._lock:
+            if key in self._pending:
+                return False
+            if len(self._pending) >= self.max_pending:
+                self.stats["dropped"] += 1
+                return False
+            future = self._pending[key] = self._executor.submit(self._run, key, fn, args)
+        future.add_done_callback(lambda _: self._forget(key, future))
+        return True
+
+    def prefetch_all(self, items: Iterable[PrefetchItem], replace: bool = True) -> int:
+        """
+        Prefetch the items of a newly shown list in order; with `replace`,
+        prefetches of the previous list that have not started are dropped.
+        Returns how many were started.
+        """
+        if replace:
+            self.cancel_pending()
+        return sum(self.prefetch(key, fn, *args) for key, fn, args in items)
+
+    def get(self, key: Hashable, fn: Callable, *args) -> Any:
+        """The cached result of key, else `fn(*args)` now at the caller's priority (and cached)"""
+        found, result = self.cached(key)
+        if found:
+            self.stats["hits"] += 1
+            return result
+        self.stats["misses"] += 1
+        return flights().do(("prefetch", key), self._load, key, fn, args)
+
+    def _load(self, key: Hashable, fn: Callable, args: Sequence) -> Any:
+        with self._lock:
+            pending = self._pending.get(key)
+        # Not started yet: cancel it and do the work here; already running: its request is out, wait for it
+        if pending is not None and not pending.cancel():
+            pending.result()  # _run never raises
+            found, result = self.cached(key)
+            if found:
+                self.stats["joined"] += 1
+                return result
+        result = fn(*args)
+        self.store(key, result)
+        return result
+
+    def cancel_pending(self):
+        with self._lock:
+            pending = list(self._pending.values())
+        for future in pending:
+            future.cancel()
+
+    def _run(self, key: Hashable, fn: Callable, args: Sequence):
+        if self.cached(key)[0]:  # opened (and cached) while this was queued
+            return
+        try:
+            with request_priority(PREFETCH), span("prefetch", key=str(key)):
+                result = fn(*args)
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"Prefetch of {key} failed: {e}")
+            return
+        self.stats["prefetched"] += 1
+        self.store(key, result)
+
+    def _forget(self, key: Hashable, future: Future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+
+_prefetcher: Optional[Prefetcher] = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher() -> Prefetcher:
+    """Process-wide prefetcher and cache shared by the tabs"""
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = Prefetcher()
+        return _prefetcher
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.common.storage import cache_dir
+
+ENTRY_FILE = "entry.json"
+
+
+@dataclass(frozen=True)
+class AnalysisParams:
+    """Everything that changes a process_gene result; two runs with equal params give the same table"""
+    gene_id: str
+    max_pathways: int
+    coexp_top_n: int
+    weights: Tuple[Tuple[str, float], ...]
+    relation_reducer: str
+    relation_source: str  # "pathways" (first KGMLs) or "interactome" (all human pathways)
+    propagation_top_n: int = 0  # genes added from the interactome random walk
+
+    @classmethod
+    def create(cls, gene_id, max_pathways: int, coexp_top_n: int, weights: Dict[str, float],
+               relation_reducer: str, relation_source: str = "pathways", propagation_top_n: int = 0) -> "AnalysisParams":
+        return cls(str(gene_id), int(max_pathways), int(coexp_top_n),
+                   tuple(sorted((name, float(w)) for name, w in weights.items())), relation_reducer, relation_source,
+                   int(propagation_top_n))
+
+    def key(self) -> str:
+        canonical = json.dumps(asdict(self), sort_keys=True)
+        return f"{self.gene_id}-{hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:12]}"
+
+
+@dataclass
+class ResultEntry:
+    path: str          # run directory
+    run_id: str
+    gene_symbol: str
+    params: Dict
+    scores_file: str   # file name inside path
+    created_at: float
+    metadata: Dict
+
+    @property
+    def gene_id(self) -> str:
+        return self.params["gene_id"]
+
+    @property
+    def scores_path(self) -> str:
+        return os.path.join(self.path, self.scores_file)
+
+    def label(self) -> str:
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(self.created_at))
+        return f"{self.gene_symbol} (hsa:{self.gene_id}), {self.params['max_pathways']} pathways, {when}"
+
+
+class ResultsRegistry:
+    """
+    Score tables of finished analyses, one directory per run:
+
+        <root>/<gene_id>-<params hash>/<run_id>/{entry.json, scores.parquet}
+
+    A run is assembled in a dot-prefixed temp directory and renamed into place
+    only when complete, so concurrent analyses (even of the same gene and
+    params) never overwrite each other or expose half-written tables.
+    """
+
+    def __init__(self, root: Optional[str] = None, keep_runs: int = 3):
+        self.root = root or cache_dir("results")
+        self.keep_runs = keep_runs
+
+    def latest(self, params: AnalysisParams) -> Optional[ResultEntry]:
+        runs = self._runs(os.path.join(self.root, params.key()))
+        return runs[0] if runs else None
+
+    def entries(self) -> List[ResultEntry]:
+        """Newest run of every analysed gene/params combination, newest first"""
+        latest = []
+        for name in os.listdir(self.root):
+            if not name.startswith("."):
+                runs = self._runs(os.path.join(self.root, name))
+                if runs:
+                    latest.append(runs[0])
+        return sorted(latest, key=lambda entry: -entry.created_at)
+
+    def store(self, params: AnalysisParams, gene_symbol: str, write_scores: Callable[[str], str],
+              metadata: Optional[Dict] = None, run_id: Optional[str] = None) -> ResultEntry:
+        """
+        Add a run. `write_scores(directory)` writes the score table into the
+        given directory and returns its file name.
+        """
+        run_id = run_id or uuid.uuid4().hex[:12]
+        key_dir = os.path.join(self.root, params.key())
+        tmp_dir = os.path.join(key_dir, f".tmp-{run_id}")
+        os.makedirs(tmp_dir)
+        try:
+            scores_file = write_scores(tmp_dir)
+            entry = {
+                "run_id": run_id,
+                "gene_symbol": gene_symbol,
+                "params": asdict(params),
+                "scores_file": scores_file,
+                "created_at": time.time(),
+                "metadata": metadata or {},
+            }
+            with open(os.path.join(tmp_dir, ENTRY_FILE), "w", encoding="utf-8") as f:
+                json.dump(entry, f, indent=1, default=str)
+            run_dir = os.path.join(key_dir, run_id)
+            os.replace(tmp_dir, run_dir)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        self._prune(key_dir)
+        return self._read_entry(run_dir)
+
+    def load_scores(self, entry: ResultEntry):
+        import pandas as pd
+
+        if entry.scores_file.endswith(".csv"):
+            return pd.read_csv(entry.scores_path)
+        return pd.read_parquet(entry.scores_path)
+
+    def load_components(self, entry: ResultEntry):
+        """Raw score components of a run, or None for runs stored without them"""
+        import pandas as pd
+
+        for name, read in (("components.parquet", pd.read_parquet), ("components.csv", pd.read_csv)):
+            path = os.path.join(entry.path, name)
+            if os.path.exists(path):
+                return read(path)
+        return None
+
+    def _runs(self, key_dir: str) -> List[ResultEntry]:
+        if not os.path.isdir(key_dir):
+            return []
+        runs = []
+        for name in os.listdir(key_dir):
+            if name.startswith("."):
+                continue
+            entry = self._read_entry(os.path.join(key_dir, name))
+            if entry is not None:
+                runs.append(entry)
+        return sorted(runs, key=lambda entry: -entry.created_at)
+
+    @staticmethod
+    def _read_entry(run_dir: str) -> Optional[ResultEntry]:
+        try:
+            with open(os.path.join(run_dir, ENTRY_FILE), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return ResultEntry(run_dir, data["run_id"], data["gene_symbol"], data["params"],
+                           data["scores_file"], data["created_at"], data.get("metadata", {}))
+
+    def _prune(self, key_dir: str):
+        """Drop all but the newest keep_runs runs of a key (another process may be reading them, so errors are ignored)"""
+        for entry in self._runs(key_dir)[self.keep_runs:]:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+_registry: Optional[ResultsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_results_registry() -> ResultsRegistry:
+    """Process-wide registry under the GeneRT cache directory"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ResultsRegistry()
+        return _registry
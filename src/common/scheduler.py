@@ -0,0 +1,157 @@
+"""
+Priority scheduling of outgoing HTTP requests.
+
+Every request made through src.common.http takes a slot of its service
+(KEGG, NCBI, ...) for the duration of one attempt. Each service has a
+budget of concurrent slots; requests waiting for one are served by priority
+and then arrival, so an interactive lookup queued behind a disease scan goes
+first. Lower priorities also leave slots free for higher ones: background
+work may use at most `budget - reserve` slots, prefetches
+`budget - 2 * reserve`, so a click never waits for slow bulk requests to
+finish. After any interactive request, background requests hold off for
+`yield_after` seconds so bursts of user actions go out without competition.
+
+The priority is a context variable, BACKGROUND by default, so bulk work
+nobody marked (index builds, warm-ups, scripts) never takes the share kept
+for the user. UI entry points call `mark_interactive()` on their event
+loop thread; scoped work uses `request_priority(level)`. Plain threads and
+thread pools do not inherit the priority, so functions handed to them are
+wrapped with `with_priority`.
+"""
+import contextvars
+import functools
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PREFETCH = 2  # speculative fetches (src/common/prefetch.py)
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background", PREFETCH: "prefetch"}
+
+# Concurrent requests per service; KEGG answers more than a few parallel requests with 403
+DEFAULT_BUDGETS = {"KEGG": 3, "NCBI": 3}
+DEFAULT_BUDGET = 4
+
+_priority = contextvars.ContextVar("genert_request_priority", default=BACKGROUND)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+def mark_interactive():
+    """Requests made from now on in this thread are INTERACTIVE; called by UI entry points before their event loop"""
+    _priority.set(INTERACTIVE)
+
+
+@contextmanager
+def request_priority(level: int) -> Iterator[None]:
+    """Requests made inside the block (in this thread or task) are scheduled at `level`"""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def with_priority(fn: Callable, level: Optional[int] = None) -> Callable:
+    """fn running at `level` (default: the caller's current priority), for threads and pools"""
+    level = current_priority() if level is None else level
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with request_priority(level):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+class _Host:
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.active = 0
+        self.waiting: List[Tuple[int, int]] = []  # (priority, arrival) heap
+        self.condition = threading.Condition()
+
+
+class RequestScheduler:
+    def __init__(self, budgets: Optional[Dict[str, int]] = None, default_budget: int = DEFAULT_BUDGET,
+                 reserve: int = 1, yield_after: float = 0.2):
+        self.budgets = dict(DEFAULT_BUDGETS if budgets is None else budgets)
+        self.default_budget = default_budget
+        self.reserve = reserve
+        self.yield_after = yield_after
+        self._hosts: Dict[str, _Host] = {}
+        self._hosts_lock = threading.Lock()
+        self._arrivals = itertools.count()
+        self._last_interactive = float("-inf")
+        self.waited: Dict[int, float] = {}  # seconds spent queueing, per priority
+
+    def _host(self, host: str) -> _Host:
+        with self._hosts_lock:
+            if host not in self._hosts:
+                self._hosts[host] = _Host(self.budgets.get(host, self.default_budget))
+            return self._hosts[host]
+
+    def limit(self, host: str, level: int) -> int:
+        """Slots of `host` that requests at `level` may occupy"""
+        return max(1, self._host(host).budget - self.reserve * level)
+
+    def _hold_off(self, level: int) -> float:
+        """Seconds a request at `level` still yields to recent interactive requests"""
+        if level == INTERACTIVE:
+            return 0.0
+        return max(0.0, self._last_interactive + self.yield_after - time.monotonic())
+
+    @contextmanager
+    def slot(self, host: str, level: Optional[int] = None) -> Iterator[None]:
+        """Hold one of `host`'s slots for the block; waits by priority while the host is busy"""
+        level = current_priority() if level is None else level
+        state = self._host(host)
+        limit = self.limit(host, level)
+        ticket = (level, next(self._arrivals))
+        queued = time.monotonic()
+
+        with state.condition:
+            heapq.heappush(state.waiting, ticket)
+            while True:
+                hold_off = self._hold_off(level)
+                if state.waiting[0] == ticket and state.active < limit and hold_off == 0.0:
+                    break
+                state.condition.wait(hold_off or None)
+            heapq.heappop(state.waiting)
+            state.active += 1
+            if level == INTERACTIVE:
+                self._last_interactive = time.monotonic()
+            self.waited[level] = self.waited.get(level, 0.0) + time.monotonic() - queued
+            # The next ticket may fit in another free slot
+            state.condition.notify_all()
+        try:
+            yield
+        finally:
+            with state.condition:
+                state.active -= 1
+                state.condition.notify_all()
+
+    def busy(self, host: str) -> Tuple[int, int]:
+        """(active, waiting) requests of host"""
+        state = self._host(host)
+        with state.condition:
+            return state.active, len(state.waiting)
+
+
+_scheduler: Optional[RequestScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RequestScheduler:
+    """Process-wide scheduler; GENERT_HTTP_BUDGET sets the budget of services without their own"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler(default_budget=int(os.getenv("GENERT_HTTP_BUDGET", DEFAULT_BUDGET)))
+        return _scheduler
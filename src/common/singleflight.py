@@ -0,0 +1,122 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from src.common.scheduler import current_priority
+
+
+class SingleFlight:
+    """
+    Coalesces identical calls that overlap in time: the first caller for a
+    key runs the function, callers arriving while it runs wait for it and get
+    the same result (or exception). Nothing is kept once the call returns, so
+    this is not a cache; later calls run again.
+
+        flights = SingleFlight()
+        text = flights.do(url, fetch, url)                 # from threads
+        text = await flights.do_async(url, fetch, url)     # from coroutines
+
+    Thread and asyncio callers share flights: a coroutine can wait for a call
+    a thread started and the other way round. Waiters get the very object
+    the leader returned, so results must not be mutated in place.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.calls = 0   # calls that ran the function
+        self.shared = 0  # calls that waited for another caller's result
+
+    def _join(self, key: Hashable):
+        """(future, leader): the flight of key, and whether this caller has to run it"""
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.shared += 1
+                return future, False
+            future = self._flights[key] = Future()
+            self.calls += 1
+            return future, True
+
+    def _land(self, key: Hashable, future: Future, result: Any = None, error: Optional[BaseException] = None):
+        with self._lock:
+            self._flights.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._land(key, future, error=e)
+            raise
+        self._land(key, future, result)
+        return result
+
+    async def do_async(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """Like do(); `fn` is a coroutine function, or a plain function run in the loop's default executor"""
+        future, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            if asyncio.iscoroutinefunction(fn):
+                result = await fn(*args, **kwargs)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(None, functools.partial(fn, *args, **kwargs))
+        except BaseException as e:  # a cancelled leader cancels its waiters too
+            self._land(key, future, error=e)
+            raise
+        self._land(key, future, result)
+        return result
+
+    def in_flight(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._flights
+
+
+_flights = SingleFlight()
+
+
+def flights() -> SingleFlight:
+    """Process-wide group shared by http and the fetch functions"""
+    return _flights
+
+
+def single_flight(key: Optional[Callable[..., Hashable]] = None):
+    """
+    Decorator coalescing overlapping calls of a fetch function. Calls share a
+    flight when `key(*args, **kwargs)` is equal (default: the arguments
+    themselves); keys are scoped to the function and the request priority.
+
+        @single_flight(key=lambda self, kegg_id: kegg_id)
+        def get_kegg_gene_info(self, kegg_id): ...
+    """
+    def decorator(fn):
+        name = f"{fn.__module__}.{fn.__qualname__}"
+
+        def flight_key(args, kwargs):
+            # Per priority, like http.get: an interactive call never waits on a queued prefetch
+            if key is not None:
+                return name, current_priority(), key(*args, **kwargs)
+            return name, current_priority(), args, tuple(sorted(kwargs.items()))
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                return await _flights.do_async(flight_key(args, kwargs), fn, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return _flights.do(flight_key(args, kwargs), fn, *args, **kwargs)
+        return wrapper
+
+    return decorator
@@ -0,0 +1,12 @@
+import os
+
+
+def cache_dir(*parts: str) -> str:
+    """Return (and create) a directory under the local GeneRT cache.
+
+    The location can be overridden with the GENERT_CACHE_DIR environment variable.
+    """
+    base = os.getenv("GENERT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "genert"))
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,112 @@
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from src.common.tracing import span
+
+
+class TaskGraph:
+    """
+    Small DAG scheduler for the stages of one run. Each task is submitted to
+    a thread pool as soon as the tasks it depends on have finished, and gets
+    their results as arguments, so independent stages (downloads, scraping,
+    index loading) overlap and a run takes about as long as its longest
+    chain of stages.
+
+        with TaskGraph() as stages:
+            stages.value("symbol", "TP53")
+            stages.add("gene_id", resolve, "symbol")
+            stages.add("pathways", fetch_pathways, "gene_id")
+            pathways = stages.result("pathways")
+
+    Tasks run in a copy of the caller's context, so their spans nest under
+    the run that started them. A failed task fails its dependents with the
+    same exception; result() re-raises it. Leaving the block cancels the
+    tasks that have not started, and their dependents.
+    """
+
+    def __init__(self, max_workers: int = 4, category: str = ""):
+        self.category = category
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="genert-stage")
+        self._tasks: Dict[str, Callable] = {}
+        self._deps: Dict[str, List[str]] = {}
+        self._futures: Dict[str, Future] = {}
+        self._submitted = set()
+        self._lock = threading.Lock()
+
+    def add(self, name: str, fn: Callable, *deps: str) -> Future:
+        """Register `fn(*results of deps)`; it starts right away when it has no pending dependency"""
+        unknown = [d for d in deps if d not in self._futures]
+        if unknown:
+            raise ValueError(f"Task {name!r} depends on unknown tasks {unknown}; add them first")
+        if name in self._futures:
+            raise ValueError(f"Task {name!r} added twice")
+        self._tasks[name] = fn
+        self._deps[name] = list(deps)
+        self._futures[name] = Future()
+        context = contextvars.copy_context()
+        for dep in deps:
+            self._futures[dep].add_done_callback(lambda _, name=name, context=context: self._maybe_submit(name, context))
+        self._maybe_submit(name, context)
+        return self._futures[name]
+
+    def value(self, name: str, result: Any) -> Future:
+        """Register an already known value as a finished task"""
+        return self.add(name, lambda: result)
+
+    def result(self, name: str, timeout: Optional[float] = None) -> Any:
+        return self._futures[name].result(timeout)
+
+    def done(self, name: str) -> bool:
+        return self._futures[name].done()
+
+    def shutdown(self, wait: bool = True):
+        """Cancel stages that have not started; with wait=False, running ones finish in the background"""
+        # The graph's own futures, not only the executor's, so result() raises CancelledError instead of hanging
+        for future in list(self._futures.values()):
+            future.cancel()  # no-op for running and finished stages
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Whatever the block did not ask for (a cached run returns early) is not waited for
+        self.shutdown(wait=False)
+
+    def _maybe_submit(self, name: str, context: contextvars.Context):
+        with self._lock:
+            if name in self._submitted or self._futures[name].done():  # done: cancelled by shutdown()
+                return
+            if not all(self._futures[d].done() for d in self._deps[name]):
+                return
+            self._submitted.add(name)
+
+        future = self._futures[name]
+        deps = [self._futures[d] for d in self._deps[name]]
+        if any(dep.cancelled() for dep in deps):
+            future.cancel()
+            return
+        failed = next((dep for dep in deps if dep.exception() is not None), None)
+        if failed is not None:
+            future.set_exception(failed.exception())
+            return
+        args = [self._futures[d].result() for d in self._deps[name]]
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                with span(f"stage {name}", self.category):
+                    result = self._tasks[name](*args)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+        try:
+            self._executor.submit(context.run, run)
+        except RuntimeError as e:  # shut down before this stage became ready
+            if not future.done():
+                future.set_exception(e)
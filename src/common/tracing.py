@@ -0,0 +1,220 @@
+import atexit
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Span categories used across the app; the summary totals time per category
+NETWORK = "network"
+PARSE = "parse"
+SCORE = "score"
+RUN = "run"
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("genert_current_span", default=None)
+
+
+class Span:
+    __slots__ = ("span_id", "parent_id", "name", "category", "start_ns", "duration_ns", "thread_id", "attrs")
+
+    def __init__(self, span_id: int, parent_id: Optional[int], name: str, category: str, attrs: Dict):
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.category = category
+        self.start_ns = time.perf_counter_ns()
+        self.duration_ns = 0
+        self.thread_id = threading.get_ident()
+        self.attrs = attrs
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.span_id,
+            "parent": self.parent_id,
+            "name": self.name,
+            "cat": self.category,
+            "start_ns": self.start_ns,
+            "dur_ns": self.duration_ns,
+            "tid": self.thread_id,
+            "attrs": self.attrs,
+        }
+
+
+class Tracer:
+    """
+    Collects finished spans in memory.
+
+    Spans nest through a context variable, so a KGML parse inside a
+    process_gene run is recorded as its child; threads start without a
+    parent. Nothing is recorded while the tracer is disabled, which keeps
+    the cost of an idle span to one attribute check.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.output_path: Optional[str] = None
+        self.spans: List[Span] = []
+        self._flushed = 0
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def enable(self, output_path: Optional[str] = None):
+        self.enabled = True
+        self.output_path = output_path
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        with self._lock:
+            self.spans = []
+            self._flushed = 0
+
+    @contextmanager
+    def span(self, name: str, category: str = "", **attrs):
+        if not self.enabled:
+            yield None
+            return
+
+        with self._lock:
+            self._next_id += 1
+            span_id = self._next_id
+        parent = _current_span.get()
+        span = Span(span_id, parent.span_id if parent else None, name, category or (parent.category if parent else ""), attrs)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.attrs["error"] = type(e).__name__
+            raise
+        finally:
+            span.duration_ns = time.perf_counter_ns() - span.start_ns
+            _current_span.reset(token)
+            with self._lock:
+                self.spans.append(span)
+
+    # Output
+
+    def flush(self):
+        """Write spans recorded since the last flush to output_path (the whole trace for .json files)"""
+        if not self.output_path:
+            return
+        with self._lock:
+            spans = list(self.spans)
+            start = 0 if self.output_path.endswith(".json") else self._flushed
+            self._flushed = len(spans)
+        if spans[start:]:
+            self.write(self.output_path, spans[start:])
+
+    def write(self, path: Optional[str] = None, spans: Optional[List[Span]] = None):
+        """Write spans as JSONL, or as a Chrome trace (chrome://tracing, Perfetto) when the path ends in .json"""
+        path = path or self.output_path
+        if not path:
+            return
+        spans = self.spans if spans is None else spans
+
+        if path.endswith(".json"):
+            events = [{
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": span.start_ns / 1000,
+                "dur": span.duration_ns / 1000,
+                "pid": os.getpid(),
+                "tid": span.thread_id,
+                "args": span.attrs,
+            } for span in spans]
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+        else:
+            with open(path, "a", encoding="utf-8") as f:
+                for span in spans:
+                    f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+    def summary(self, spans: Optional[List[Span]] = None) -> str:
+        """Table of total/mean/max time per span name, plus the self time spent in each category"""
+        spans = self.spans if spans is None else spans
+        if not spans:
+            return "No spans recorded"
+
+        by_name: Dict[str, List[int]] = {}
+        for span in spans:
+            by_name.setdefault(span.name, []).append(span.duration_ns)
+
+        # Self time (minus children) so nested spans are not counted twice per category
+        child_time: Dict[int, int] = {}
+        for span in spans:
+            if span.parent_id is not None:
+                child_time[span.parent_id] = child_time.get(span.parent_id, 0) + span.duration_ns
+        by_category: Dict[str, int] = {}
+        for span in spans:
+            own = max(0, span.duration_ns - child_time.get(span.span_id, 0))
+            by_category[span.category or "other"] = by_category.get(span.category or "other", 0) + own
+
+        lines = [f"{'span':<40}{'count':>7}{'total ms':>12}{'mean ms':>10}{'max ms':>10}"]
+        for name, durations in sorted(by_name.items(), key=lambda item: -sum(item[1])):
+            total = sum(durations) / 1e6
+            lines.append(f"{name[:39]:<40}{len(durations):>7}{total:>12.1f}{total / len(durations):>10.2f}{max(durations) / 1e6:>10.1f}")
+
+        wall = sum(by_category.values()) or 1
+        lines.append("")
+        lines.append(f"{'category (self time)':<40}{'':>7}{'total ms':>12}{'share':>10}")
+        for category, total in sorted(by_category.items(), key=lambda item: -item[1]):
+            lines.append(f"{category:<40}{'':>7}{total / 1e6:>12.1f}{total / wall:>10.0%}")
+        return "\n".join(lines)
+
+
+tracer = Tracer()
+
+_env_trace = os.getenv("GENERT_TRACE")
+if _env_trace:
+    # GENERT_TRACE=1 only prints summaries; any other value is the output file
+    tracer.enable(None if _env_trace == "1" else _env_trace)
+
+
+def span(name: str, category: str = "", **attrs):
+    """Time a block: `with span("KEGG get", NETWORK, url=url): ...`"""
+    return tracer.span(name, category, **attrs)
+
+
+def traced(name: Optional[str] = None, category: str = ""):
+    """Decorator form of span(), named after the function by default"""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(span_name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def trace_run(name: str, **attrs):
+    """
+    Root span for one analysis (e.g. process_gene). When tracing is on, the
+    run's spans are flushed to the trace file and a summary table is printed.
+    """
+    if not tracer.enabled:
+        yield None
+        return
+
+    first = len(tracer.spans)
+    try:
+        with tracer.span(name, RUN, **attrs) as run_span:
+            yield run_span
+    finally:
+        with tracer._lock:
+            run_spans = tracer.spans[first:]
+        print(f"\nTrace summary for {name}:")
+        print(tracer.summary(run_spans))
+        tracer.flush()
+
+
+atexit.register(tracer.flush)
@@ -0,0 +1,261 @@
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, List, Optional, Sequence
+
+
+class VirtualTreeview(ttk.Frame):
+    """
+    Treeview that only renders the rows currently visible.
+
+    All rows live in a plain Python list; the Treeview holds a fixed pool of
+    items whose values are swapped as the user scrolls. Sorting (click on a
+    heading) and filtering work on the list, so a response with thousands of
+    rows costs the same to display as one with twenty.
+
+    Existing Treeview calls such as selection(), item() and bind() are
+    forwarded to the inner widget, so it can replace a ttk.Treeview in place.
+    <<TreeviewSelect>> handlers only run when the selected row changes, not
+    when scrolling moves the selection to another pooled item.
+    """
+
+    def __init__(self, parent, columns: Sequence[str], headings: Sequence[str],
+                 widths: Optional[Sequence[int]] = None, height: int = 10,
+                 on_rows_visible: Optional[Callable[[List[tuple]], None]] = None, **kwargs):
+        super().__init__(parent, **kwargs)
+
+        self.columns = list(columns)
+        self.on_rows_visible = on_rows_visible
+
+        self.tree = ttk.Treeview(self, columns=self.columns, show='headings', height=height, selectmode='browse')
+        for i, (column, heading) in enumerate(zip(self.columns, headings)):
+            self.tree.heading(column, text=heading, command=lambda c=column: self.sort_by(c))
+            if widths:
+                self.tree.column(column, width=widths[i])
+
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self._rows: List[tuple] = []      # underlying data
+        self._view: List[int] = []        # indices into _rows after filter/sort
+        self._offset = 0
+        self._visible = height
+        self._items: List[str] = []       # pooled Treeview item IDs
+        self._selected: Optional[int] = None  # index into _rows
+        self._notified_key = None             # first column of the row select handlers last saw
+        self._selection_changed = False
+        self._filter_text = ""
+        self._sort_column: Optional[str] = None
+        self._sort_reverse = False
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self._scroll_units(-3))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_units(3))
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<Up>", lambda e: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self._scroll_units(-self._visible))
+        self.tree.bind("<Next>", lambda e: self._scroll_units(self._visible))
+
+    # Treeview compatibility
+
+    def selection(self):
+        return self.tree.selection()
+
+    def item(self, *args, **kwargs):
+        return self.tree.item(*args, **kwargs)
+
+    def bind(self, sequence=None, func=None, add="+"):
+        # Always add, so callers cannot replace the handlers the virtual list relies on
+        if sequence == "<<TreeviewSelect>>" and func is not None:
+            func = self._when_selection_changed(func)
+        return self.tree.bind(sequence, func, add)
+
+    def _when_selection_changed(self, func):
+        # _on_select was bound first, so it has already compared the selection with the last one
+        def handler(event):
+            if self._selection_changed:
+                return func(event)
+        return handler
+
+    def heading(self, *args, **kwargs):
+        return self.tree.heading(*args, **kwargs)
+
+    def column(self, *args, **kwargs):
+        return self.tree.column(*args, **kwargs)
+
+    # Data
+
+    def row_count(self) -> int:
+        """Number of rows after filtering (not len(), which would make an empty widget falsy)"""
+        return len(self._view)
+
+    def set_rows(self, rows: Sequence[tuple], keep_position: bool = True):
+        """Replace the underlying rows; scroll position and selection are kept when possible"""
+        selected_row = self.selected_row()
+        self._rows = [tuple(row) for row in rows]
+        self._selected = None
+        if selected_row is not None:
+            try:
+                self._selected = self._rows.index(selected_row)
+            except ValueError:
+                # Row values changed (e.g. a new score); fall back to matching the first column
+                key = selected_row[0]
+                self._selected = next((i for i, row in enumerate(self._rows) if row[0] == key), None)
+        if not keep_position:
+            self._offset = 0
+        self._rebuild_view()
+
+    def clear(self):
+        self.set_rows([], keep_position=False)
+
+    def update_row(self, key, row: tuple):
+        """Replace the row whose first column equals `key` without rebuilding the view"""
+        for i, existing in enumerate(self._rows):
+            if existing[0] == key:
+                self._rows[i] = tuple(row)
+                self._render()
+                return True
+        return False
+
+    def rows(self) -> List[tuple]:
+        """Rows in display order (after filtering and sorting)"""
+        return [self._rows[i] for i in self._view]
+
+    def selected_row(self) -> Optional[tuple]:
+        return self._rows[self._selected] if self._selected is not None and self._selected < len(self._rows) else None
+
+    def set_filter(self, text: str):
+        """Keep only rows where any column contains `text` (case-insensitive)"""
+        self._filter_text = text.strip().lower()
+        self._offset = 0
+        self._rebuild_view()
+
+    def sort_by(self, column: str, reverse: Optional[bool] = None):
+        if reverse is None:
+            reverse = not self._sort_reverse if self._sort_column == column else False
+        self._sort_column = column
+        self._sort_reverse = reverse
+        self._rebuild_view()
+
+    # Rendering
+
+    def _rebuild_view(self):
+        view = range(len(self._rows))
+        if self._filter_text:
+            needle = self._filter_text
+            view = [i for i in view if any(needle in str(value).lower() for value in self._rows[i])]
+
+        view = list(view)
+        if self._sort_column is not None:
+            col = self.columns.index(self._sort_column)
+            view.sort(key=lambda i: self._sort_key(self._rows[i][col]), reverse=self._sort_reverse)
+
+        self._view = view
+        self._render()
+
+    @staticmethod
+    def _sort_key(value):
+        # Numbers before text so score columns sort numerically
+        try:
+            return 0, float(value), ""
+        except (TypeError, ValueError):
+            return 1, 0.0, str(value).lower()
+
+    def _render(self):
+        self._offset = max(0, min(self._offset, len(self._view) - self._visible))
+        window = self._view[self._offset:self._offset + self._visible]
+
+        # Grow the item pool on demand, then reuse the same items for every scroll position
+        while len(self._items) < len(window):
+            self._items.append(self.tree.insert('', 'end', values=()))
+        for iid in self._items[len(window):]:
+            self.tree.detach(iid)
+
+        selected_iid = None
+        for position, (iid, row_index) in enumerate(zip(self._items, window)):
+            self.tree.item(iid, values=self._rows[row_index])
+            self.tree.move(iid, '', position)  # re-attaches items detached by a shorter window
+            if row_index == self._selected:
+                selected_iid = iid
+
+        # Only touch the selection when it differs; every change queues another <<TreeviewSelect>>
+        if selected_iid:
+            if self.tree.selection() != (selected_iid,):
+                self.tree.selection_set(selected_iid)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+
+        total = len(self._view)
+        if total:
+            self.scrollbar.set(self._offset / total, min(1.0, (self._offset + len(window)) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+        if self.on_rows_visible and window:
+            self.on_rows_visible([self._rows[i] for i in window])
+
+    def _on_resize(self, event):
+        rowheight = self._row_height()
+        visible = max(1, (event.height - rowheight) // rowheight)  # one row's worth for the heading
+        if visible != self._visible:
+            self._visible = visible
+            self._render()
+
+    def _row_height(self) -> int:
+        if self._items:
+            bbox = self.tree.bbox(self._items[0])
+            if bbox:
+                return max(1, bbox[3])
+        try:
+            return int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        except (tk.TclError, ValueError):
+            return 20
+
+    def _on_scrollbar(self, *args):
+        if not self._view:
+            return
+        if args[0] == "moveto":
+            self._offset = int(float(args[1]) * len(self._view))
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self._visible if args[2] == "pages" else 1)
+            self._offset += step
+        self._render()
+
+    def _on_mousewheel(self, event):
+        self._scroll_units(-int(event.delta / 120) * 3 if abs(event.delta) >= 120 else -event.delta)
+        return "break"
+
+    def _scroll_units(self, units: int):
+        self._offset += units
+        self._render()
+        return "break"
+
+    def _on_select(self, event=None):
+        self._selection_changed = False
+        selection = self.tree.selection()
+        if not selection:
+            return
+        position = self._items.index(selection[0]) if selection[0] in self._items else None
+        if position is not None and self._offset + position < len(self._view):
+            self._selected = self._view[self._offset + position]
+
+        row = self.selected_row()
+        key = row[0] if row else None
+        self._selection_changed = key != self._notified_key
+        self._notified_key = key
+
+    def _move_selection(self, step: int):
+        if not self._view:
+            return "break"
+        current = self._view.index(self._selected) if self._selected in self._view else self._offset - step
+        target = max(0, min(len(self._view) - 1, current + step))
+        self._selected = self._view[target]
+        if target < self._offset:
+            self._offset = target
+        elif target >= self._offset + self._visible:
+            self._offset = target - self._visible + 1
+        self._render()
+        self.tree.event_generate("<<TreeviewSelect>>")
+        return "break"
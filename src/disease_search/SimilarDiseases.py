@@ -1,14 +1,26 @@
 
-import requests
+import os
 import re
 import tkinter as tk
 from tkinter import ttk, messagebox
 from collections import deque
-from functools import lru_cache
+import heapq
+import itertools
 import threading
+import time
 from queue import Queue
 
-from bs4 import BeautifulSoup
+from src.common import endpoints, http
+from src.common.disease_index import (flush_disease_index, loaded_disease_index, record_disease_entry,
+                                      warm_up_disease_index)
+from src.common.prefetch import get_prefetcher
+from src.common.scheduler import BACKGROUND, mark_interactive, request_priority
+from src.common.storage import cache_dir
+from src.common.tracing import PARSE, SCORE, span, trace_run, traced
+from src.common.virtual_list import VirtualTreeview
+
+# Listed diseases whose entries are fetched ahead of a double-click
+PREFETCH_TOP_N = 3
 
 
 class DiseaseGeneApp:
@@ -23,9 +35,18 @@ class DiseaseGeneApp:
         # Configuration - Default Settings
         self.max_diseases_to_check = 200  # Limit number of diseases to check
         self.max_results = 50
+        self.partial_update_interval = 0.5  # seconds between ('partial', top_n) updates
         self.stop_comparison = False
         self.comparison_queue = Queue()
 
+        # Approximate search over all KEGG diseases (MinHash + LSH); falls back to the direct scan
+        self.use_similarity_index = True
+        self.exact_rescoring = False  # refetch the final top-N entries instead of using the bulk /link sets
+        self.similarity_index = None
+
+        # Drug lists per result disease (None while loading), filled lazily for visible rows
+        self.result_drugs = {}
+
         # Caches
         self.pathway_cache = {}
         self.disease_cache = {}
@@ -33,6 +54,10 @@ class DiseaseGeneApp:
         # UI Setup
         self.setup_ui()
 
+        # Offline name index for instant and search-as-you-type lookups
+        self.live_search_job = None
+        warm_up_disease_index()
+
     def setup_ui(self):
         # Main Frame
         main_frame = ttk.Frame(self.root, padding="10")
@@ -43,8 +68,12 @@ class DiseaseGeneApp:
         search_frame.pack(fill=tk.X, pady=10)
 
         ttk.Label(search_frame, text="Disease ID/Name:").pack(side=tk.LEFT)
-        self.search_entry = ttk.Entry(search_frame, width=40)
+        # Combobox so search-as-you-type suggestions can be picked from its drop-down
+        self.search_entry = ttk.Combobox(search_frame, width=40)
         self.search_entry.pack(side=tk.LEFT, padx=5)
+        self.search_entry.bind('<Return>', lambda e: self.search_disease())
+        self.search_entry.bind('<KeyRelease>', self.schedule_live_search)
+        self.search_entry.bind('<<ComboboxSelected>>', self.on_suggestion_selected)
 
         search_btn = ttk.Button(search_frame, text="Search", command=self.search_disease)
         search_btn.pack(side=tk.LEFT)
@@ -117,26 +146,57 @@ class DiseaseGeneApp:
         scrollbar.pack(side="right", fill="y")
 
     def setup_results_tab(self):
-        # Comparison results widgets
-        self.results_tree = ttk.Treeview(self.results_frame,
-                                         columns=('id', 'name', 'score'),
-                                         show='headings',
-                                         height=20)
-        self.results_tree.heading('id', text='Disease ID')
-        self.results_tree.heading('name', text='Disease Name')
-        self.results_tree.heading('score', text='Similarity')
-
-        self.results_tree.column('id', width=100)
-        self.results_tree.column('name', width=600)
-        self.results_tree.column('score', width=80)
-
-        scrollbar = ttk.Scrollbar(self.results_frame, orient="vertical", command=self.results_tree.yview)
-        self.results_tree.configure(yscrollcommand=scrollbar.set)
-
-        self.results_tree.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        # Filter on the loaded results (applied to the data, not the widgets)
+        filter_frame = ttk.Frame(self.results_frame)
+        filter_frame.pack(fill=tk.X, pady=(5, 0))
+        ttk.Label(filter_frame, text="Filter:").pack(side=tk.LEFT, padx=5)
+        self.results_filter_var = tk.StringVar()
+        self.results_filter_var.trace_add("write", lambda *args: self.results_tree.set_filter(self.results_filter_var.get()))
+        ttk.Entry(filter_frame, textvariable=self.results_filter_var, width=30).pack(side=tk.LEFT)
+
+        # Drugs of the selected result
+        drug_frame = ttk.Frame(self.results_frame)
+        drug_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=5)
+        ttk.Label(drug_frame, text="Drugs:").pack(side="left", padx=(10, 5))
+        self.drug_combo = ttk.Combobox(drug_frame, width=80)
+        self.drug_combo.pack(side="left", fill="x", expand=True, padx=(0, 10))
+
+        # Comparison results widgets: only visible rows are rendered, and drugs are
+        # fetched for a row the first time it scrolls into view
+        self.results_tree = VirtualTreeview(self.results_frame,
+                                            columns=('id', 'name', 'score', 'drugs'),
+                                            headings=('Disease ID', 'Disease Name', 'Similarity', 'Drugs'),
+                                            widths=(100, 450, 80, 300),
+                                            height=20,
+                                            on_rows_visible=self.load_visible_drugs)
+        self.results_tree.pack(fill="both", expand=True)
 
         self.results_tree.bind("<Double-1>", self.load_selected_disease)
+        self.results_tree.bind("<<TreeviewSelect>>", lambda e: self.populate_drug_combobox())
+
+    def schedule_live_search(self, event):
+        """Debounce keystrokes and refresh the suggestion list from the local index"""
+        if event.keysym in ('Return', 'Up', 'Down', 'Left', 'Right', 'Tab', 'Escape'):
+            return
+        if self.live_search_job is not None:
+            self.root.after_cancel(self.live_search_job)
+        self.live_search_job = self.root.after(150, self.update_suggestions)
+
+    def update_suggestions(self):
+        self.live_search_job = None
+        index = loaded_disease_index()
+        query = self.search_entry.get().strip()
+        if index is None or len(query) < 2:
+            return
+
+        matches = index.search(query, limit=25)
+        self.search_entry['values'] = [f"{disease_id} - {name}" for disease_id, name in matches]
+        self.status_var.set(f"{len(matches)} suggestions (open the list to pick one)" if matches else "No matching diseases")
+
+    def on_suggestion_selected(self, event):
+        disease_id = self.search_entry.get().split(' - ', 1)[0].strip()
+        self.search_entry.set(disease_id)
+        self.search_disease()
 
     def search_disease(self):
         query = self.search_entry.get().strip()
@@ -160,15 +220,23 @@ class DiseaseGeneApp:
                     self.status_var.set("Ready")
                     return
 
-            # Otherwise search by name
-            response = requests.get(f'https://rest.kegg.jp/find/disease/{query}')
-            if response.status_code == 200:
+            # Otherwise search by name, offline when the local index is loaded
+            index = loaded_disease_index()
+            if index is not None:
+                diseases = index.search(query)
+                status_code = 200
+            else:
+                response = http.get(endpoints.kegg_rest(f'find/disease/{query}'))
+                status_code = response.status_code
                 diseases = []
-                for line in response.text.split('\n'):
-                    if line.strip():
-                        parts = line.split('\t')
-                        if len(parts) >= 2:
-                            diseases.append((parts[0], parts[1]))
+                if status_code == 200:
+                    for line in response.text.split('\n'):
+                        if line.strip():
+                            parts = line.split('\t')
+                            if len(parts) >= 2:
+                                diseases.append((parts[0], parts[1]))
+
+            if status_code == 200:
 
                 if len(diseases) == 1:
                     disease_data = self.get_kegg_disease(diseases[0][0])
@@ -179,7 +247,7 @@ class DiseaseGeneApp:
                     messagebox.showinfo("Not Found", "No matching diseases found")
                     self.status_var.set("Ready")
             else:
-                messagebox.showerror("Error", f"API request failed with status code {response.status_code}")
+                messagebox.showerror("Error", f"API request failed with status code {status_code}")
                 self.status_var.set("Ready")
 
         except Exception as e:
@@ -201,23 +269,10 @@ class DiseaseGeneApp:
         tree_frame = ttk.Frame(select_win)
         tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
 
-        # Create treeview
-        tree = ttk.Treeview(tree_frame, columns=('id', 'name'), show='headings')
-        tree.heading('id', text='ID')
-        tree.heading('name', text='Name')
-        tree.column('id', width=100)
-        tree.column('name', width=350)
-
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
-        tree.configure(yscrollcommand=scrollbar.set)
-
-        tree.pack(side="left", fill=tk.BOTH, expand=True)
-        scrollbar.pack(side="right", fill="y")
-
-        # Populate treeview
-        for disease_id, disease_name in diseases:
-            tree.insert('', 'end', values=(disease_id, disease_name))
+        # Create treeview (virtualised, broad names can match hundreds of diseases)
+        tree = VirtualTreeview(tree_frame, columns=('id', 'name'), headings=('ID', 'Name'), widths=(100, 350))
+        tree.pack(fill=tk.BOTH, expand=True)
+        tree.set_rows(diseases)
 
         button_frame = ttk.Frame(select_win)
         button_frame.pack(fill=tk.X, pady=10)
@@ -251,82 +306,96 @@ class DiseaseGeneApp:
         tree.bind("<Double-1>", lambda e: on_select())
 
     def get_kegg_disease(self, disease_id):
+        """fetch_kegg_disease for the UI thread: failures are shown in the status bar"""
+        try:
+            return self.fetch_kegg_disease(disease_id)
+        except ValueError as e:
+            self.status_var.set(f"Error: {str(e)}")
+        except Exception as e:
+            self.status_var.set(f"Error fetching disease data: {str(e)}")
+        return None
+
+    def fetch_kegg_disease(self, disease_id):
+        """
+        Parsed disease entry, cached in disease_cache; raises when it cannot
+        be retrieved. Does not touch the UI, so worker threads use it.
+        """
         if disease_id in self.disease_cache:
             return self.disease_cache[disease_id]
 
-        try:
-            response = requests.get(f'https://rest.kegg.jp/get/{disease_id}')
-            if response.status_code == 200 and response.text.strip():
-                disease_data = {'entry': disease_id, 'pathways': []}
-                current_section = None
-                buffer = ""
-
-                for line in response.text.split('\n'):
-                    if not line.strip():
-                        continue
-
-                    # Detect start of new section
-                    if not line.startswith(' '):
-                        if current_section == 'PATHWAY' and buffer:
-                            # Process any buffered pathway content
-                            for pathway_match in re.finditer(r'(hsa\d+)\s+(.+?)(?=hsa\d+|\Z)', buffer):
-                                disease_data['pathways'].append({
-                                    'id': pathway_match.group(1),
-                                    'name': pathway_match.group(2).strip()
-                                })
-                            buffer = ""
-
-                        section = line[:12].strip()
-                        content = line[12:].strip()
-                        current_section = section
-
-                        if section == 'ENTRY':
-                            disease_data['entry'] = content.split()[0]
-                        elif section == 'NAME':
-                            disease_data['name'] = content
-                        elif section == 'CATEGORY':
-                            disease_data['category'] = content
-                        elif section == 'DESCRIPTION':
-                            disease_data['description'] = content
-                        elif section == 'PATHWAY':
-                            buffer = content
-                    else:
-                        content = line.strip()
-                        if current_section == 'PATHWAY':
-                            buffer += " " + content
-
-                # Final check for last buffer
+        response = http.get(endpoints.kegg_rest(f'get/{disease_id}'))
+        if response.status_code != 200:
+            raise ValueError(f"API returned status code {response.status_code}")
+        if not response.text.strip():
+            raise ValueError(f"No data returned for {disease_id}")
+
+        disease_data = self.parse_kegg_disease(response.text, disease_id)
+        self.disease_cache[disease_id] = disease_data
+        record_disease_entry(disease_data['entry'], disease_data.get('name', ''),
+                             disease_data.get('description', ''))
+        return disease_data
+
+    @traced("KEGG disease flat file parse", PARSE)
+    def parse_kegg_disease(self, text, disease_id):
+        """Parse a KEGG disease flat file into {'entry', 'name', 'category', 'description', 'pathways'}"""
+        disease_data = {'entry': disease_id, 'pathways': []}
+        current_section = None
+        buffer = ""
+
+        for line in text.split('\n'):
+            if not line.strip():
+                continue
+
+            # Detect start of new section
+            if not line.startswith(' '):
                 if current_section == 'PATHWAY' and buffer:
+                    # Process any buffered pathway content
                     for pathway_match in re.finditer(r'(hsa\d+)\s+(.+?)(?=hsa\d+|\Z)', buffer):
                         disease_data['pathways'].append({
                             'id': pathway_match.group(1),
                             'name': pathway_match.group(2).strip()
                         })
-
-                # If no pathways found using the regex pattern, try alternative parsing
-                if not disease_data['pathways'] and buffer:
-                    parts = buffer.split('hsa')
-                    for part in parts[1:]:  # Skip first empty part
-                        if part.strip():
-                            pathway_id = 'hsa' + part.split()[0]
-                            pathway_name = ' '.join(part.split()[1:])
-                            disease_data['pathways'].append({
-                                'id': pathway_id,
-                                'name': pathway_name
-                            })
-
-                self.disease_cache[disease_id] = disease_data
-                return disease_data
-            elif response.status_code != 200:
-                self.status_var.set(f"Error: API returned status code {response.status_code}")
-                return None
+                    buffer = ""
+
+                section = line[:12].strip()
+                content = line[12:].strip()
+                current_section = section
+
+                if section == 'ENTRY':
+                    disease_data['entry'] = content.split()[0]
+                elif section == 'NAME':
+                    disease_data['name'] = content
+                elif section == 'CATEGORY':
+                    disease_data['category'] = content
+                elif section == 'DESCRIPTION':
+                    disease_data['description'] = content
+                elif section == 'PATHWAY':
+                    buffer = content
             else:
-                self.status_var.set(f"Error: No data returned for {disease_id}")
-                return None
-
-        except Exception as e:
-            self.status_var.set(f"Error fetching disease data: {str(e)}")
-            return None
+                content = line.strip()
+                if current_section == 'PATHWAY':
+                    buffer += " " + content
+
+        # Final check for last buffer
+        if current_section == 'PATHWAY' and buffer:
+            for pathway_match in re.finditer(r'(hsa\d+)\s+(.+?)(?=hsa\d+|\Z)', buffer):
+                disease_data['pathways'].append({
+                    'id': pathway_match.group(1),
+                    'name': pathway_match.group(2).strip()
+                })
+
+        # If no pathways found using the regex pattern, try alternative parsing
+        if not disease_data['pathways'] and buffer:
+            parts = buffer.split('hsa')
+            for part in parts[1:]:  # Skip first empty part
+                if part.strip():
+                    pathway_id = 'hsa' + part.split()[0]
+                    pathway_name = ' '.join(part.split()[1:])
+                    disease_data['pathways'].append({
+                        'id': pathway_id,
+                        'name': pathway_name
+                    })
+        return disease_data
 
     def display_disease(self, disease_data):
         if not disease_data:
@@ -356,7 +425,9 @@ class DiseaseGeneApp:
         self.progress['value'] = 0
 
         # Clear previous results
-        self.results_tree.delete(*self.results_tree.get_children())
+        self.results_tree.clear()
+        self.drug_combo.set("")
+        self.drug_combo['values'] = []
 
         threading.Thread(
             target=self.find_similar_diseases,
@@ -371,11 +442,17 @@ class DiseaseGeneApp:
         self.stop_btn.config(state=tk.DISABLED)
         self.status_var.set("Comparison stopped by user")
 
-    @lru_cache(maxsize=200)
     def get_pathways(self, disease_id):
-        """Get pathway IDs for a disease"""
-        disease_data = self.get_kegg_disease(disease_id)
-        return {p['id'] for p in disease_data.get('pathways', [])} if disease_data else set()
+        """Get pathway IDs for a disease (called from the scan thread); failed fetches are not cached"""
+        if disease_id in self.pathway_cache:
+            return self.pathway_cache[disease_id]
+        try:
+            disease_data = self.fetch_kegg_disease(disease_id)
+        except Exception as e:
+            print(f"Could not fetch {disease_id}: {str(e)}")
+            return set()
+        pathways = self.pathway_cache[disease_id] = {p['id'] for p in disease_data.get('pathways', [])}
+        return pathways
 
     def calculate_similarity(self, pathways1, pathways2):
         """Calculate Jaccard similarity between two sets of pathways"""
@@ -388,76 +465,158 @@ class DiseaseGeneApp:
         return intersection / union if union > 0 else 0.0
 
     def find_similar_diseases(self, start_id):
-        try:
-            # Get initial disease pathways
-            start_pathways = self.get_pathways(start_id)
-            if not start_pathways:
-                self.comparison_queue.put(('error', "No pathways found for starting disease"))
-                return
-
-            # Get diseases for comparison - limited number for better performance
-            self.comparison_queue.put(('status', "Loading disease database..."))
-            all_diseases = self.get_all_diseases(limit=self.max_diseases_to_check)
-
-            if not all_diseases:
-                self.comparison_queue.put(('error', "Failed to retrieve disease database"))
-                return
-
-            self.comparison_queue.put(('status', f"Comparing with {len(all_diseases)} diseases..."))
-
-            # Direct comparison approach - compare with all diseases in the limited set
-            results = []
-
-            for i, (disease_id, disease_name) in enumerate(all_diseases):
-                if self.stop_comparison:
-                    break
-
-                # Skip self-comparison
-                if disease_id == start_id:
-                    continue
-
-                other_pathways = self.get_pathways(disease_id)
-                if not other_pathways:
-                    continue
-
-                score = self.calculate_similarity(start_pathways, other_pathways)
+        # The scan's requests queue behind the user's own lookups
+        with trace_run("find_similar_diseases", disease=start_id), request_priority(BACKGROUND):
+            try:
+                # Get initial disease pathways
+                start_pathways = self.get_pathways(start_id)
+                if not start_pathways:
+                    self.comparison_queue.put(('error', "No pathways found for starting disease"))
+                    return
 
-                # Only include if there's any similarity at all
-                if score > 0:
-                    results.append({
-                        'id': disease_id,
-                        'name': disease_name,
-                        'score': score
-                    })
+                if self.use_similarity_index:
+                    final_results = self.find_similar_with_index(start_id, start_pathways)
+                    if final_results is not None:
+                        self.comparison_queue.put(('results', final_results))
+                        return
 
-                # Update progress periodically
-                if i % 5 == 0:
-                    progress = min(95, int((i / len(all_diseases)) * 100))
-                    self.comparison_queue.put(('progress', progress))
-                    self.comparison_queue.put(('status', f"Comparing diseases: {i}/{len(all_diseases)}"))
+                # Get diseases for comparison - limited number for better performance
+                self.comparison_queue.put(('status', "Loading disease database..."))
+                all_diseases = self.get_all_diseases(limit=self.max_diseases_to_check)
 
-            # Sort by similarity score (descending)
-            results.sort(key=lambda x: -x['score'])
+                if not all_diseases:
+                    self.comparison_queue.put(('error', "Failed to retrieve disease database"))
+                    return
 
-            # Take top results
-            final_results = results[:self.max_results]
-            self.comparison_queue.put(('results', final_results))
+                self.comparison_queue.put(('status', f"Comparing with {len(all_diseases)} diseases..."))
+                top_heap = self.scan_similar_diseases(start_id, start_pathways, all_diseases)
+                self.comparison_queue.put(('results', self.sorted_top_results(top_heap)))
+
+            except Exception as e:
+                self.comparison_queue.put(('error', f"Error during comparison: {str(e)}"))
+            finally:
+                # Entries the scan fetched are saved once, now
+                flush_disease_index()
+
+    @traced("disease similarity scan", SCORE)
+    def scan_similar_diseases(self, start_id, start_pathways, all_diseases):
+        """
+        Direct comparison approach - compare with all diseases in the limited set.
+        A bounded min-heap keeps the current top-N so partial results can be streamed.
+        """
+        top_heap = []
+        changed = False
+        last_update = time.monotonic()
+
+        for i, (disease_id, disease_name) in enumerate(all_diseases):
+            if self.stop_comparison:
+                break
+
+            # Skip self-comparison
+            if disease_id == start_id:
+                continue
+
+            other_pathways = self.get_pathways(disease_id)
+            if not other_pathways:
+                continue
+
+            score = self.calculate_similarity(start_pathways, other_pathways)
+
+            # Only include if there's any similarity at all
+            if score > 0:
+                entry = (score, -i, {'id': disease_id, 'name': disease_name, 'score': score})
+                if len(top_heap) < self.max_results:
+                    heapq.heappush(top_heap, entry)
+                    changed = True
+                elif entry > top_heap[0]:
+                    heapq.heapreplace(top_heap, entry)
+                    changed = True
+
+            if changed and time.monotonic() - last_update >= self.partial_update_interval:
+                self.comparison_queue.put(('partial', self.sorted_top_results(top_heap)))
+                changed = False
+                last_update = time.monotonic()
+
+            # Update progress periodically
+            if i % 5 == 0:
+                progress = min(95, int((i / len(all_diseases)) * 100))
+                self.comparison_queue.put(('progress', progress))
+                self.comparison_queue.put(('status', f"Comparing diseases: {i}/{len(all_diseases)}"))
+
+        return top_heap
+
+    @staticmethod
+    def sorted_top_results(top_heap):
+        """Heap entries sorted by descending score (ties keep scan order)"""
+        return [entry[2] for entry in sorted(top_heap, reverse=True)]
+
+    def find_similar_with_index(self, start_id, start_pathways):
+        """Query the MinHash/LSH index; returns None when the index cannot be loaded"""
+        try:
+            if self.similarity_index is None:
+                self.comparison_queue.put(('status', "Loading similarity index..."))
+                self.similarity_index = self.load_similarity_index()
+        except Exception as e:
+            self.comparison_queue.put(('status', f"Similarity index unavailable, scanning instead: {str(e)}"))
+            self.use_similarity_index = False
+            return None
 
+        self.comparison_queue.put(('status', f"Querying index of {len(self.similarity_index)} diseases..."))
+        with span("MinHash query", SCORE, diseases=len(self.similarity_index)):
+            matches = self.similarity_index.query(
+                start_pathways,
+                top_n=self.max_results,
+                exact_set=self.get_pathways if self.exact_rescoring else None,
+                exclude=[start_id]
+            )
+
+        names = dict(self.get_all_diseases(limit=None))
+        return [{'id': disease_id, 'name': names.get(disease_id, disease_id), 'score': score}
+                for disease_id, score in matches]
+
+    def load_similarity_index(self, refresh=False):
+        """Load the disease pathway index from the local cache, building it on first use"""
+        from src.common.minhash_index import MinHashLSHIndex  # NumPy is only needed once a comparison runs
+
+        path = os.path.join(cache_dir("minhash"), "disease_pathways.npz")
+        return MinHashLSHIndex.load_or_build(path, self.fetch_disease_pathway_sets, refresh=refresh)
+
+    def fetch_disease_pathway_sets(self):
+        """Pathway IDs of every KEGG disease, using a single /link request where possible"""
+        pathway_sets = {}
+        try:
+            response = http.get(endpoints.kegg_rest('link/pathway/disease'))
+            if response.status_code == 200:
+                for line in response.text.split('\n'):
+                    parts = line.strip().split('\t')
+                    if len(parts) >= 2:
+                        disease_id = parts[0].replace('ds:', '')
+                        # Normalise "path:map05200"/"path:hsa05200" to the hsa IDs used in disease entries
+                        pathway_id = parts[1].replace('path:', '').replace('map', 'hsa')
+                        pathway_sets.setdefault(disease_id, set()).add(pathway_id)
         except Exception as e:
-            self.comparison_queue.put(('error', f"Error during comparison: {str(e)}"))
+            self.comparison_queue.put(('status', f"Bulk pathway download failed: {str(e)}"))
+
+        if not pathway_sets:
+            # Fall back to parsing each disease entry
+            for disease_id, _ in self.get_all_diseases(limit=self.max_diseases_to_check):
+                pathways = self.get_pathways(disease_id)
+                if pathways:
+                    pathway_sets[disease_id] = pathways
+        return pathway_sets
 
     def get_all_diseases(self, limit=200):
-        """Get limited number of diseases from KEGG database"""
+        """Get limited number of diseases from KEGG database (limit=None returns all)"""
         try:
-            response = requests.get('https://rest.kegg.jp/list/disease')
+            response = http.get(endpoints.kegg_rest('list/disease'))
             if response.status_code == 200:
                 diseases = []
                 for line in response.text.split('\n'):
                     if line.strip():
                         parts = line.split('\t')
                         if len(parts) >= 2:
-                            diseases.append((parts[0], parts[1]))
-                            if len(diseases) >= limit:
+                            diseases.append((parts[0].replace('ds:', ''), parts[1]))
+                            if limit is not None and len(diseases) >= limit:
                                 break
                 return diseases
             else:
@@ -475,6 +634,8 @@ class DiseaseGeneApp:
                     self.progress['value'] = data
                 elif task_type == 'status':
                     self.status_var.set(data)
+                elif task_type == 'partial':
+                    self.update_results_view(data)
                 elif task_type == 'results':
                     self.show_results(data)
                     self.progress.pack_forget()
@@ -497,105 +658,139 @@ class DiseaseGeneApp:
             self.progress.pack_forget()
 
     def show_results(self, results):
-        # Șterge orice rezultat anterior
-        for widget in self.results_frame.winfo_children():
-            widget.destroy()
-
-        # Scrolleable canvas
-        canvas = tk.Canvas(self.results_frame)
-        scrollbar = ttk.Scrollbar(self.results_frame, orient="vertical", command=canvas.yview)
-        scrollable_frame = ttk.Frame(canvas)
-
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
+        self.update_results_view(results)
+        self.status_var.set(f"Found {len(results)} similar diseases")
+        self.notebook.select(1)
+        self.prefetch_diseases(result['id'] for result in results)
+
+    def prefetch_diseases(self, disease_ids):
+        """Load the top ranked diseases into disease_cache in the background, ahead of a double-click"""
+        top = [disease_id for disease_id in itertools.islice(disease_ids, PREFETCH_TOP_N)
+               if disease_id not in self.disease_cache]
+        get_prefetcher().prefetch_all(
+            (("SimilarDiseases.disease", disease_id), self.prefetch_disease, (disease_id,)) for disease_id in top
         )
 
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-
-        self.status_var.set("Loading drugs for similar diseases...")
-
-        for result in results:
-            disease_id = result['id']
-            disease_name = result['name']
-            score = result['score']
-
-            # Frame pentru boală
-            disease_frame = ttk.LabelFrame(scrollable_frame, text=f"{disease_name} (Similarity: {score:.2f})")
-            disease_frame.pack(fill="x", expand=True, padx=10, pady=5)
-
-            drug_label = ttk.Label(disease_frame, text="Drugs:")
-            drug_label.pack(side="left", padx=(10, 5))
-
-            drug_combo = ttk.Combobox(disease_frame, width=80)
-            drug_combo.pack(side="left", fill="x", expand=True, padx=(0, 10))
+    def prefetch_disease(self, disease_id):
+        """Prefetch worker: fills disease_cache and returns None, so the prefetcher keeps no second copy"""
+        self.fetch_kegg_disease(disease_id)
+
+    def update_results_view(self, results):
+        """Show a (partial or final) top-N list; rows are data, so no widgets are recreated"""
+        was_empty = self.results_tree.row_count() == 0
+        self.results_tree.set_rows([
+            (result['id'], result['name'], f"{result['score']:.2f}", self.drug_summary(result['id']))
+            for result in results
+        ])
+
+        # Switch to the results tab as soon as the first rows arrive
+        if results and was_empty:
+            self.notebook.select(1)
+
+    def drug_summary(self, disease_id):
+        drugs = self.result_drugs.get(disease_id)
+        if drugs is None:
+            return "Loading..."
+        if not drugs:
+            return "No drugs found"
+        return drugs[0] if len(drugs) == 1 else f"{drugs[0]} (+{len(drugs) - 1} more)"
+
+    def load_visible_drugs(self, rows):
+        """Start drug lookups for visible rows that have not been requested yet"""
+        for row in rows:
+            disease_id, disease_name = row[0], row[1]
+            if disease_id in self.result_drugs:
+                continue
+            self.result_drugs[disease_id] = None
 
             # Fetch medicamente pentru fiecare boală (thread separat)
             threading.Thread(
-                target=lambda combo=drug_combo, dname=disease_name, did=disease_id: self.populate_drug_combobox(combo,
-                                                                                                                dname,
-                                                                                                                did),
+                target=self.load_result_drugs,
+                args=(disease_id, disease_name),
                 daemon=True
             ).start()
 
-        self.status_var.set(f"Found {len(results)} similar diseases")
-        self.notebook.select(1)
+    def load_result_drugs(self, disease_id, disease_name):
+        with request_priority(BACKGROUND):
+            drugs = self.fetch_disease_drugs(disease_name, disease_id)
+        self.root.after(0, self.set_result_drugs, disease_id, drugs)
+
+    def set_result_drugs(self, disease_id, drugs):
+        self.result_drugs[disease_id] = drugs
+        for row in self.results_tree.rows():
+            if row[0] == disease_id:
+                self.results_tree.update_row(disease_id, row[:3] + (self.drug_summary(disease_id),))
+                break
+
+        selected = self.results_tree.selected_row()
+        if selected and selected[0] == disease_id:
+            self.populate_drug_combobox()
+
+    def populate_drug_combobox(self):
+        """Show the drugs of the selected result in the combobox"""
+        selected = self.results_tree.selected_row()
+        if not selected:
+            return
 
-    def populate_drug_combobox(self, combobox, disease_name, disease_id):
+        drugs = self.result_drugs.get(selected[0])
+        if drugs is None:
+            values = ["Loading..."]
+        else:
+            values = drugs or ["No drugs found"]
+        self.drug_combo['values'] = values
+        self.drug_combo.set(values[0])
+
+    def fetch_disease_drugs(self, disease_name, disease_id):
         try:
-            url = f"https://www.kegg.jp/kegg-bin/search?from=disease&q={disease_name.replace(' ', '+')}&display=drug&search_gene=1&target=compound%2bdrug%2bdgroup%2bdisease"
-            response = requests.get(url)
+            url = endpoints.kegg_web(f"kegg-bin/search?from=disease&q={disease_name.replace(' ', '+')}&display=drug&search_gene=1&target=compound%2bdrug%2bdgroup%2bdisease")
+            response = http.get(url)
 
             if response.status_code != 200:
-                return
+                return []
 
-            html = response.text
-            soup = BeautifulSoup(html, 'html.parser')
-            drug_table = soup.find("table", class_="list1")
+            return self.parse_drugs_html(response.text, disease_name, disease_id)
 
-            if not drug_table:
-                return
+        except Exception as e:
+            print(f"Error fetching drugs for {disease_name}: {e}")
+            return ["Error fetching"]
 
-            target_disease_ids = [disease_id]
-            if ":" not in disease_id:
-                target_disease_ids.append(f"DS:{disease_id}")
+    @traced("KEGG drug HTML parse", PARSE)
+    def parse_drugs_html(self, html, disease_name, disease_id):
+        """Drugs in a KEGG drug search result page that mention the disease, as "ID - name" strings"""
+        from bs4 import BeautifulSoup  # loaded on first drug lookup, not at startup
 
-            drugs = []
-            rows = drug_table.find_all("tr")[1:]
+        soup = BeautifulSoup(html, 'html.parser')
+        drug_table = soup.find("table", class_="list1")
 
-            for row in rows:
-                try:
-                    cols = row.find_all("td")
-                    if len(cols) < 4:
-                        continue
+        if not drug_table:
+            return []
 
-                    drug_id = cols[0].text.strip()
-                    drug_name = cols[1].text.strip()
-                    diseases_text = cols[3].text.strip()
+        target_disease_ids = [disease_id]
+        if ":" not in disease_id:
+            target_disease_ids.append(f"DS:{disease_id}")
 
-                    matched = any(disease_name.lower() in diseases_text.lower() or t_id in diseases_text for t_id in
-                                  target_disease_ids)
+        drugs = []
+        rows = drug_table.find_all("tr")[1:]
 
-                    if matched:
-                        drugs.append(f"{drug_id} - {drug_name}")
-                except:
+        for row in rows:
+            try:
+                cols = row.find_all("td")
+                if len(cols) < 4:
                     continue
 
-            if drugs:
-                combobox['values'] = drugs
-                combobox.set(drugs[0])
-            else:
-                combobox['values'] = ["No drugs found"]
-                combobox.set("No drugs found")
+                drug_id = cols[0].text.strip()
+                drug_name = cols[1].text.strip()
+                diseases_text = cols[3].text.strip()
 
-        except Exception as e:
-            print(f"Error fetching drugs for {disease_name}: {e}")
-            combobox['values'] = ["Error fetching"]
-            combobox.set("Error fetching")
+                matched = any(disease_name.lower() in diseases_text.lower() or t_id in diseases_text for t_id in
+                              target_disease_ids)
+
+                if matched:
+                    drugs.append(f"{drug_id} - {drug_name}")
+            except:
+                continue
+
+        return drugs
 
     def load_selected_disease(self, event):
         selected = self.results_tree.selection()
@@ -614,6 +809,7 @@ class DiseaseGeneApp:
 
 
 if __name__ == "__main__":
+    mark_interactive()
     root = tk.Tk()
     app = DiseaseGeneApp(root)
     root.mainloop()
\ No newline at end of file
@@ -1,4 +1,9 @@
+import os
 import sys
+
+# Shared modules live under src/common; make the repo root importable when running from this folder
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QLabel, QPushButton, QTextEdit,
     QVBoxLayout, QWidget
@@ -1,8 +1,145 @@
+import json
 import logging
+import os
+import time
+import uuid
+from typing import Dict, Iterable, Optional
 
 import pandas as pd
 
+# Score table columns in output order; gene IDs are Entrez IDs (int32), scores float32
+SCORE_COLUMNS = ["gene_id", "total_score", "relation_score", "similarity_score", "correlation", "propagation_score"]
+RUN_METADATA_KEY = b"genert.run"
+
 
 def export_to_csv(df: pd.DataFrame, filename: str):
     df.to_csv(filename, index=False)
-    logging.info(f"Exported to {filename}")
\ No newline at end of file
+    logging.info(f"Exported to {filename}")
+
+
+def score_schema():
+    """Arrow schema of a score table: one row per gene, plus the run it came from"""
+    import pyarrow as pa  # Only needed when writing or reading Parquet
+
+    return pa.schema([
+        pa.field("gene_id", pa.int32(), nullable=False),
+        pa.field("total_score", pa.float32()),
+        pa.field("relation_score", pa.float32()),
+        pa.field("similarity_score", pa.float32()),
+        pa.field("correlation", pa.float32()),
+        pa.field("propagation_score", pa.float32()),
+        pa.field("query_gene_id", pa.int32(), nullable=False),
+        pa.field("run_id", pa.dictionary(pa.int32(), pa.string())),
+        pa.field("created_at", pa.timestamp("ms", tz="UTC")),
+    ])
+
+
+def run_metadata(query_gene: str, query_gene_id, pathways: Iterable[str] = (),
+                 started_at: Optional[float] = None, finished_at: Optional[float] = None,
+                 run_id: Optional[str] = None) -> Dict:
+    """Run description stored with the table (query gene, analysed pathways, timestamps)"""
+    finished_at = time.time() if finished_at is None else finished_at
+    return {
+        "run_id": run_id or uuid.uuid4().hex[:12],
+        "query_gene": query_gene,
+        "query_gene_id": int(query_gene_id),
+        "pathways": list(pathways),
+        "started_at": finished_at if started_at is None else started_at,
+        "finished_at": finished_at,
+    }
+
+
+def to_score_table(df: pd.DataFrame, run: Dict):
+    """Typed Arrow table from a process_gene result; rows without a numeric gene ID are dropped"""
+    import pyarrow as pa
+
+    gene_ids = pd.to_numeric(df["gene_id"], errors="coerce")
+    valid = gene_ids.notna()
+    if not valid.all():
+        logging.warning(f"Dropping {int((~valid).sum())} rows without a numeric gene_id")
+
+    n = int(valid.sum())
+    columns = {"gene_id": gene_ids[valid].astype("int32").to_numpy()}
+    for column in SCORE_COLUMNS[1:]:
+        values = df[column][valid] if column in df.columns else pd.Series(0.0, index=df.index[valid])
+        columns[column] = pd.to_numeric(values, errors="coerce").fillna(0).astype("float32").to_numpy()
+    columns["query_gene_id"] = pa.array([run["query_gene_id"]] * n, pa.int32())
+    columns["run_id"] = pa.DictionaryArray.from_arrays(pa.array([0] * n, pa.int32()), pa.array([run["run_id"]]))
+    columns["created_at"] = pa.array([int(run["finished_at"] * 1000)] * n, pa.timestamp("ms", tz="UTC"))
+
+    schema = score_schema().with_metadata({RUN_METADATA_KEY: json.dumps(run).encode("utf-8")})
+    return pa.Table.from_pydict(columns, schema=schema)
+
+
+def export_to_parquet(df: pd.DataFrame, filename: str, run: Dict):
+    import pyarrow.parquet as pq
+
+    pq.write_table(to_score_table(df, run), filename, compression="zstd")
+    logging.info(f"Exported to {filename}")
+
+
+def append_to_dataset(df: pd.DataFrame, root: str, run: Dict) -> str:
+    """
+    Add one run to a Parquet dataset partitioned by query gene
+    (root/query_gene_id=672/<run_id>.parquet). Runs never overwrite each
+    other, so batch jobs can append from several processes.
+    """
+    import pyarrow.parquet as pq
+
+    partition = os.path.join(root, f"query_gene_id={run['query_gene_id']}")
+    os.makedirs(partition, exist_ok=True)
+    path = os.path.join(partition, f"{run['run_id']}.parquet")
+    tmp_path = os.path.join(partition, f".{run['run_id']}.parquet.tmp")  # dot files are skipped by readers
+    pq.write_table(to_score_table(df, run), tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+    logging.info(f"Appended run {run['run_id']} to {root}")
+    return path
+
+
+def components_schema(relation_columns: Iterable[str] = ()):
+    """Arrow schema of the per-gene score components kept next to a run's scores"""
+    import pyarrow as pa
+
+    return pa.schema([
+        pa.field("gene_id", pa.int32(), nullable=False),
+        pa.field("pathway_count", pa.int16()),
+        pa.field("similarity_score", pa.float32()),
+        pa.field("correlation", pa.float32()),
+        pa.field("propagation_score", pa.float32()),
+    ] + [pa.field(column, pa.int32()) for column in relation_columns])
+
+
+def export_components(components: pd.DataFrame, filename: str):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = components_schema([c for c in components.columns if c.startswith("relations:")])
+    table = pa.Table.from_pandas(components[schema.names], schema=schema, preserve_index=False)
+    pq.write_table(table, filename, compression="zstd")
+
+
+def read_scores(path: str, query_gene_id=None, columns=None) -> pd.DataFrame:
+    """
+    Load a score table from a Parquet file, a partitioned dataset directory or
+    a CSV file. For datasets, `query_gene_id` reads only that gene's partition.
+    """
+    if path.endswith(".csv"):
+        return pd.read_csv(path, usecols=columns)
+
+    import pyarrow.dataset as ds
+
+    if os.path.isdir(path):
+        dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    else:
+        dataset = ds.dataset(path, format="parquet")
+    row_filter = None if query_gene_id is None else ds.field("query_gene_id") == int(query_gene_id)
+    return dataset.to_table(columns=columns, filter=row_filter).to_pandas()
+
+
+def read_run_metadata(path: str) -> Optional[Dict]:
+    """Run description of a single Parquet file written by export_to_parquet / append_to_dataset"""
+    import pyarrow.parquet as pq
+
+    metadata = pq.read_schema(path).metadata or {}
+    raw = metadata.get(RUN_METADATA_KEY)
+    return json.loads(raw) if raw else None
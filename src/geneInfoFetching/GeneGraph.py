@@ -1,17 +1,37 @@
 import sys
 import os
-import requests
+import shutil
+import tempfile
+
+# Shared modules live under src/common; make the repo root importable when running from this folder
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
 from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEnginePage
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout,
                              QWidget, QComboBox, QPushButton, QHBoxLayout,
                              QLabel, QMessageBox, QTableWidget, QTableWidgetItem,
-                             QSplitter, QFrame, QHeaderView)
-from PyQt5.QtCore import QUrl, Qt, QObject, pyqtSlot, pyqtSignal
+                             QSplitter, QFrame, QHeaderView, QSlider)
+from PyQt5.QtCore import QUrl, Qt, QObject, QTimer, pyqtSlot, pyqtSignal
 from PyQt5.QtWebChannel import QWebChannel
 from pyvis.network import Network
 import pandas as pd
 import networkx as nx
 
+import CSV_export
+import ids
+import Score
+import gene_paths
+import interactome
+from src.common import endpoints, http
+from src.common.prefetch import get_prefetcher
+from src.common.results_registry import get_results_registry
+from src.common.scheduler import mark_interactive
+from src.common.singleflight import single_flight
+from src.common.tracing import PARSE, traced
+
+# Top-scoring genes of a network whose KEGG entries are fetched ahead of a node click
+PREFETCH_TOP_N = 5
+
 
 class GeneDrugTargetFinder:
     def __init__(self, gene_symbol="EGFR"):
@@ -25,7 +45,8 @@ class GeneDrugTargetFinder:
             if not kegg_gene_id.startswith("hsa:"):
                 kegg_gene_id = f"hsa:{self.gene_symbol}"
 
-            kegg_gene_data = self.get_kegg_gene_info(kegg_gene_id)
+            # Prefetched when the network was shown, for its top-scoring genes
+            kegg_gene_data = get_prefetcher().get(("kegg gene", kegg_gene_id), self.get_kegg_gene_info, kegg_gene_id)
 
             # Extract diseases
             diseases = self.extract_diseases(kegg_gene_data)
@@ -39,13 +60,15 @@ class GeneDrugTargetFinder:
             print(f"Error finding gene info: {str(e)}")
             return [], []
 
+    @single_flight(key=lambda self, kegg_id: kegg_id)
     def get_kegg_gene_info(self, kegg_id):
         """Request raw data from KEGG"""
-        kegg_url = f"http://rest.kegg.jp/get/{kegg_id}"
-        response = requests.get(kegg_url)
+        kegg_url = endpoints.kegg_rest(f"get/{kegg_id}")
+        response = http.get(kegg_url)
         response.raise_for_status()
         return self.parse_kegg_response(response.text)
 
+    @traced("KEGG gene flat file parse", PARSE)
     def parse_kegg_response(self, text):
         """Parse flat KEGG file into a dictionary"""
         result = {}
@@ -127,6 +150,8 @@ class GeneNetworkViewer(QMainWindow):
         self.browser.setPage(self.page)
 
         self.gene_dropdown = QComboBox()
+        self.analysis_label = QLabel("Analysis:")
+        self.analysis_dropdown = QComboBox()  # Analyses stored in the results registry
         self.reset_button = QPushButton("Reset View")
         self.central_gene_label = QLabel("Central Gene:")
         self.central_gene_display = QLabel("672")  # Display central gene as label, not editable
@@ -166,12 +191,43 @@ class GeneNetworkViewer(QMainWindow):
         self.info_panel_layout.addWidget(self.disease_label)
         self.info_panel_layout.addWidget(self.disease_table)
 
+        # Relation paths from the central gene over all pathways (needs the interactome)
+        self.path_table = QTableWidget()
+        self.path_table.setColumnCount(3)
+        self.path_table.setHorizontalHeaderLabels(["Steps", "Sign", "Path"])
+        self.path_label = QLabel("Paths from Central Gene")
+        self.path_label.setStyleSheet("font-weight: bold;")
+        self.info_panel_layout.addWidget(self.path_label)
+        self.info_panel_layout.addWidget(self.path_table)
+        self.path_finder = None  # gene_paths.PathFinder, created on the first query
+
         # Initially hide the info panel
         self.info_panel.setVisible(False)
         self.info_panel.setMaximumWidth(400)
 
         # Store dataset
         self.df = None
+        self.registry = get_results_registry()
+        self.entries = []
+        self.loaded_scores = {}  # run directory -> DataFrame, so switching back is instant
+        self.components = None  # Score.ScoreComponents of the shown analysis, for live re-weighting
+
+        # Score weight sliders (0.00 - 3.00); graph redraws are debounced while dragging
+        self.weight_sliders = {}
+        self.weight_labels = {}
+        for name in Score.DEFAULT_SCORE_WEIGHTS:
+            slider = QSlider(Qt.Horizontal)
+            slider.setRange(0, 300)
+            slider.setFixedWidth(120)
+            self.weight_sliders[name] = slider
+            self.weight_labels[name] = QLabel()
+        self.reducer_dropdown = QComboBox()
+        self.reducer_dropdown.addItems(Score.RELATION_REDUCERS)
+        self.rescore_timer = QTimer(self)
+        self.rescore_timer.setSingleShot(True)
+        self.rescore_timer.setInterval(150)
+        # Graph HTML goes to a private directory so several viewers can run at once
+        self.html_dir = tempfile.mkdtemp(prefix="genert-view-")
 
         # Create GeneDrugTargetFinder instance
         self.finder = GeneDrugTargetFinder(self.gene_id)
@@ -205,7 +261,11 @@ class GeneNetworkViewer(QMainWindow):
         # Style the central gene display
         self.central_gene_display.setStyleSheet("font-weight: bold;")
 
+        self.analysis_dropdown.setMinimumWidth(280)
+
         # Add widgets to control panel
+        control_layout.addWidget(self.analysis_label)
+        control_layout.addWidget(self.analysis_dropdown)
         control_layout.addWidget(self.central_gene_label)
         control_layout.addWidget(self.central_gene_display)
         control_layout.addWidget(self.refresh_button)
@@ -213,6 +273,20 @@ class GeneNetworkViewer(QMainWindow):
         control_layout.addWidget(self.reset_button)
         control_panel.setFixedHeight(50)
 
+        weight_panel = QWidget()
+        weight_layout = QHBoxLayout(weight_panel)
+        weight_layout.setContentsMargins(5, 0, 5, 0)
+        weight_layout.addWidget(QLabel("Weights:"))
+        for name, slider in self.weight_sliders.items():
+            weight_layout.addWidget(QLabel(name.replace("_score", "").capitalize()))
+            weight_layout.addWidget(slider)
+            weight_layout.addWidget(self.weight_labels[name])
+        weight_layout.addWidget(QLabel("Relations:"))
+        weight_layout.addWidget(self.reducer_dropdown)
+        weight_layout.addStretch()
+        weight_panel.setFixedHeight(36)
+        self.set_weights(Score.DEFAULT_SCORE_WEIGHTS)
+
         # Create a splitter for main content and info panel
         self.splitter = QSplitter(Qt.Horizontal)
         self.splitter.addWidget(self.browser)
@@ -224,6 +298,7 @@ class GeneNetworkViewer(QMainWindow):
         main_layout = QVBoxLayout(central_widget)
         main_layout.setContentsMargins(0, 0, 0, 0)
         main_layout.addWidget(control_panel)
+        main_layout.addWidget(weight_panel)
         main_layout.addWidget(self.splitter)
 
         self.setCentralWidget(central_widget)
@@ -231,42 +306,138 @@ class GeneNetworkViewer(QMainWindow):
         # Connect signals
         self.reset_button.clicked.connect(self.reset_view)
         self.gene_dropdown.currentTextChanged.connect(self.highlight_gene)
+        self.analysis_dropdown.currentIndexChanged.connect(self.select_analysis)
+        for slider in self.weight_sliders.values():
+            slider.valueChanged.connect(self.on_weight_changed)
+        self.reducer_dropdown.currentTextChanged.connect(self.on_weight_changed)
+        self.rescore_timer.timeout.connect(self.apply_weights)
         self.refresh_button.clicked.connect(self.refresh_graph)
 
         # Set up table properties
-        for table in [self.drug_table, self.disease_table]:
+        for table in [self.drug_table, self.disease_table, self.path_table]:
             table.setSelectionBehavior(QTableWidget.SelectRows)
             table.setEditTriggers(QTableWidget.NoEditTriggers)
             table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
 
     def load_data(self):
-        """Load and prepare gene data"""
+        """List the stored analyses and load the newest one"""
         try:
-            self.df = pd.read_csv("top_20_genes_by_pathway.csv")
-            self.df['gene_id'] = self.df['gene_id'].astype(str)
-
-            # Populate dropdown
-            self.gene_dropdown.clear()
-            self.gene_dropdown.addItem("All Genes")
-            for _, row in self.df.iterrows():
-                self.gene_dropdown.addItem(f"hsa:{row['gene_id']}")
+            self.entries = self.registry.entries()
+            self.analysis_dropdown.blockSignals(True)
+            self.analysis_dropdown.clear()
+            for entry in self.entries:
+                self.analysis_dropdown.addItem(entry.label())
+            self.analysis_dropdown.blockSignals(False)
+
+            if self.entries:
+                self.show_entry(self.entries[0])
+            elif os.path.exists("top_20_genes_by_pathway.csv"):
+                # Output of older versions, written to the working directory
+                self.show_scores(pd.read_csv("top_20_genes_by_pathway.csv"), self.central_gene_display.text())
+            else:
+                self.show_error("No analyses found, run an analysis first")
 
         except Exception as e:
             self.show_error(f"Error loading data: {str(e)}")
 
+    def entry_scores(self, entry):
+        if entry.path not in self.loaded_scores:
+            self.loaded_scores[entry.path] = self.registry.load_scores(entry).reindex(
+                columns=CSV_export.SCORE_COLUMNS, fill_value=0.0)  # older runs lack later score columns
+        return self.loaded_scores[entry.path]
+
+    def show_entry(self, entry):
+        """Show a stored analysis with the weights it was computed with"""
+        components = self.registry.load_components(entry)
+        self.components = Score.ScoreComponents(components) if components is not None else None
+        for control in list(self.weight_sliders.values()) + [self.reducer_dropdown]:
+            control.setEnabled(self.components is not None)
+        self.set_weights(dict(entry.params.get("weights") or Score.DEFAULT_SCORE_WEIGHTS),
+                         entry.params.get("relation_reducer", Score.DEFAULT_RELATION_REDUCER))
+        self.show_scores(self.entry_scores(entry), entry.gene_id)
+
+    def set_weights(self, weights, reducer=Score.DEFAULT_RELATION_REDUCER):
+        self.reducer_dropdown.blockSignals(True)
+        self.reducer_dropdown.setCurrentText(reducer)
+        self.reducer_dropdown.blockSignals(False)
+        for name, slider in self.weight_sliders.items():
+            slider.blockSignals(True)
+            slider.setValue(round(weights.get(name, 0.0) * 100))
+            slider.blockSignals(False)
+            self.weight_labels[name].setText(f"{slider.value() / 100:.2f}")
+
+    def current_weights(self):
+        return {name: slider.value() / 100 for name, slider in self.weight_sliders.items()}
+
+    def on_weight_changed(self):
+        for name, slider in self.weight_sliders.items():
+            self.weight_labels[name].setText(f"{slider.value() / 100:.2f}")
+        self.rescore_timer.start()
+
+    def apply_weights(self):
+        """Rescore the cached components with the slider weights and redraw, without rerunning the pipeline"""
+        if self.components is None:
+            return
+        scores = self.components.score(self.current_weights(), reducer=self.reducer_dropdown.currentText())
+        self.show_scores(scores, self.central_gene_display.text())
+        self.init_network_graph()
+
+    def show_scores(self, df, central_gene):
+        self.df = df.copy()
+        self.df['gene_id'] = ids.gene_ids(self.df['gene_id'])
+        self.central_gene_display.setText(str(central_gene))
+
+        # Populate dropdown
+        self.gene_dropdown.blockSignals(True)
+        self.gene_dropdown.clear()
+        self.gene_dropdown.addItem("All Genes")
+        self.gene_dropdown.addItems([f"hsa:{gene_id}" for gene_id in self.df['gene_id'].tolist()])
+        self.gene_dropdown.blockSignals(False)
+        self.prefetch_gene_info()
+
+    def prefetch_gene_info(self):
+        """Fetch the KEGG entries of the top-scoring genes in the background, ahead of a node click"""
+        top = self.df.nlargest(PREFETCH_TOP_N, 'total_score')['gene_id'].tolist()
+        get_prefetcher().prefetch_all(
+            (("kegg gene", f"hsa:{gene_id}"), self.finder.get_kegg_gene_info, (f"hsa:{gene_id}",)) for gene_id in top
+        )
+
+    def select_analysis(self, index):
+        """Switch to another stored analysis without recomputing it"""
+        if not 0 <= index < len(self.entries):
+            return
+        entry = self.entries[index]
+        try:
+            self.show_entry(entry)
+        except Exception as e:
+            self.show_error(f"Error loading analysis: {str(e)}")
+            return
+        self.info_panel.setVisible(False)
+
+        graph_file = self.graph_file()
+        if os.path.exists(graph_file):
+            self.browser.load(QUrl.fromLocalFile(graph_file))
+        else:
+            self.init_network_graph()
+
+    def graph_file(self):
+        """Rendered graph of the current gene and weights, so switching back to it needs no redraw"""
+        weights = "_".join([str(slider.value()) for slider in self.weight_sliders.values()] + [self.reducer_dropdown.currentText()])
+        return os.path.join(self.html_dir, f"network_{self.central_gene_display.text()}_{weights}.html")
+
     def init_network_graph(self):
         try:
             if self.df is None:
                 self.show_error("No data loaded")
                 return
 
-            central_gene = self.central_gene_display.text()
+            central_gene = int(self.central_gene_display.text())
 
             # Dacă gene_id-ul central lipsește, îl adăugăm
             if central_gene not in self.df['gene_id'].values:
                 print(f"Adding central gene {central_gene}")
                 self.df = pd.concat([self.df, pd.DataFrame({
-                    'gene_id': [central_gene],
+                    'gene_id': ids.gene_ids([central_gene]),
                     'total_score': [self.df['total_score'].mean()],
                     'similarity_score': [1.0]
                 })], ignore_index=True)
@@ -279,8 +450,9 @@ class GeneNetworkViewer(QMainWindow):
             G = nx.Graph()
 
             for _, row in self.df.iterrows():
-                gene_id = row['gene_id']
-                is_central = gene_id == central_gene
+                # Node IDs stay strings: the click and highlight scripts compare them to the displayed text
+                gene_id = str(int(row['gene_id']))
+                is_central = int(row['gene_id']) == central_gene
 
                 node_size = 30 if is_central else 10 + (row['total_score'] * 20)
                 node_color = "#E91E63" if is_central else "#4CAF50"
@@ -302,7 +474,7 @@ class GeneNetworkViewer(QMainWindow):
                     distance = 400 - (normalized_similarity * 300)
 
                     G.add_edge(
-                        central_gene,
+                        str(central_gene),
                         gene_id,
                         title=f"Similarity: {row['similarity_score']:.3f}",
                         color=self.get_edge_color(row['similarity_score']),
@@ -344,11 +516,11 @@ class GeneNetworkViewer(QMainWindow):
                 }
             }""")
 
-            fixed_file = "gene_network_display.html"
-            net.write_html(fixed_file, open_browser=False)
-            self.fix_tooltip_display(fixed_file)
-            self.add_node_click_handler(fixed_file)
-            self.browser.load(QUrl.fromLocalFile(os.path.abspath(fixed_file)))
+            graph_file = self.graph_file()
+            net.write_html(graph_file, open_browser=False)
+            self.fix_tooltip_display(graph_file)
+            self.add_node_click_handler(graph_file)
+            self.browser.load(QUrl.fromLocalFile(graph_file))
 
         except Exception as e:
             print(f"Error creating graph: {str(e)}")
@@ -597,6 +769,7 @@ class GeneNetworkViewer(QMainWindow):
 
         # Display gene info in the panel
         self.display_gene_info(gene_id)
+        self.display_paths(gene_id)
 
     def get_edge_color(self, similarity):
         """Generate color for edge based on similarity score"""
@@ -775,6 +948,42 @@ class GeneNetworkViewer(QMainWindow):
             self.status_label.setText(f"Error: {str(e)}")
             self.status_label.setStyleSheet("color: red; font-style: italic;")
 
+    def display_paths(self, gene_id):
+        """List the shortest relation paths from the central gene to the selected gene"""
+        self.path_table.clearSpans()
+        self.path_table.setRowCount(0)
+        central_gene = self.central_gene_display.text()
+        if not str(gene_id).isdigit() or str(gene_id) == central_gene:
+            return
+        try:
+            if self.path_finder is None:
+                graph = interactome.built_interactome()
+                if graph is None:
+                    self.path_label.setText("Paths from Central Gene (build the interactome first)")
+                    return
+                self.path_finder = gene_paths.PathFinder(graph)
+            paths = self.path_finder.k_shortest_paths(central_gene, gene_id, k=5)
+        except Exception as e:
+            print(f"Error finding paths: {str(e)}")
+            return
+
+        self.path_label.setText(f"Paths from Central Gene (hsa:{central_gene} to hsa:{gene_id})")
+        if not paths:
+            self.path_table.setRowCount(1)
+            self.path_table.setSpan(0, 0, 1, 3)
+            self.path_table.setItem(0, 0, QTableWidgetItem("No relation path between these genes"))
+            return
+        signs = {1: "+", -1: "-", 0: "?"}
+        self.path_table.setRowCount(len(paths))
+        for i, path in enumerate(paths):
+            self.path_table.setItem(i, 0, QTableWidgetItem(str(path.hops)))
+            self.path_table.setItem(i, 1, QTableWidgetItem(signs[path.sign]))
+            item = QTableWidgetItem(path.describe())
+            item.setToolTip("\n".join(f"{step.source} -> {step.target}: {', '.join(step.pathways) or 'no pathway recorded'}"
+                                       for step in path.steps))
+            self.path_table.setItem(i, 2, item)
+        self.path_table.resizeColumnsToContents()
+
     def refresh_graph(self):
         """Refresh the graph with current settings"""
         self.init_network_graph()
@@ -787,7 +996,7 @@ class GeneNetworkViewer(QMainWindow):
         var edges = network.body.data.edges;
 
         // Get central gene
-        var centralId = "672";  // Assuming this is your central gene ID
+        var centralId = "__CENTRAL_GENE__";
 
         // Reset all nodes
         nodes.update(
@@ -824,7 +1033,7 @@ class GeneNetworkViewer(QMainWindow):
                 easingFunction: "easeInOutQuad"
             }
         });
-        """
+        """.replace("__CENTRAL_GENE__", self.central_gene_display.text())
         self.browser.page().runJavaScript(js)
         self.gene_dropdown.setCurrentIndex(0)
 
@@ -852,8 +1061,7 @@ class GeneNetworkViewer(QMainWindow):
     def closeEvent(self, event):
         """Clean up HTML files on close"""
         try:
-            if os.path.exists("gene_network_display.html"):
-                os.remove("gene_network_display.html")
+            shutil.rmtree(self.html_dir, ignore_errors=True)
 
         except Exception as e:
             print(f"Error removing files: {str(e)}")
@@ -861,6 +1069,7 @@ class GeneNetworkViewer(QMainWindow):
 
 
 if __name__ == "__main__":
+    mark_interactive()
     app = QApplication(sys.argv)
     window = GeneNetworkViewer()
     window.show()
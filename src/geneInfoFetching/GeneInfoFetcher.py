@@ -5,9 +5,9 @@ from tkinter import messagebox
 from tkinter.font import Font
 import webbrowser
 
-import webview
+from src.common import endpoints, http
+from src.common.tracing import PARSE, traced
 
-from src.geneInfoFetching.GeneGraph import GeneNetworkViewer
 
 class GeneInfoApp:
     def __init__(self, root):
@@ -33,8 +33,19 @@ class GeneInfoApp:
         self.gene_entry = tk.Entry(search_frame, width=30, font=self.normal_font, bg="white")
         self.gene_entry.pack(side=tk.LEFT, padx=10)
         self.gene_entry.bind('<Return>', lambda event: self.fetch_gene_info())
+        self.gene_entry.bind('<KeyRelease>', self.schedule_autocomplete)
+        self.gene_entry.bind('<Down>', self.focus_suggestions)
+        self.gene_entry.bind('<Escape>', lambda event: self.hide_suggestions())
         self.gene_entry.focus_set()
 
+        # Autocomplete drop-down, placed under the entry while there is something to show
+        self.suggestion_box = tk.Listbox(self.root, height=8, font=self.normal_font, bg="white", activestyle="dotbox")
+        self.suggestion_box.bind('<Return>', self.on_suggestion_chosen)
+        self.suggestion_box.bind('<Double-Button-1>', self.on_suggestion_chosen)
+        self.suggestion_box.bind('<Escape>', lambda event: self.hide_suggestions(focus_entry=True))
+        self.autocomplete_job = None
+        self.warm_up_spell_checker()
+
         search_btn = tk.Button(search_frame, text="Search", command=self.fetch_gene_info)
         search_btn.pack(side=tk.LEFT)
 
@@ -56,11 +67,106 @@ class GeneInfoApp:
         self.canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
 
+    def warm_up_spell_checker(self):
+        try:
+            import spell_checker
+        except ImportError as e:
+            print(f"Spell checker unavailable, gene names are sent to NCBI as typed: {e}")
+            return
+        spell_checker.warm_up_gene_indexes()
+
+    def schedule_autocomplete(self, event):
+        if event.keysym in ("Return", "Escape", "Down", "Up"):
+            return
+        if self.autocomplete_job:
+            self.root.after_cancel(self.autocomplete_job)
+        self.autocomplete_job = self.root.after(100, self.update_autocomplete)
+
+    def update_autocomplete(self):
+        self.autocomplete_job = None
+        try:
+            import spell_checker
+            matches = spell_checker.complete_gene_name(self.gene_entry.get(), limit=8)
+        except ImportError:
+            matches = []
+
+        if not matches or matches == [self.gene_entry.get().strip().upper()]:
+            self.hide_suggestions()
+            return
+
+        self.suggestion_box.delete(0, tk.END)
+        for symbol in matches:
+            self.suggestion_box.insert(tk.END, symbol)
+        self.suggestion_box.configure(height=len(matches))
+        self.suggestion_box.place(in_=self.gene_entry, relx=0, rely=1, relwidth=1)
+        self.suggestion_box.lift()
+
+    def hide_suggestions(self, focus_entry=False):
+        self.suggestion_box.place_forget()
+        if focus_entry:
+            self.gene_entry.focus_set()
+
+    def focus_suggestions(self, event):
+        if self.suggestion_box.winfo_ismapped():
+            self.suggestion_box.focus_set()
+            self.suggestion_box.selection_clear(0, tk.END)
+            self.suggestion_box.selection_set(0)
+            self.suggestion_box.activate(0)
+        return "break"
+
+    def on_suggestion_chosen(self, event):
+        selection = self.suggestion_box.curselection()
+        if not selection:
+            return
+        self.gene_entry.delete(0, tk.END)
+        self.gene_entry.insert(0, self.suggestion_box.get(selection[0]))
+        self.hide_suggestions(focus_entry=True)
+        self.fetch_gene_info()
+
+    def resolve_gene_name(self, gene_name):
+        """
+        Check the symbol against the local gene list before querying NCBI.
+
+        Returns the symbol to search for, or None when the user cancels. Names
+        that are not in the list are still searched on request, since NCBI also
+        matches aliases the list does not contain.
+        """
+        try:
+            import spell_checker
+        except ImportError:
+            return gene_name
+
+        suggestion, known = spell_checker.validate_gene_name(gene_name)
+        if known:
+            return gene_name
+
+        if suggestion:
+            answer = messagebox.askyesnocancel(
+                "Did you mean?",
+                f"'{gene_name}' is not a known human gene symbol.\n\nDid you mean {suggestion}?"
+            )
+            if answer is None:
+                return None
+            if answer:
+                self.gene_entry.delete(0, tk.END)
+                self.gene_entry.insert(0, suggestion)
+                return suggestion
+            return gene_name
+
+        if messagebox.askyesno("Unknown gene", f"'{gene_name}' is not in the local gene list.\n\nSearch NCBI anyway?"):
+            return gene_name
+        return None
+
     def fetch_gene_info(self):
         gene_name = self.gene_entry.get().strip().upper()
         if not gene_name:
             return
 
+        self.hide_suggestions()
+        gene_name = self.resolve_gene_name(gene_name)
+        if not gene_name:
+            return
+
         for widget in self.scrollable_frame.winfo_children():
             widget.destroy()
 
@@ -83,7 +189,7 @@ class GeneInfoApp:
             gene_symbol = gene_data.get("name", gene_name)
             kegg_gene_id = f"hsa:{gene_symbol}"
 
-            kegg_url = f"http://rest.kegg.jp/get/{kegg_gene_id}"
+            kegg_url = endpoints.kegg_rest(f"get/{kegg_gene_id}")
             kegg_response = self.send_get_request(kegg_url)
 
             kegg_data = self.parse_kegg_response(kegg_response)
@@ -147,10 +253,11 @@ class GeneInfoApp:
         return section
 
     def send_get_request(self, url_string):
-        response = requests.get(url_string)
+        response = http.get(url_string)
         response.raise_for_status()
         return response.text
 
+    @traced("KEGG gene flat file parse", PARSE)
     def parse_kegg_response(self, text):
         result = {}
         current_section = None
@@ -212,7 +319,7 @@ class GeneInfoApp:
             }
         }
 
-        response = requests.post(url, json=query)
+        response = http.post(url, json=query)
         if response.status_code == 200:
             data = response.json()
             try:
@@ -222,6 +329,8 @@ class GeneInfoApp:
         return "N/A"
 
     def show_embedded_structure(self, pdb_code):
+        import webview  # heavy GUI backend, only needed when a structure is opened
+
         url = f"https://www.rcsb.org/3d-view/{pdb_code}"
         webview.create_window(f"3D Structure Viewer: {pdb_code}", url, width=900, height=700)
         webview.start()
@@ -1,104 +1,212 @@
 import logging
+import os
+import sys
+import time
+
+# Shared modules live under src/common; make the repo root importable when running from this folder
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
 from ph import *
 import pandas as pd
 import parser
 import pathway
 import Score
+import interactome
+import propagation
+import kgml_parallel
 import CSV_export
-from co_expressed_genes import scrape_archs4_coexpressed_genes, transform
+import ids
+import spell_checker
+from src.common import http
+from src.common.results_registry import AnalysisParams, get_results_registry
+from src.common.task_graph import TaskGraph
+from src.common.tracing import SCORE, span, trace_run
+from co_expressed_genes import fetch_coexpressed_gene_ids
+
+
+def process_gene(gene_name, use_similarity_index=True, dataset_dir=None, max_pathways=3, coexp_top_n=10,
+                 weights=None, use_cache=True, output_path=None, relation_reducer=Score.DEFAULT_RELATION_REDUCER,
+                 use_interactome=True, propagation_top_n=20, parse_workers=None):
+    """
+    Score genes related to `gene_name`, one row per gene; its KGML relations
+    are combined into relation_score with `relation_reducer` (see
+    Score.RELATION_REDUCERS). Results are kept in the results registry under
+    the gene and parameters, and a cached run is returned unless `use_cache`
+    is False. `output_path` (.csv or .parquet) also writes the table there;
+    with `dataset_dir` the run is appended to that Parquet dataset.
+    When the interactome has been built (interactome.py), relations come from
+    all human pathways instead of the first `max_pathways` KGMLs, every gene
+    gets a propagation_score from a random walk started at the query gene, and
+    the `propagation_top_n` best genes of that walk join the candidates.
+    With `parse_workers` > 1, KGMLs are parsed in that many processes
+    (kgml_parallel), worth it when `max_pathways` covers large maps.
+    """
+    with trace_run("process_gene", gene=gene_name), TaskGraph(max_workers=4) as stages:
+        started_at = time.time()
+        try:
+            # Independent stages run side by side: the symbol -> ID lookup and the local indexes; the
+            # gene's pathway list follows as soon as the ID is known. A cached run returns without
+            # waiting for the others.
+            stages.add("gene_id", lambda: get_gene_id_from_name(gene_name))
+            stages.add("interactome", lambda: interactome.built_interactome() if use_interactome else None)
+            stages.add("similarity_index", lambda: load_similarity_index() if use_similarity_index else None)
+            stages.add("pathways", lambda gene_id: Logic.fetch_pathways_for_gene(gene_id) if gene_id else [], "gene_id")
+
+            gene_id = stages.result("gene_id")
+            if not gene_id:
+                raise ValueError(f"Could not find ID for gene: {gene_name}")
+
+            weights = dict(Score.DEFAULT_SCORE_WEIGHTS if weights is None else weights)
+            graph = stages.result("interactome")
+            if graph is not None and gene_id not in graph:
+                graph = None
+            relation_source = "interactome" if graph is not None else "pathways"
+            params = AnalysisParams.create(gene_id, max_pathways, coexp_top_n, weights, relation_reducer, relation_source,
+                                           propagation_top_n if graph is not None else 0)
+            registry = get_results_registry()
+            cached = registry.latest(params) if use_cache else None
+            if cached is not None:
+                print(f"Using cached analysis of {gene_name} from {cached.path}")
+                df_cached = registry.load_scores(cached).reindex(columns=CSV_export.SCORE_COLUMNS, fill_value=0.0)
+                return df_cached.astype({"gene_id": ids.GENE_ID_DTYPE}), gene_id
+
+            # The ARCHS4 scrape starts headless Chrome, so it only runs once the gene resolved and no
+            # cached run exists; it scrapes the symbol the ID was resolved from, which is gene_name
+            # (get_gene_id_from_name never substitutes another symbol)
+            stages.add("coexpressed", lambda: fetch_coexpressed_gene_ids(gene_name, top_n=coexp_top_n))
+
+            gene_pathway_counts = ids.empty_memberships()
+            accumulated_results_df = ids.empty_relations()
+
+            gene_kegg_id = f"hsa:{gene_id}"
+            print(f"Analyzing gene {gene_kegg_id}")
+
+            pathways = stages.result("pathways")
+            print(f"Found {len(pathways)} pathways")
+
+            # Each KGML is parsed as soon as it arrives while the next ones download. With the
+            # interactome, relations come from it, so only the gene-pathway memberships are parsed
+            parse_relations = graph is None
+            parsed = []
+            if parse_workers and parse_workers > 1:
+                with kgml_parallel.KGMLParsePool(parse_workers) as parsers:
+                    futures = [(pathway_id, parsers.submit(kgml, parse_relations))
+                               for pathway_id, kgml in Logic.iter_kgmls(pathways, max_pathways)]
+                    arrays = [(pathway_id, future.result()) for pathway_id, future in futures]
+                accumulated_results_df, gene_pathway_counts = kgml_parallel.gene_frames(arrays, gene_id)
+                parsed = [pathway_id for pathway_id, _ in arrays]
+            else:
+                for pathway_id, kgml in Logic.iter_kgmls(pathways, max_pathways):
+                    accumulated_results_df, gene_pathway_counts = pathway.process_pathway(
+                        kgml, gene_id, gene_pathway_counts, accumulated_results_df, pathway_id, parse_relations
+                    )
+                    parsed.append(pathway_id)
+            print(f"Retrieved {len(parsed)} KGML files")
+
+            if graph is not None:
+                # Direct neighbours over every human pathway, read from the memory-mapped interactome
+                accumulated_results_df = graph.relation_rows(gene_id)
+
+            print("Physical similarities")
+            print(accumulated_results_df)
+
+            # Get top 20 genes by pathway frequency (excluding candidate gene)
+            with span("top genes by pathway count", SCORE):
+                top_20 = (
+                    gene_pathway_counts.groupby("gene_id")["pathway"]
+                    .nunique()
+                    .reset_index(name="pathway_count")
+                    .sort_values(by="pathway_count", ascending=False)
+                    .head(20)
+                )
+                top_20 = top_20[top_20["gene_id"] != int(gene_id)]  # skip candidate gene
+
+            # Compute similarity scores (pathway sets come from the local MinHash index when available)
+            top_20 = pathway.compute_similarity_scores(top_20, pathways, stages.result("similarity_index"))
+
+            logging.info("\nFetching co-expression genes from ARCHS4...")
+            df_coexp = stages.result("coexpressed")
+
+            propagated = None
+            if graph is not None:
+                # Scores for every candidate, plus the genes the walk reaches best beyond the direct neighbours
+                candidates = set()
+                for frame in (top_20, accumulated_results_df, df_coexp):
+                    if "gene_id" in frame.columns:
+                        candidates.update(Score.gene_ids_as_int(frame)["gene_id"].tolist())
+                candidates.discard(int(gene_id))
+                propagated = propagation.Propagator(graph).scores([gene_id], genes=candidates, top_n=propagation_top_n)
+
+            with span("merge and total score", SCORE):
+                # One row per gene: relations are counted per type before the merges, and the
+                # raw components are kept with the run so weights can change without recomputing
+                components = Score.build_components(top_20, accumulated_results_df, df_coexp, propagated)
+                df_final = Score.ScoreComponents(components).score(weights, reducer=relation_reducer)
+
+            logging.info("Final result:")
+            print(df_final)
+
+            run = CSV_export.run_metadata(gene_name, gene_id, parsed, started_at)
+            entry = registry.store(params, gene_name, lambda directory: write_scores(df_final, directory, run, components),
+                                   metadata=run, run_id=run["run_id"])
+            logging.info(f"Stored analysis in {entry.path}")
+
+            if output_path:
+                if output_path.endswith(".parquet"):
+                    CSV_export.export_to_parquet(df_final, output_path, run)
+                else:
+                    CSV_export.export_to_csv(df_final, output_path)
+            if dataset_dir:
+                CSV_export.append_to_dataset(df_final, dataset_dir, run)
+
+            return df_final, gene_id
+
+        except Exception as e:
+            import traceback
+            print("An error occurred:")
+            print(traceback.format_exc())
+            raise
+
+
+def load_similarity_index():
+    """The local MinHash index of gene pathway sets, or None to fetch pathways per gene instead"""
+    try:
+        return pathway.load_gene_pathway_index()
+    except Exception as e:
+        print(f"Similarity index unavailable, fetching pathways per gene: {e}")
+        return None
 
 
-def process_gene(gene_name):
+def write_scores(df, directory, run, components=None):
+    """Write a registry run's score table (and raw score components), as Parquet unless pyarrow is missing"""
     try:
-        # Get gene ID from name (you'll need to implement this)
-        gene_id = get_gene_id_from_name(gene_name)
-        if not gene_id:
-            raise ValueError(f"Could not find ID for gene: {gene_name}")
-
-        gene_pathway_counts = pd.DataFrame(columns=["gene_id", "pathway"])
-        accumulated_results_df = pd.DataFrame()
-
-        gene_kegg_id = f"hsa:{gene_id}"
-        print(f"Analyzing gene {gene_kegg_id}")
-
-        pathways = Logic.fetch_pathways_for_gene(gene_id)
-        print(f"Found {len(pathways)} pathways")
-
-        kgmls = Logic.fetch_first_kgmls(pathways, 3)
-        print(f"Retrieved {len(kgmls)} KGML files")
-
-        # Process each pathway KGML
-        for i, kgml in enumerate(kgmls):
-            accumulated_results_df, gene_pathway_counts = pathway.process_pathway(
-                kgml, gene_id, gene_pathway_counts, accumulated_results_df, pathways[i]
-            )
-
-        print("Physical similarities")
-        print(accumulated_results_df)
-
-        Score.mappingScore(accumulated_results_df)
-
-        # Get top 20 genes by pathway frequency (excluding candidate gene)
-        top_20 = (
-            gene_pathway_counts.groupby("gene_id")["pathway"]
-            .nunique()
-            .reset_index(name="pathway_count")
-            .sort_values(by="pathway_count", ascending=False)
-            .head(20)
-        )
-        top_20 = top_20[top_20["gene_id"] != str(gene_id)]  # skip candidate gene
-
-        # Compute similarity scores
-        top_20 = pathway.compute_similarity_scores(top_20, pathways)
-        if "pathway_count" in top_20.columns:
-            top_20.drop(columns=["pathway_count"], inplace=True)
-
-        logging.info("\nFetching co-expression genes from ARCHS4...")
-        df_coexp = scrape_archs4_coexpressed_genes(gene_name, top_n=10)
-        df_coexp["entrez_id"] = df_coexp["gene"].apply(transform)
-        df_coexp.rename(columns={"entrez_id": "gene_id"}, inplace=True)
-        df_coexp.drop(columns=["gene"], inplace=True)
-
-        # Merge all once, then process
-        df_final = pd.merge(top_20, accumulated_results_df, on="gene_id", how="outer")
-        df_final = pd.merge(df_final, df_coexp, on="gene_id", how="outer")
-
-        # Fill scores just once
-        df_final["relation_score"] = df_final.get("relation_score", 0).fillna(0)
-        df_final["similarity_score"] = df_final.get("similarity_score", 0).fillna(0)
-        df_final["correlation"] = df_final.get("correlation", 0).fillna(0)
-
-        # Compute total score once
-        df_final["total_score"] = (
-                df_final["relation_score"] +
-                df_final["similarity_score"] +
-                0.8 * df_final["correlation"]
-        )
-
-        # Final sort and export
-        df_final = df_final.sort_values(by="total_score", ascending=False).reset_index(drop=True)
-        df_final = df_final[["gene_id", "total_score", "relation_score", "similarity_score", "correlation"]]
-
-        logging.info("Final result:")
-        print(df_final)
-
-        output_path_csv = "top_20_genes_by_pathway.csv"
-        CSV_export.export_to_csv(df_final, output_path_csv)
-
-        return df_final, gene_id
-
-    except Exception as e:
-        import traceback
-        print("An error occurred:")
-        print(traceback.format_exc())
-        raise
+        CSV_export.export_to_parquet(df, os.path.join(directory, "scores.parquet"), run)
+        if components is not None:
+            CSV_export.export_components(components, os.path.join(directory, "components.parquet"))
+        return "scores.parquet"
+    except ImportError:
+        CSV_export.export_to_csv(df, os.path.join(directory, "scores.csv"))
+        if components is not None:
+            CSV_export.export_to_csv(components, os.path.join(directory, "components.csv"))
+        return "scores.csv"
 
 
 def get_gene_id_from_name(gene_name):
-    """Helper function to get gene ID from name using NCBI API"""
+    """
+    Entrez ID of a human gene symbol from the NCBI API, None when it cannot be
+    found. A symbol missing from the local gene list with a close known symbol
+    fails with ValueError naming it, before any request is made; other
+    unknown symbols are still searched, since NCBI also knows aliases the
+    list does not contain.
+    """
+    # Catch typos locally; a misspelt symbol would only cost an empty esearch round trip
+    suggestion, known = spell_checker.validate_gene_name(gene_name)
+    if not known and suggestion:
+        raise ValueError(f"'{gene_name}' is not a known gene symbol. Did you mean {suggestion}?")
+
     try:
         search_url = f"https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi?db=gene&term={gene_name}[gene]+AND+homo+sapiens[orgn]&retmode=json"
-        response = requests.get(search_url)
+        response = http.get(search_url)
         response.raise_for_status()
         search_json = response.json()
 
@@ -1,6 +1,10 @@
 from pandas.core.interchange.dataframe_protocol import DataFrame
+import numpy as np
 import pandas as pd
 
+import ids
+from src.common.tracing import SCORE, traced
+
 
 relation_score_map = {
     "activation": 1.0,
@@ -12,7 +16,166 @@ relation_score_map = {
     "other": 0.0
 }
 
+@traced("relation scoring", SCORE)
 def mappingScore(df):
-    df["relation_score"] = df["relation_type"].map(relation_score_map)
+    df["relation_score"] = df["relation_type"].map(relation_score_map).astype(np.float64)
+
+    df.drop(columns=["relation_type"], inplace=True)
+
+
+# Weight of each score component in total_score
+DEFAULT_SCORE_WEIGHTS = {
+    "relation_score": 1.0,
+    "similarity_score": 1.0,
+    "correlation": 0.8,
+    "propagation_score": 0.5,
+}
+
+
+def total_score(df, weights=None):
+    """Weighted sum of the score columns (missing columns count as 0)"""
+    weights = DEFAULT_SCORE_WEIGHTS if weights is None else weights
+    total = pd.Series(0.0, index=df.index)
+    for column, weight in weights.items():
+        if column in df.columns:
+            total += weight * df[column]
+    return total
+
+
+# Raw inputs of the scores, persisted with every analysis: one row per gene, with the
+# number of relations of each type next to the pathway counts, Jaccard, correlation
+# and the interactome random-walk score (propagation.py)
+COMPONENT_COLUMNS = ["gene_id", "pathway_count", "similarity_score", "correlation", "propagation_score"]
+RELATION_COUNT_PREFIX = "relations:"
+
+# How the relations of one gene combine into its relation_score
+RELATION_REDUCERS = ("mean", "sum", "max", "count")
+DEFAULT_RELATION_REDUCER = "mean"
+
+
+def gene_ids_as_int(df):
+    """Copy of df with int32 gene IDs; rows without one (ids.MISSING_GENE) are dropped"""
+    gene_ids = ids.gene_ids(df["gene_id"])
+    valid = gene_ids != ids.MISSING_GENE
+    df = df[valid].copy()
+    df["gene_id"] = gene_ids[valid]
+    return df
+
+
+@traced("aggregate relations", SCORE)
+def aggregate_relations(relations):
+    """
+    Collapse relation rows (one per gene, relation and pathway) to one row
+    per gene with a count column per relation type.
+    """
+    if "gene_id" not in relations.columns or relations.empty:  # no relation found in any pathway
+        return pd.DataFrame({"gene_id": pd.Series(dtype=ids.GENE_ID_DTYPE)})
+    relations = ids.compact(gene_ids_as_int(relations))
+    counts = (
+        relations.groupby(["gene_id", "relation_type"], sort=False, observed=True)
+        .size()
+        .unstack(fill_value=0)
+    )
+    counts.columns = [RELATION_COUNT_PREFIX + str(t) for t in counts.columns]
+    return counts.reset_index()
+
+
+@traced("score components", SCORE)
+def build_components(top_genes, relations, coexpressed, propagated=None):
+    """
+    Outer-join the pathway co-membership counts and Jaccard similarities
+    (top_genes), the aggregated KGML relations, the co-expression
+    correlations and the propagation scores, one row per gene, before
+    anything is weighted.
+    """
+    components = pd.merge(gene_ids_as_int(top_genes), aggregate_relations(relations), on="gene_id", how="outer")
+    components = pd.merge(components, gene_ids_as_int(coexpressed), on="gene_id", how="outer")
+    if propagated is not None:
+        components = pd.merge(components, gene_ids_as_int(propagated), on="gene_id", how="outer")
+    # A gene may appear in several co-expression rows; keep its strongest correlation
+    if components["gene_id"].duplicated().any():
+        components = components.groupby("gene_id", as_index=False, sort=False).max()
+    for column in COMPONENT_COLUMNS[1:]:
+        if column not in components.columns:
+            components[column] = 0
+    count_columns = [c for c in components.columns if c.startswith(RELATION_COUNT_PREFIX)]
+    components = components[COMPONENT_COLUMNS + count_columns].fillna(0)
+    types = {c: np.int64 for c in ["pathway_count"] + count_columns}
+    types["gene_id"] = ids.GENE_ID_DTYPE
+    types.update(similarity_score=np.float64, correlation=np.float64, propagation_score=np.float64)
+    return components.astype(types)
+
+
+def components_from_relation_rows(components):
+    """Per-gene components from the one-row-per-relation layout stored by earlier versions"""
+    per_gene = components.drop(columns=["relation_type"]).groupby("gene_id", as_index=False, sort=False).max()
+    return build_components(per_gene, components[["gene_id", "relation_type"]].dropna(), pd.DataFrame(columns=["gene_id"]))
+
+
+class ScoreComponents:
+    """
+    Score table computed from cached per-gene components. Relation counts
+    are kept as a genes x relation types matrix, so a rescore (new weights,
+    relation map or reducer) is a few NumPy operations, milliseconds for
+    millions of genes, instead of a pipeline run.
+    """
+
+    def __init__(self, components: pd.DataFrame):
+        if "relation_type" in components.columns:
+            components = components_from_relation_rows(components)
+        components = components.reset_index(drop=True)
+        count_columns = [c for c in components.columns if c.startswith(RELATION_COUNT_PREFIX)]
+        self.gene_ids = components["gene_id"].to_numpy()
+        self.relation_types = [c[len(RELATION_COUNT_PREFIX):] for c in count_columns]
+        self.relation_counts = components[count_columns].to_numpy(np.float64).reshape(len(components), len(count_columns))
+        self.relation_totals = self.relation_counts.sum(axis=1)
+        self.pathway_count = components["pathway_count"].to_numpy()
+        self.similarity = components["similarity_score"].to_numpy(np.float64)
+        self.correlation = components["correlation"].to_numpy(np.float64)
+        # Runs stored before propagation scoring have no such column
+        self.propagation = (components["propagation_score"].to_numpy(np.float64)
+                            if "propagation_score" in components.columns else np.zeros(len(components)))
+
+    def __len__(self):
+        return len(self.gene_ids)
+
+    def relation_scores(self, relation_map=None, reducer=DEFAULT_RELATION_REDUCER) -> np.ndarray:
+        relation_map = relation_score_map if relation_map is None else relation_map
+        # Unknown relation types score 0
+        values = np.array([relation_map.get(t, 0.0) for t in self.relation_types], dtype=np.float64)
+
+        if reducer == "count":
+            return self.relation_totals.copy()
+        if reducer == "max":
+            present = np.where(self.relation_counts > 0, values, -np.inf)
+            best = present.max(axis=1, initial=-np.inf)
+            return np.where(np.isfinite(best), best, 0.0)
+        signed_sum = self.relation_counts @ values
+        if reducer == "sum":
+            return signed_sum
+        if reducer == "mean":
+            return np.divide(signed_sum, self.relation_totals, out=np.zeros(len(self)), where=self.relation_totals > 0)
+        raise ValueError(f"Unknown relation reducer {reducer!r}, expected one of {RELATION_REDUCERS}")
+
+    def score(self, weights=None, relation_map=None, reducer=DEFAULT_RELATION_REDUCER, top_n=None) -> pd.DataFrame:
+        """Score table sorted by total_score, optionally only its top_n rows"""
+        weights = DEFAULT_SCORE_WEIGHTS if weights is None else weights
+        relation = self.relation_scores(relation_map, reducer)
+        total = (weights.get("relation_score", 0.0) * relation
+                 + weights.get("similarity_score", 0.0) * self.similarity
+                 + weights.get("correlation", 0.0) * self.correlation
+                 + weights.get("propagation_score", 0.0) * self.propagation)
 
-    df.drop(columns=["relation_type"], inplace=True)
\ No newline at end of file
+        if top_n is not None and top_n < len(total):
+            order = np.argpartition(-total, top_n)[:top_n]
+            order = order[np.argsort(-total[order], kind="stable")]
+        else:
+            order = np.argsort(-total, kind="stable")
+        return pd.DataFrame({
+            "gene_id": self.gene_ids[order],
+            "total_score": total[order],
+            "relation_score": relation[order],
+            "similarity_score": self.similarity[order],
+            "correlation": self.correlation[order],
+            "propagation_score": self.propagation[order],
+        })
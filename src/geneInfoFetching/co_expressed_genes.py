@@ -1,12 +1,17 @@
 import json
+from concurrent.futures import ThreadPoolExecutor
 
-import requests
 import pandas as pd
 import time
 from selenium.webdriver.chrome.options import Options
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 
+import ids
+from src.common import http
+from src.common.scheduler import with_priority
+from src.common.tracing import NETWORK, PARSE, span
+
 def scrape_archs4_coexpressed_genes(gene: str, top_n: int = 10) -> pd.DataFrame:
     url = f"https://maayanlab.cloud/archs4/gene/{gene.upper()}"
 
@@ -20,17 +25,19 @@ def scrape_archs4_coexpressed_genes(gene: str, top_n: int = 10) -> pd.DataFrame:
     driver = webdriver.Chrome(options=options)
 
     try:
-        driver.get(url)
-        time.sleep(3)  # Wait for JavaScript to load the table
+        with span("ARCHS4 page load", NETWORK, url=url):
+            driver.get(url)
+            time.sleep(3)  # Wait for JavaScript to load the table
 
         # Find rows in the co-expression table
-        rows = driver.find_elements(By.CSS_SELECTOR, "#tablecor tbody tr")[:top_n]
-        data = []
-        for row in rows:
-            cols = row.find_elements(By.TAG_NAME, "td")
-            gene_name = cols[1].text.strip()
-            corr = float(cols[2].text.strip())
-            data.append({"gene": gene_name, "correlation": corr})
+        with span("ARCHS4 table parse", PARSE):
+            rows = driver.find_elements(By.CSS_SELECTOR, "#tablecor tbody tr")[:top_n]
+            data = []
+            for row in rows:
+                cols = row.find_elements(By.TAG_NAME, "td")
+                gene_name = cols[1].text.strip()
+                corr = float(cols[2].text.strip())
+                data.append({"gene": gene_name, "correlation": corr})
 
         return pd.DataFrame(data)
 
@@ -38,7 +45,7 @@ def scrape_archs4_coexpressed_genes(gene: str, top_n: int = 10) -> pd.DataFrame:
         driver.quit()
 
 def send_get_request(url_string):
-    response = requests.get(url_string)
+    response = http.get(url_string)
     response.raise_for_status()
     return response.text
 
@@ -52,3 +59,15 @@ def transform(gene_name: str):
     except Exception as e:
         print(f"Error fetching Entrez ID for {gene_name}: {e}")
         return "Error"
+
+
+def fetch_coexpressed_gene_ids(gene: str, top_n: int = 10, max_workers: int = 3) -> pd.DataFrame:
+    """ARCHS4 co-expressed genes as gene_id/correlation rows; the symbols are resolved to Entrez IDs in parallel"""
+    df = scrape_archs4_coexpressed_genes(gene, top_n=top_n)
+    if df.empty:
+        return pd.DataFrame({"gene_id": pd.Series(dtype=ids.GENE_ID_DTYPE), "correlation": pd.Series(dtype=float)})
+    # NCBI allows a few requests per second without an API key; 429s are retried by http
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        gene_ids = list(pool.map(with_priority(transform), df["gene"]))
+    # Symbols NCBI does not resolve ("Not found"/"Error") become ids.MISSING_GENE
+    return pd.DataFrame({"gene_id": ids.gene_ids(gene_ids), "correlation": df["correlation"].to_numpy()})
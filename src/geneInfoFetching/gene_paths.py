@@ -0,0 +1,227 @@
+"""
+Gene-to-gene path queries over the interactome (interactome.py).
+
+Shortest paths follow KGML relations in their direction with a
+bidirectional breadth-first search; the k shortest loopless paths come from
+Yen's algorithm on top of it. Each path lists the intermediate genes, the
+relation types of every step with the pathways that contain them, and its
+sign: +1 when the source ends up activating the target, -1 when it ends up
+inhibiting it, 0 when a step has no sign or conflicting ones.
+
+    python src/geneInfoFetching/gene_paths.py 672 7157
+    python src/geneInfoFetching/gene_paths.py 672 7157 -k 10 --sign -1 --undirected
+"""
+import argparse
+import heapq
+import os
+import sys
+from dataclasses import dataclass
+from itertools import count
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+if __name__ == "__main__":
+    # Shared modules live under src/common; make the repo root importable when running from this folder
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import numpy as np
+
+from interactome import CODE_MASK, RELATION_TYPES, REVERSE, Interactome, built_interactome
+
+# Sign of each relation type; the rest carry no sign
+RELATION_SIGNS = {"activation": 1, "expression": 1, "inhibition": -1, "repression": -1}
+_CODE_SIGNS = np.array([RELATION_SIGNS.get(name, 0) for name in RELATION_TYPES], dtype=np.int8)
+
+
+@dataclass
+class PathStep:
+    source: int
+    target: int
+    relation_types: List[str]  # "(reverse)" marks relations followed against their direction
+    pathways: List[str]
+    sign: int
+
+
+@dataclass
+class GenePath:
+    genes: List[int]
+    steps: List[PathStep]
+
+    @property
+    def hops(self) -> int:
+        return len(self.steps)
+
+    @property
+    def sign(self) -> int:
+        return int(np.prod([step.sign for step in self.steps])) if self.steps else 1
+
+    def describe(self) -> str:
+        text = str(self.genes[0])
+        for step in self.steps:
+            text += f" -{'/'.join(step.relation_types)}-> {step.target}"
+        return text
+
+
+class PathFinder:
+    """Path queries over one Interactome; neighbour lists are cached per node as they are visited"""
+
+    def __init__(self, graph: Interactome, directed: bool = True):
+        self.graph = graph
+        self.directed = directed
+        self._adjacent_cache: Dict[Tuple[int, bool], List[int]] = {}
+
+    def _adjacent(self, node: int, forward: bool) -> List[int]:
+        """Successors (forward) or predecessors of a node position; all neighbours when undirected"""
+        key = (node, forward)
+        if key not in self._adjacent_cache:
+            start, end = self.graph.indptr[node], self.graph.indptr[node + 1]
+            others = self.graph.indices[start:end]
+            if self.directed:
+                incoming = (self.graph.types[start:end] & REVERSE) > 0
+                others = others[incoming != forward]
+            self._adjacent_cache[key] = np.unique(others).tolist()
+        return self._adjacent_cache[key]
+
+    def _bfs(self, source: int, target: int, banned_nodes: Set[int] = frozenset(),
+             banned_edges: Set[Tuple[int, int]] = frozenset()) -> Optional[List[int]]:
+        """Shortest node-position path, expanding the smaller frontier one level at a time"""
+        if source == target:
+            return [source]
+        depth = ({source: 0}, {target: 0})
+        parents = ({source: None}, {target: None})
+        frontiers = ([source], [target])
+
+        while frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            forward = side == 0
+            seen, other = parents[side], parents[1 - side]
+            next_frontier, meets = [], []
+            for u in frontiers[side]:
+                for v in self._adjacent(u, forward):
+                    if v in banned_nodes or ((u, v) if forward else (v, u)) in banned_edges:
+                        continue
+                    if v not in seen:
+                        seen[v] = u
+                        depth[side][v] = depth[side][u] + 1
+                        next_frontier.append(v)
+                        if v in other:
+                            meets.append(v)
+            if meets:
+                # Every meeting on this level closes a path; keep the shortest
+                meet = min(meets, key=lambda v: depth[0][v] + depth[1][v])
+                return self._join(meet, parents)
+            frontiers = (next_frontier, frontiers[1]) if forward else (frontiers[0], next_frontier)
+        return None
+
+    @staticmethod
+    def _join(meet: int, parents) -> List[int]:
+        path = []
+        node = meet
+        while node is not None:
+            path.append(node)
+            node = parents[0][node]
+        path.reverse()
+        node = parents[1][meet]
+        while node is not None:
+            path.append(node)
+            node = parents[1][node]
+        return path
+
+    def _yen(self, source: int, target: int) -> Iterator[List[int]]:
+        """Loopless paths from source to target, shortest first"""
+        first = self._bfs(source, target)
+        if first is None:
+            return
+        found = [first]
+        yield first
+        candidates, seen, tie = [], {tuple(first)}, count()
+        while True:
+            previous = found[-1]
+            for i in range(len(previous) - 1):
+                root = previous[:i + 1]
+                banned_edges = {(p[i], p[i + 1]) for p in found if len(p) > i + 1 and p[:i + 1] == root}
+                spur = self._bfs(previous[i], target, set(root[:-1]), banned_edges)
+                if spur is not None:
+                    path = root[:-1] + spur
+                    if tuple(path) not in seen:
+                        seen.add(tuple(path))
+                        heapq.heappush(candidates, (len(path), next(tie), path))
+            if not candidates:
+                return
+            found.append(heapq.heappop(candidates)[2])
+            yield found[-1]
+
+    def _step(self, u: int, v: int) -> PathStep:
+        start, end = self.graph.indptr[u], self.graph.indptr[u + 1]
+        edges = start + np.flatnonzero(self.graph.indices[start:end] == v)
+        if self.directed:
+            edges = edges[(self.graph.types[edges] & REVERSE) == 0]
+
+        relation_types, pathways, signs = [], [], set()
+        for edge in edges.tolist():
+            code = int(self.graph.types[edge])
+            name = RELATION_TYPES[code & CODE_MASK]
+            relation_types.append(f"{name} (reverse)" if code & REVERSE else name)
+            signs.add(int(_CODE_SIGNS[code & CODE_MASK]))
+            pathways.extend(p for p in self.graph.edge_pathways(edge) if p not in pathways)
+        signs.discard(0)  # an unsigned relation next to a signed one does not cancel it
+        sign = signs.pop() if len(signs) == 1 else 0
+        return PathStep(int(self.graph.genes[u]), int(self.graph.genes[v]), relation_types, pathways, sign)
+
+    def _path(self, nodes: List[int]) -> GenePath:
+        return GenePath([int(self.graph.genes[n]) for n in nodes],
+                        [self._step(u, v) for u, v in zip(nodes, nodes[1:])])
+
+    def _positions(self, source, target) -> Optional[Tuple[int, int]]:
+        s, t = self.graph.node(source), self.graph.node(target)
+        return None if s is None or t is None else (s, t)
+
+    def shortest_path(self, source, target) -> Optional[GenePath]:
+        """Fewest-step path between two Entrez IDs, None if they are not connected"""
+        positions = self._positions(source, target)
+        nodes = self._bfs(*positions) if positions else None
+        return self._path(nodes) if nodes is not None else None
+
+    def k_shortest_paths(self, source, target, k: int = 5, sign: Optional[int] = None,
+                         max_candidates: int = 200) -> List[GenePath]:
+        """
+        Up to k loopless paths, shortest first. With `sign` (+1/-1/0) only paths
+        of that sign count; at most `max_candidates` paths are examined.
+        """
+        positions = self._positions(source, target)
+        if positions is None:
+            return []
+        paths = []
+        for examined, nodes in enumerate(self._yen(*positions), start=1):
+            path = self._path(nodes)
+            if sign is None or path.sign == sign:
+                paths.append(path)
+            if len(paths) >= k or examined >= max_candidates:
+                break
+        return paths
+
+
+def find_paths(source, target, k: int = 5, sign: Optional[int] = None, directed: bool = True,
+               graph: Optional[Interactome] = None) -> List[GenePath]:
+    """k shortest paths between two genes over the cached interactome (empty when it is not built)"""
+    graph = graph if graph is not None else built_interactome()
+    if graph is None:
+        return []
+    return PathFinder(graph, directed).k_shortest_paths(source, target, k, sign)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Shortest KEGG relation paths between two genes")
+    arg_parser.add_argument("source", help="Entrez ID")
+    arg_parser.add_argument("target", help="Entrez ID")
+    arg_parser.add_argument("-k", type=int, default=5)
+    arg_parser.add_argument("--sign", type=int, choices=[-1, 0, 1])
+    arg_parser.add_argument("--undirected", action="store_true", help="also follow relations against their direction")
+    args = arg_parser.parse_args()
+
+    interactome = built_interactome()
+    if interactome is None:
+        sys.exit("Interactome not built yet; run src/geneInfoFetching/interactome.py first")
+    for found in find_paths(args.source, args.target, args.k, args.sign, not args.undirected, interactome):
+        print(f"[{found.hops} steps, sign {found.sign:+d}] {found.describe()}")
+        for step in found.steps:
+            print(f"    {step.source} -> {step.target}: {', '.join(step.pathways)}")
@@ -0,0 +1,125 @@
+"""
+Compact identifiers for the pipeline's DataFrames.
+
+Gene IDs are Entrez IDs stored as int32, with MISSING_GENE (-1) for anything
+that is not a number (unresolved symbols, the "Not found"/"Error" results of
+co_expressed_genes.transform). KGML relation subtypes are a categorical over
+the fixed KEGG vocabulary (int8 codes, the same codes the interactome stores
+per edge), and pathway IDs a categorical over the pathways of the frame.
+Compared with Python strings this takes a fraction of the memory, and merges
+and groupbys compare integers instead of strings.
+"""
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+GENE_ID_DTYPE = np.int32
+MISSING_GENE = -1
+
+# KGML relation subtypes; the index is the code stored per interactome edge
+RELATION_TYPES = [
+    "other", "activation", "inhibition", "expression", "repression", "indirect effect", "state change",
+    "binding/association", "dissociation", "missing interaction", "phosphorylation", "dephosphorylation",
+    "glycosylation", "ubiquitination", "methylation", "compound", "hidden compound",
+]
+RELATION_CODES = {name: code for code, name in enumerate(RELATION_TYPES)}
+RELATION_DTYPE = pd.CategoricalDtype(RELATION_TYPES)
+
+RELATION_COLUMNS = ["gene_id", "relation_type"]
+MEMBERSHIP_COLUMNS = ["gene_id", "pathway"]
+
+
+def gene_ids(values) -> np.ndarray:
+    """int32 Entrez IDs from numbers or strings ("672", "hsa:672"); anything else becomes MISSING_GENE"""
+    if not isinstance(values, pd.Series):
+        values = list(values)
+        array = np.asarray(values) if values else np.empty(0, GENE_ID_DTYPE)
+        if array.dtype.kind in "iu":  # plain Entrez IDs, the common case
+            return array.astype(GENE_ID_DTYPE, copy=False)
+        values = pd.Series(values, dtype=object)
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return values.to_numpy(GENE_ID_DTYPE)
+    if not pd.api.types.is_numeric_dtype(values.dtype):
+        values = values.astype(str).str.replace("hsa:", "", regex=False)
+    numbers = pd.to_numeric(values, errors="coerce")
+    return numbers.fillna(MISSING_GENE).to_numpy(np.int64).astype(GENE_ID_DTYPE)
+
+
+def relation_types(values) -> pd.Categorical:
+    """Relation subtypes as a categorical; subtypes outside the KEGG vocabulary count as "other" """
+    categorical = pd.Categorical(values, dtype=RELATION_DTYPE)
+    return categorical.fillna("other") if categorical.isna().any() else categorical
+
+
+def relations_from_codes(codes: np.ndarray) -> pd.Categorical:
+    return pd.Categorical.from_codes(np.asarray(codes, dtype=np.int8), dtype=RELATION_DTYPE)
+
+
+def pathway_ids(values, n: Optional[int] = None) -> pd.Categorical:
+    """Pathway IDs as a categorical; a single ID with `n` gives n rows of it"""
+    if isinstance(values, str):
+        return pd.Categorical.from_codes(np.zeros(n or 0, dtype=np.int8), categories=[values])
+    return pd.Categorical(values)
+
+
+def relation_frame(genes, relations) -> pd.DataFrame:
+    """gene_id/relation_type rows; `relations` are subtype names or a relation categorical"""
+    relations = relations if isinstance(relations, pd.Categorical) else relation_types(relations)
+    return pd.DataFrame({"gene_id": gene_ids(genes), "relation_type": relations})
+
+
+def membership_frame(genes, pathways) -> pd.DataFrame:
+    """gene_id/pathway rows (which genes are drawn in which pathway map); `pathways` may be one ID for all rows"""
+    genes = gene_ids(genes)
+    return pd.DataFrame({"gene_id": genes, "pathway": pathway_ids(pathways, len(genes))})
+
+
+def empty_relations() -> pd.DataFrame:
+    return relation_frame([], [])
+
+
+def empty_memberships() -> pd.DataFrame:
+    return membership_frame([], [])
+
+
+def compact(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    df with compact dtypes for the gene_id, relation_type and pathway columns
+    it has (a copy when any of them changes); used on tables read back from
+    CSV and by concat.
+    """
+    columns = {}
+    if "gene_id" in df.columns and df["gene_id"].dtype != GENE_ID_DTYPE:
+        columns["gene_id"] = gene_ids(df["gene_id"])
+    if "relation_type" in df.columns and df["relation_type"].dtype != RELATION_DTYPE:
+        columns["relation_type"] = relation_types(df["relation_type"].astype(object))
+    if "pathway" in df.columns and not isinstance(df["pathway"].dtype, pd.CategoricalDtype):
+        columns["pathway"] = pathway_ids(df["pathway"].astype(object))
+    return df.assign(**columns) if columns else df
+
+
+def _concat_column(columns: List[pd.Series]):
+    arrays = [c.array for c in columns]
+    if all(isinstance(a, pd.Categorical) for a in arrays):
+        if all(a.dtype == arrays[0].dtype for a in arrays):
+            return pd.Categorical.from_codes(np.concatenate([a.codes for a in arrays]), dtype=arrays[0].dtype)
+        return union_categoricals(arrays)  # pathway categories differ from frame to frame
+    return np.concatenate([c.to_numpy() for c in columns])
+
+
+def concat(frames: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate frames and keep the compact dtypes (pd.concat turns
+    categoricals with different categories into object columns).
+    """
+    frames = [compact(f) for f in frames if len(f.columns)]
+    if len(frames) > 1:
+        frames = [f for f in frames if len(f)] or frames[:1]
+    if len(frames) <= 1:
+        return frames[0].reset_index(drop=True) if frames else pd.DataFrame()
+    columns = list(frames[0].columns)
+    if any(list(f.columns) != columns for f in frames):
+        return compact(pd.concat(frames, ignore_index=True))
+    return pd.DataFrame({name: _concat_column([f[name] for f in frames]) for name in columns})
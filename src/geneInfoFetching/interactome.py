@@ -0,0 +1,278 @@
+"""
+Human interactome built once from the relations of every human KGML.
+
+Entry-level relations are expanded to gene-level edges and stored as a CSR
+adjacency: `indptr` (int64) and `indices` (int32) over the sorted gene IDs,
+with one uint8 relation code per edge and the number of pathways that
+contain the edge. Every relation is stored in both directions; the edge
+seen from its target has the REVERSE bit set in its code. Both copies
+point at one relation, whose pathways are listed in a second CSR
+(`pathway_indptr`/`pathways`, positions in meta["pathway_ids"]). The arrays are
+written as .npy files and memory-mapped when loaded, so a neighbour lookup
+costs two binary searches and a slice, with no network access.
+
+    python src/geneInfoFetching/interactome.py            # build (or load) and print a summary
+    python src/geneInfoFetching/interactome.py --refresh  # download every KGML again
+"""
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+if __name__ == "__main__":
+    # Shared modules live under src/common; make the repo root importable when running from this folder
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import numpy as np
+import pandas as pd
+
+import ids
+from ids import RELATION_CODES, RELATION_TYPES  # relation codes are shared with the DataFrames
+from ph import KGMLGeneInteractionUtils, Logic
+from src.common.scheduler import BACKGROUND, with_priority
+from src.common.storage import cache_dir
+from src.common.tracing import PARSE, traced
+
+REVERSE = 0x80  # set on the copy of an edge stored under its target gene
+CODE_MASK = 0x7F
+
+ARRAYS = ("genes", "indptr", "indices", "types", "support")
+# Added later; interactomes built before have no pathway lists
+PATHWAY_ARRAYS = ("relations", "pathway_indptr", "pathways")
+
+
+@traced("KGML gene-level edges", PARSE)
+def kgml_gene_edges(kgml: str) -> np.ndarray:
+    """(source gene, target gene, relation code) rows for every gene pair related in one KGML"""
+    return section_gene_edges(KGMLGeneInteractionUtils.extract_entry_and_relation_blocks(kgml))
+
+
+def section_gene_edges(sections) -> np.ndarray:
+    """kgml_gene_edges for a document already split by extract_entry_and_relation_blocks"""
+    entry_genes = {}
+    for line in sections.entry_lines:
+        id_match = re.search(r'id="(\d+)"', line)
+        name_match = re.search(r'name="([^"]+)"', line)
+        if id_match and name_match:
+            genes = [int(g) for g in re.findall(r'hsa:(\d+)', name_match.group(1))]
+            if genes:
+                entry_genes[id_match.group(1)] = genes
+
+    rows = []
+    for relation in sections.relation_lines:
+        entry1 = re.search(r'entry1="(\d+)"', relation)
+        entry2 = re.search(r'entry2="(\d+)"', relation)
+        subtype = re.search(r'<subtype name="([^"]+)"', relation)
+        if not (entry1 and entry2 and subtype):
+            continue
+        sources = entry_genes.get(entry1.group(1))
+        targets = entry_genes.get(entry2.group(1))
+        if sources and targets:
+            code = RELATION_CODES.get(subtype.group(1), 0)
+            rows.extend((s, t, code) for s in sources for t in targets if s != t)
+
+    return np.array(rows, dtype=np.int64).reshape(-1, 3)
+
+
+class Interactome:
+    def __init__(self, genes, indptr, indices, types, support, meta=None,
+                 relations=None, pathway_indptr=None, pathways=None):
+        self.genes = genes        # sorted Entrez IDs, int32
+        self.indptr = indptr      # int64, len(genes) + 1
+        self.indices = indices    # int32 positions in genes
+        self.types = types        # uint8 relation code, | REVERSE for incoming edges
+        self.support = support    # uint16 number of pathways with the edge
+        self.meta = meta or {}
+        self.relations = relations            # int32 relation of each stored edge (shared by both directions)
+        self.pathway_indptr = pathway_indptr  # int64, number of relations + 1
+        self.pathways = pathways              # uint16 positions in meta["pathway_ids"]
+
+    def __len__(self):
+        return len(self.genes)
+
+    def __contains__(self, gene_id) -> bool:
+        return self.node(gene_id) is not None
+
+    @property
+    def edge_count(self) -> int:
+        """Number of relations (each is stored twice, once per direction)"""
+        return len(self.indices) // 2
+
+    def node(self, gene_id) -> Optional[int]:
+        gene_id = int(gene_id)
+        i = int(np.searchsorted(self.genes, gene_id))
+        return i if i < len(self.genes) and self.genes[i] == gene_id else None
+
+    def degree(self, gene_id) -> int:
+        i = self.node(gene_id)
+        return 0 if i is None else int(self.indptr[i + 1] - self.indptr[i])
+
+    def neighbors(self, gene_id) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(neighbour gene IDs, relation codes, pathway support) of a gene; empty for unknown genes"""
+        i = self.node(gene_id)
+        if i is None:
+            return np.empty(0, np.int32), np.empty(0, np.uint8), np.empty(0, np.uint16)
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.genes[self.indices[start:end]], self.types[start:end], self.support[start:end]
+
+    def neighbor_frame(self, gene_id) -> pd.DataFrame:
+        genes, types, support = self.neighbors(gene_id)
+        return pd.DataFrame({
+            "gene_id": genes.astype(ids.GENE_ID_DTYPE),
+            "relation_type": ids.relations_from_codes(types & CODE_MASK),
+            "incoming": (types & REVERSE) > 0,
+            "support": support,
+        })
+
+    def relation_rows(self, gene_id) -> pd.DataFrame:
+        """
+        Relations of a gene in the layout of parser.map_entry_ids_to_gene_ids
+        (one gene_id/relation_type row per relation and pathway), over all pathways
+        """
+        genes, types, support = self.neighbors(gene_id)
+        return pd.DataFrame({
+            "gene_id": np.repeat(genes, support).astype(ids.GENE_ID_DTYPE),
+            "relation_type": ids.relations_from_codes(np.repeat(types & CODE_MASK, support)),
+        })
+
+    def edge_pathways(self, edge: int) -> List[str]:
+        """KEGG pathway IDs containing the stored edge at position `edge` of indices/types"""
+        if self.relations is None:
+            return []
+        relation = self.relations[edge]
+        names = self.meta.get("pathway_ids", [])
+        positions = self.pathways[self.pathway_indptr[relation]:self.pathway_indptr[relation + 1]]
+        return [names[p] if p < len(names) else f"#{p}" for p in positions.tolist()]
+
+    # Build / storage
+
+    @classmethod
+    def from_edges(cls, edge_lists: Iterable[np.ndarray], meta=None,
+                   pathway_ids: Optional[List[str]] = None) -> "Interactome":
+        """
+        Interactome from per-pathway (source, target, code) arrays; repeats across
+        pathways become support. `pathway_ids` names the lists, in order.
+        """
+        meta = dict(meta or {})
+        if pathway_ids is not None:
+            meta["pathway_ids"] = list(pathway_ids)
+        # Count each relation once per pathway, then sum over pathways
+        per_pathway = []
+        for i, e in enumerate(edge_lists):
+            if len(e):
+                e = np.unique(e, axis=0)
+                per_pathway.append(np.column_stack([e, np.full(len(e), i)]))
+        tagged = np.vstack(per_pathway) if per_pathway else np.empty((0, 4), np.int64)
+        unique, inverse, support = np.unique(tagged[:, :3], axis=0, return_inverse=True, return_counts=True)
+        inverse = inverse.reshape(-1)
+
+        # Pathways of each relation, grouped by relation
+        pathway_indptr = np.zeros(len(unique) + 1, dtype=np.int64)
+        np.cumsum(support, out=pathway_indptr[1:])
+        pathways = tagged[np.argsort(inverse, kind="stable"), 3].astype(np.uint16)
+
+        genes = np.unique(unique[:, :2]).astype(np.int32)
+        src = np.searchsorted(genes, unique[:, 0])
+        dst = np.searchsorted(genes, unique[:, 1])
+        codes = unique[:, 2].astype(np.uint8)
+
+        # Both directions, sorted by owning node
+        owner = np.concatenate([src, dst])
+        other = np.concatenate([dst, src]).astype(np.int32)
+        types = np.concatenate([codes, codes | REVERSE]).astype(np.uint8)
+        support = np.minimum(np.concatenate([support, support]), np.iinfo(np.uint16).max).astype(np.uint16)
+        relations = np.tile(np.arange(len(unique), dtype=np.int32), 2)
+        order = np.lexsort((types, other, owner))
+
+        indptr = np.zeros(len(genes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(owner, minlength=len(genes)), out=indptr[1:])
+        return cls(genes, indptr, other[order], types[order], support[order], meta,
+                   relations[order], pathway_indptr, pathways)
+
+    def save(self, path: str):
+        """Write the arrays to the directory `path`, replacing it only once complete"""
+        tmp = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name in ARRAYS + PATHWAY_ARRAYS:
+            if getattr(self, name) is not None:
+                np.save(os.path.join(tmp, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "Interactome":
+        mmap_mode = "r" if mmap else None
+        arrays = [np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in ARRAYS]
+        optional = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+                    for name in PATHWAY_ARRAYS if os.path.exists(os.path.join(path, f"{name}.npy"))}
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(*arrays, meta=meta, **optional)
+
+
+def interactome_path() -> str:
+    return os.path.join(cache_dir("interactome"), "hsa")
+
+
+def build_interactome(pathway_ids: Optional[List[str]] = None, max_workers: int = 3,
+                      parse_workers: Optional[int] = None) -> Interactome:
+    """
+    Download every human KGML (or `pathway_ids`) and build the interactome.
+    Documents are parsed in `parse_workers` processes (kgml_parallel) while
+    the next ones download.
+    """
+    from kgml_parallel import KGMLParsePool  # imports this module
+
+    pathway_ids = pathway_ids or Logic.fetch_human_pathway_ids()
+
+    def download(pathway_id):
+        try:
+            return Logic.fetch_kgml(pathway_id)
+        except Exception as e:
+            print(f"Skipping {pathway_id}: {e}")
+            return None
+
+    def edges_of(pathway_id, future):
+        try:
+            return future.result().edges
+        except Exception as e:
+            # Metabolic maps without relations are skipped
+            print(f"Skipping {pathway_id}: {e}")
+            return np.empty((0, 3), np.int64)
+
+    # KEGG answers too many parallel requests with 403, so only a few downloads run at once
+    with ThreadPoolExecutor(max_workers=max_workers) as downloads, KGMLParsePool(parse_workers) as parsers:
+        futures = [(pathway_id, parsers.submit(kgml)) for pathway_id, kgml in zip(pathway_ids, downloads.map(with_priority(download, BACKGROUND), pathway_ids))
+                   if kgml is not None]
+        edge_lists = {pathway_id: edges_of(pathway_id, future) for pathway_id, future in futures}
+    return Interactome.from_edges([edge_lists.get(p, np.empty((0, 3), np.int64)) for p in pathway_ids],
+                                  meta={"pathways": len(pathway_ids), "built_at": time.time()}, pathway_ids=pathway_ids)
+
+
+def load_interactome(refresh: bool = False) -> Interactome:
+    """The memory-mapped interactome from the local cache, building it from KEGG on first use"""
+    path = interactome_path()
+    if refresh or not os.path.exists(os.path.join(path, "meta.json")):
+        build_interactome().save(path)
+    return Interactome.load(path)
+
+
+def built_interactome() -> Optional[Interactome]:
+    """The cached interactome if it has been built, without downloading anything"""
+    path = interactome_path()
+    return Interactome.load(path) if os.path.exists(os.path.join(path, "meta.json")) else None
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    interactome = load_interactome(refresh="--refresh" in sys.argv)
+    print(f"{len(interactome)} genes, {interactome.edge_count} relations from {interactome.meta.get('pathways')} "
+          f"pathways ({interactome_path()}), ready in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,113 @@
+"""
+KGML parsing in worker processes.
+
+The regex parsers hold the GIL, so once many large maps (hsa01100,
+hsa05200, ...) are downloaded, threads do not speed up parsing. Here the
+documents go to a ProcessPoolExecutor and each worker sends back only NumPy
+arrays: the member genes of the map and its (source, target, relation code)
+gene pairs, as produced by interactome.kgml_gene_edges. Arrays pickle as
+raw buffers, which keeps the result transfer far below the cost of
+DataFrames or dicts. Relations of any gene are then read from the arrays in
+the parent, so one parse serves every gene of a batch.
+"""
+import multiprocessing
+import os
+import re
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import ids
+from interactome import section_gene_edges
+from ph import KGMLGeneInteractionUtils
+
+
+class KGMLArrays(NamedTuple):
+    members: np.ndarray  # int32 Entrez IDs of the map's entries, in order of first appearance
+    edges: np.ndarray    # int64 (source, target, relation code) rows, one per related gene pair and relation
+
+
+def parse_kgml(kgml: str, relations: bool = True) -> KGMLArrays:
+    """Compact parse of one KGML document (runs in the worker processes); without `relations`, edges is empty"""
+    sections = KGMLGeneInteractionUtils.extract_entry_and_relation_blocks(kgml)
+    # Same membership rule as pathway.update_gene_pathway_counts
+    members = dict.fromkeys(int(g) for line in sections.entry_lines for g in re.findall(r'hsa:(\d+)', line))
+    edges = section_gene_edges(sections) if relations else np.empty((0, 3), np.int64)
+    return KGMLArrays(np.fromiter(members, dtype=np.int32, count=len(members)), edges)
+
+
+def default_workers() -> int:
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+class KGMLParsePool:
+    """
+    Process pool for KGML parsing. Documents can be submitted as they arrive,
+    so parsing overlaps the downloads of the following ones.
+
+        with KGMLParsePool() as pool:
+            futures = [pool.submit(kgml) for kgml in downloads]
+            parsed = [f.result() for f in futures]
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        # spawn, not fork: the parent runs download threads, and a forked child can inherit their held locks
+        self._executor = ProcessPoolExecutor(max_workers=max_workers or default_workers(),
+                                             mp_context=multiprocessing.get_context("spawn"))
+
+    def submit(self, kgml: str, relations: bool = True) -> "Future[KGMLArrays]":
+        return self._executor.submit(parse_kgml, kgml, relations)
+
+    def map(self, kgmls: Iterable[str]) -> List[KGMLArrays]:
+        return list(self._executor.map(parse_kgml, kgmls))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+
+def parse_kgmls(kgmls: List[str], max_workers: Optional[int] = None) -> List[KGMLArrays]:
+    """Parse documents in worker processes; a single document or worker is parsed in-process"""
+    max_workers = max_workers or default_workers()
+    if max_workers <= 1 or len(kgmls) <= 1:
+        return [parse_kgml(kgml) for kgml in kgmls]
+    with KGMLParsePool(max_workers) as pool:
+        return pool.map(kgmls)
+
+
+def gene_frames(parsed: Iterable[Tuple[str, KGMLArrays]], gene_id) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    (relation rows, gene-pathway rows) of one gene from parsed (pathway ID, arrays)
+    pairs, in the layout pathway.process_pathway accumulates: gene_id/relation_type
+    per relation and gene_id/pathway per member gene, in the compact dtypes of ids.py
+    """
+    gene_id = int(gene_id)
+    partners, codes, member_ids, member_pathways = [], [], [], []
+    for pathway_id, arrays in parsed:
+        edges = arrays.edges
+        outgoing, incoming = edges[:, 0] == gene_id, edges[:, 1] == gene_id
+        partners += [edges[outgoing, 1], edges[incoming, 0]]
+        codes += [edges[outgoing, 2], edges[incoming, 2]]
+        member_ids.append(arrays.members)
+        member_pathways.append(np.full(len(arrays.members), pathway_id, dtype=object))
+
+    relations = ids.empty_relations()
+    if partners and sum(map(len, partners)):
+        relations = pd.DataFrame({
+            "gene_id": np.concatenate(partners).astype(ids.GENE_ID_DTYPE),
+            "relation_type": ids.relations_from_codes(np.concatenate(codes)),
+        })
+    counts = ids.empty_memberships()
+    if member_ids:
+        counts = pd.DataFrame({
+            "gene_id": np.concatenate(member_ids).astype(ids.GENE_ID_DTYPE),
+            "pathway": ids.pathway_ids(np.concatenate(member_pathways)),
+        })
+    return relations, counts
@@ -2,9 +2,12 @@ import re
 from typing import List, Dict, Tuple
 
 import pandas as pd
-from accelerate.test_utils.scripts.test_sync import step_model
 
+import ids
+from src.common.tracing import PARSE, traced
 
+
+@traced("KGML parse entries", PARSE)
 def parse_entries(entries: List[str], gene_id: str) -> pd.DataFrame:
     entry_data = []
 
@@ -16,7 +19,7 @@ def parse_entries(entries: List[str], gene_id: str) -> pd.DataFrame:
             entry_id = id_match.group(1)
             name_field = name_match.group(1)
             contains_gene = f"hsa:{gene_id}" in name_field
-            gene_matches = re.findall(r'hsa:(\d+)', name_field)
+            gene_matches = [int(g) for g in re.findall(r'hsa:(\d+)', name_field)]
 
             entry_data.append({
                 "entry_id": entry_id,
@@ -34,6 +37,7 @@ def parse_entries(entries: List[str], gene_id: str) -> pd.DataFrame:
     })
 
 
+@traced("KGML parse relations", PARSE)
 def parse_relations(entry_ids: List[str], relation_lines: List[str]) -> pd.DataFrame:
     data = []
 
@@ -58,6 +62,7 @@ def parse_relations(entry_ids: List[str], relation_lines: List[str]) -> pd.DataF
 
 #last step
 
+@traced("KGML map entries to genes", PARSE)
 def map_entry_ids_to_gene_ids(entry_lines: List[str], association_df: pd.DataFrame) -> pd.DataFrame:
     entry_id_to_genes = {}
 
@@ -67,19 +72,18 @@ def map_entry_ids_to_gene_ids(entry_lines: List[str], association_df: pd.DataFra
 
         if entry_id_match and name_match:
             entry_id = entry_id_match.group(1)
-            gene_ids = re.findall(r'hsa:(\d+)', name_match.group(1))
+            gene_ids = [int(g) for g in re.findall(r'hsa:(\d+)', name_match.group(1))]
             if gene_ids:
                 entry_id_to_genes[entry_id] = gene_ids
 
-    records = []
-    for _, row in association_df.iterrows():
-        entry_id = row["target_entry_id"]
-        relation_type = row["relation_type"]
-        gene_ids = entry_id_to_genes.get(entry_id)
-        if gene_ids:
-            for gid in gene_ids:
-                records.append({"gene_id": gid, "relation_type": relation_type})
-        else:
-            print(f"❌ Entry ID {entry_id} not found in entries.")
-
-    return pd.DataFrame(records)
+    genes, relation_types = [], []
+    if not association_df.empty:
+        for entry_id, relation_type in zip(association_df["target_entry_id"], association_df["relation_type"]):
+            gene_ids = entry_id_to_genes.get(entry_id)
+            if gene_ids:
+                genes.extend(gene_ids)
+                relation_types.extend([relation_type] * len(gene_ids))
+            else:
+                print(f"❌ Entry ID {entry_id} not found in entries.")
+
+    return ids.relation_frame(genes, relation_types)
@@ -1,22 +1,37 @@
+import os
 import re
-from typing import List, Set, Tuple
+from typing import List, Optional, Set, Tuple
+import numpy as np
 import pandas as pd
 
+import ids
 import parser
 from ph import KGMLGeneInteractionUtils, Logic
+from src.common.minhash_index import MinHashLSHIndex
+from src.common.storage import cache_dir
+from src.common.tracing import PARSE, SCORE, traced
 
+@traced("process pathway", PARSE)
 def process_pathway(
     kgml: str,
     gene_id: int,
     gene_pathway_counts: pd.DataFrame,
     accumulated_results_df: pd.DataFrame,
-    pathway_id: str
+    pathway_id: str,
+    relations: bool = True
 ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Add a KGML's member genes to gene_pathway_counts and the relations of
+    gene_id in it to accumulated_results_df; with `relations` False (the
+    interactome supplies them) only the memberships are parsed.
+    """
     sections = KGMLGeneInteractionUtils.extract_entry_and_relation_blocks(kgml)
     seen_in_pathway = set()
 
     # Update gene-pathway participation record
     gene_pathway_counts = update_gene_pathway_counts(sections.entry_lines, gene_pathway_counts, seen_in_pathway, pathway_id)
+    if not relations:
+        return accumulated_results_df, gene_pathway_counts
 
     # Get candidate-related entries and extract their relations
     gene_match_info_df = parser.parse_entries(sections.entry_lines, gene_id)
@@ -26,39 +41,48 @@ def process_pathway(
     result_df = parser.map_entry_ids_to_gene_ids(sections.entry_lines, response_df)
 
     if not response_df.empty:
-        accumulated_results_df = pd.concat([accumulated_results_df, result_df], ignore_index=True)
+        accumulated_results_df = ids.concat([accumulated_results_df, result_df])
 
     return accumulated_results_df, gene_pathway_counts
 
 
+@traced("gene pathway counts", PARSE)
 def update_gene_pathway_counts(
     entry_lines: List[str],
     gene_pathway_counts: pd.DataFrame,
-    seen_in_pathway: Set[str],
+    seen_in_pathway: Set[int],
     pathway_id: str
 ) -> pd.DataFrame:
-    new_rows = []
+    new_genes = []
 
     for line in entry_lines:
         matches = re.findall(r'hsa:(\d+)', line)
-        for gene_id in matches:
+        for gene_id in map(int, matches):
             if gene_id not in seen_in_pathway:
-                new_rows.append({"gene_id": gene_id, "pathway": pathway_id})
+                new_genes.append(gene_id)
                 seen_in_pathway.add(gene_id)
 
-    if new_rows:
-        gene_pathway_counts = pd.concat([gene_pathway_counts, pd.DataFrame(new_rows)], ignore_index=True)
+    if new_genes:
+        new_rows = ids.membership_frame(new_genes, [pathway_id] * len(new_genes))
+        gene_pathway_counts = ids.concat([gene_pathway_counts, new_rows])
 
     return gene_pathway_counts
 
 
-def compute_similarity_scores(top_20: pd.DataFrame, reference_pathways: List[str]) -> pd.DataFrame:
+@traced("pathway similarity scores", SCORE)
+def compute_similarity_scores(
+    top_20: pd.DataFrame,
+    reference_pathways: List[str],
+    index: Optional[MinHashLSHIndex] = None
+) -> pd.DataFrame:
     top_20["similarity_score"] = 0.0
 
-    for idx, row in top_20.iterrows():
-        gene = row["gene_id"]
+    for idx, gene in top_20["gene_id"].items():
         try:
-            related_gene_pathways = Logic.fetch_pathways_for_gene(int(gene))
+            # The index already holds every gene's pathway set, so no request is needed
+            related_gene_pathways = index.get_set(f"hsa:{gene}") if index is not None else None
+            if related_gene_pathways is None:
+                related_gene_pathways = Logic.fetch_pathways_for_gene(int(gene))
             union_pathways = set(related_gene_pathways) | set(reference_pathways)
             intersection = set(related_gene_pathways) & set(reference_pathways)
             similarity_score = len(intersection) / len(union_pathways) if union_pathways else 0
@@ -67,3 +91,24 @@ def compute_similarity_scores(top_20: pd.DataFrame, reference_pathways: List[str
             print(f"Error with gene {gene}: {e}")
 
     return top_20
+
+
+def load_gene_pathway_index(refresh: bool = False) -> MinHashLSHIndex:
+    """Load the MinHash index of all human gene pathway sets, building it from KEGG on first use"""
+    path = os.path.join(cache_dir("minhash"), "gene_pathways.npz")
+    return MinHashLSHIndex.load_or_build(path, Logic.fetch_gene_pathway_links, refresh=refresh)
+
+
+@traced("MinHash similar genes", SCORE)
+def find_similar_genes(
+    gene_id: int,
+    reference_pathways: List[str],
+    index: MinHashLSHIndex,
+    top_n: int = 20
+) -> pd.DataFrame:
+    """Genes with the most similar pathway sets, retrieved through LSH and rescored with exact Jaccard"""
+    matches = index.query(reference_pathways, top_n=top_n, exclude=[f"hsa:{gene_id}"])
+    return pd.DataFrame({
+        "gene_id": ids.gene_ids([key for key, _ in matches]),
+        "similarity_score": np.array([score for _, score in matches], dtype=np.float64),
+    })
@@ -1,12 +1,16 @@
 # Python translation of the Java classes
 
+import contextvars
 import os
-import requests
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Set, Tuple
 from dataclasses import dataclass
 from dotenv import load_dotenv
 import json
 
+from src.common import endpoints, http
+from src.common.tracing import PARSE, traced
+
 load_dotenv()
 
 
@@ -44,6 +48,7 @@ class KGMLSections:
 class KGMLGeneInteractionUtils:
 
     @staticmethod
+    @traced("KGML extract blocks", PARSE)
     def extract_entry_and_relation_blocks(xml: str) -> KGMLSections:
         entries = []
         relations = []
@@ -92,21 +97,63 @@ class Logic:
 
     @staticmethod
     def fetch_pathways_for_gene(gene_id: int) -> List[str]:
-        url = f"https://rest.kegg.jp/link/pathway/hsa:{gene_id}"
+        url = endpoints.kegg_rest(f"link/pathway/hsa:{gene_id}")
         headers = {"User-Agent": "Mozilla/5.0"}  # added header
-        response = requests.get(url,headers=headers)
+        response = http.get(url,headers=headers)
         response.raise_for_status()
         return [line.split('\t')[1].strip() for line in response.text.splitlines() if '\t' in line]
 
+    @staticmethod
+    def fetch_kgml(pathway_id: str) -> str:
+        cleaned_id = pathway_id.replace("path:", "")
+        headers = {"User-Agent": "Mozilla/5.0"}  # added header
+        url = endpoints.kegg_rest(f"get/{cleaned_id}/kgml")
+        response = http.get(url,headers=headers)
+        response.raise_for_status()
+        return response.text
+
     @staticmethod
     def fetch_first_kgmls(pathway_ids: List[str], max_items: int = 10) -> List[str]:
-        kgml_list = []
-        for pid in pathway_ids[:max_items]:
-            cleaned_id = pid.replace("path:", "")
-            headers = {"User-Agent": "Mozilla/5.0"}  # added header
-            url = f"https://rest.kegg.jp/get/{cleaned_id}/kgml"
-            response = requests.get(url,headers=headers)
-            response.raise_for_status()
-            kgml_list.append(response.text)
-        return kgml_list
+        return [Logic.fetch_kgml(pid) for pid in pathway_ids[:max_items]]
+
+    @staticmethod
+    def iter_kgmls(pathway_ids: List[str], max_items: int = 10, max_workers: int = 3) -> Iterator[Tuple[str, str]]:
+        """
+        (pathway ID, KGML) pairs in input order, each yielded as soon as it has
+        arrived while the following ones are still downloading, so the caller
+        parses one map while the next are on the wire
+        """
+        pathway_ids = pathway_ids[:max_items]
+        # KEGG answers too many parallel requests with 403, so only a few downloads run at once
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, Logic.fetch_kgml, pid) for pid in pathway_ids]
+            try:
+                for pid, future in zip(pathway_ids, futures):
+                    yield pid, future.result()
+            finally:
+                for future in futures:
+                    future.cancel()  # the consumer stopped early; skip downloads not started yet
+
+    @staticmethod
+    def fetch_human_pathway_ids() -> List[str]:
+        """IDs of every human pathway map ("path:hsa04110", ...)"""
+        response = http.get(endpoints.kegg_rest("list/pathway/hsa"), headers={"User-Agent": "Mozilla/5.0"})
+        response.raise_for_status()
+        ids = [line.split('\t', 1)[0].strip() for line in response.text.splitlines() if '\t' in line]
+        return [pid if pid.startswith("path:") else f"path:{pid}" for pid in ids]
+
+    @staticmethod
+    def fetch_gene_pathway_links() -> Dict[str, Set[str]]:
+        """Fetch the pathway set of every human gene in one request ({"hsa:672": {"path:hsa05200", ...}})"""
+        url = endpoints.kegg_rest("link/pathway/hsa")
+        headers = {"User-Agent": "Mozilla/5.0"}
+        response = http.get(url, headers=headers)
+        response.raise_for_status()
+
+        links = {}
+        for line in response.text.splitlines():
+            if '\t' in line:
+                gene, pathway = line.split('\t', 1)
+                links.setdefault(gene.strip(), set()).add(pathway.strip())
+        return links
 
@@ -0,0 +1,140 @@
+"""
+Network propagation over the interactome: random walk with restart (RWR).
+
+A walker starts at the seed genes, follows a relation with probability
+1 - restart and jumps back to a seed otherwise; the stationary visiting
+probabilities rank every gene by how closely it is connected to the seeds,
+not only the direct neighbours. This is personalised PageRank with
+damping 1 - restart.
+
+The walk is a sparse matrix product per iteration. Seeds are given as sets,
+one column of a dense seed matrix each, so a whole disease gene list (one
+walk per gene, or one from all of them) costs a few products over the same
+transition matrix.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+import ids
+from src.common.tracing import SCORE, traced
+
+DEFAULT_RESTART = 0.3
+DEFAULT_TOL = 1e-5
+DEFAULT_MAX_ITER = 100
+# float32 halves the memory traffic of the products; rankings do not need more precision
+DTYPE = np.float32
+
+
+def transition_matrix(graph) -> sparse.csr_matrix:
+    """
+    Column-stochastic genes x genes matrix of an Interactome: each gene passes
+    its probability to its neighbours in proportion to the number of pathways
+    with the edge. Relations are followed in both directions.
+    """
+    n = len(graph)
+    adjacency = sparse.csr_matrix(
+        (np.asarray(graph.support, dtype=DTYPE), np.asarray(graph.indices), np.asarray(graph.indptr)),
+        shape=(n, n),
+    )
+    adjacency.sum_duplicates()  # one entry per gene pair, whatever the relation types
+    degree = np.asarray(adjacency.sum(axis=0)).ravel()
+    inverse = np.divide(1.0, degree, out=np.zeros(n, dtype=DTYPE), where=degree > 0)
+    return (adjacency @ sparse.diags(inverse)).tocsr().astype(DTYPE)
+
+
+def random_walk_with_restart(transition, seeds: np.ndarray, restart: float = DEFAULT_RESTART,
+                             tol: float = DEFAULT_TOL, max_iter: int = DEFAULT_MAX_ITER) -> np.ndarray:
+    """
+    Stationary distribution p = (1 - restart) W p + restart s for every column
+    s of `seeds` (genes x k, or a single vector). Columns are normalised to sum
+    to 1; an all-zero column gives an all-zero result. Iterates until the L1
+    change of every column is below `tol`.
+    """
+    seeds = np.asarray(seeds, dtype=transition.dtype)
+    vector = seeds.ndim == 1
+    seeds = seeds.reshape(len(seeds), -1)
+    totals = seeds.sum(axis=0)
+    start = np.divide(seeds, totals, out=np.zeros_like(seeds), where=totals > 0)
+    restart_term = restart * start
+
+    p = start
+    for _ in range(max_iter):
+        p_next = transition @ p
+        p_next *= 1.0 - restart
+        p_next += restart_term
+        p -= p_next
+        converged = np.abs(p, out=p).sum(axis=0).max(initial=0.0) < tol
+        p = p_next
+        if converged:
+            break
+    return p[:, 0] if vector else p
+
+
+class Propagator:
+    """RWR over one Interactome; the transition matrix is built once and reused for every seed set"""
+
+    def __init__(self, graph, restart: float = DEFAULT_RESTART):
+        self.graph = graph
+        self.restart = restart
+        self.transition = transition_matrix(graph)
+
+    def positions(self, gene_ids: Iterable) -> np.ndarray:
+        """Node positions of the genes that are in the interactome; unknown genes are skipped"""
+        gene_ids = np.asarray([int(g) for g in gene_ids], dtype=np.int64)
+        if not len(self.graph):
+            return np.empty(0, np.int64)
+        pos = np.minimum(np.searchsorted(self.graph.genes, gene_ids), len(self.graph) - 1)
+        return pos[self.graph.genes[pos] == gene_ids]
+
+    def seed_matrix(self, seed_sets: Sequence[Iterable]) -> np.ndarray:
+        """genes x len(seed_sets) matrix with uniform restart probability over each set's genes"""
+        seeds = np.zeros((len(self.graph), len(seed_sets)), dtype=self.transition.dtype)
+        for column, seed_set in enumerate(seed_sets):
+            seeds[self.positions(seed_set), column] = 1.0
+        return seeds
+
+    @traced("random walk with restart", SCORE)
+    def run(self, seed_sets: Sequence[Iterable], tol: float = DEFAULT_TOL, max_iter: int = DEFAULT_MAX_ITER) -> np.ndarray:
+        """Visiting probabilities, genes (in graph.genes order) x seed sets"""
+        return random_walk_with_restart(self.transition, self.seed_matrix(seed_sets), self.restart, tol, max_iter)
+
+    def scores(self, seeds: Iterable, genes: Optional[Iterable] = None, top_n: Optional[int] = None) -> pd.DataFrame:
+        """
+        propagation_score of genes from one seed set, scaled so the best
+        non-seed gene scores 1. Rows are the `top_n` best non-seed genes plus
+        any `genes` asked for (0 when not in the interactome), best first.
+        """
+        seeds = list(seeds)
+        p = self.run([seeds])[:, 0]
+        is_seed = np.zeros(len(p), dtype=bool)
+        is_seed[self.positions(seeds)] = True
+        best = p[~is_seed].max(initial=0.0)
+        scaled = p / best if best > 0 else p
+
+        rows: Dict[int, float] = {}
+        if top_n:
+            candidates = np.where(is_seed, -np.inf, scaled)
+            top = np.argsort(-candidates, kind="stable")[:top_n]
+            rows.update(zip(self.graph.genes[top].tolist(), scaled[top].tolist()))
+        if genes is not None:
+            for gene_id in genes:
+                i = self.graph.node(gene_id)
+                rows[int(gene_id)] = float(scaled[i]) if i is not None else 0.0
+
+        frame = pd.DataFrame({"gene_id": list(rows.keys()), "propagation_score": list(rows.values())},
+                             columns=["gene_id", "propagation_score"])
+        frame = frame.astype({"gene_id": ids.GENE_ID_DTYPE, "propagation_score": np.float64})
+        return frame.sort_values("propagation_score", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def disease_gene_ids(disease_data: Dict) -> List[int]:
+    """Entrez IDs of a disease's GENE section, as parsed by clasa.DiseaseGeneApp1.process_section"""
+    return [int(gene["hsa"]) for gene in disease_data.get("genes", []) if str(gene.get("hsa", "")).isdigit()]
+
+
+def rank_disease_genes(graph, disease_data: Dict, top_n: int = 50, restart: float = DEFAULT_RESTART) -> pd.DataFrame:
+    """Genes closest to a disease's whole gene list in the interactome, excluding the list itself"""
+    return Propagator(graph, restart).scores(disease_gene_ids(disease_data), top_n=top_n)
@@ -1,4 +1,7 @@
-import requests
+from src.common import endpoints, http
+from src.common.scheduler import mark_interactive
+from src.common.singleflight import single_flight
+from src.common.tracing import PARSE, traced
 
 
 class GeneDrugTargetFinder:
@@ -35,13 +38,15 @@ class GeneDrugTargetFinder:
         except Exception as e:
             print(f"Error: {str(e)}")
 
+    @single_flight(key=lambda self, kegg_id: kegg_id)
     def get_kegg_gene_info(self, kegg_id):
         """Cere informațiile brute din KEGG"""
-        kegg_url = f"http://rest.kegg.jp/get/{kegg_id}"
-        response = requests.get(kegg_url)
+        kegg_url = endpoints.kegg_rest(f"get/{kegg_id}")
+        response = http.get(kegg_url)
         response.raise_for_status()
         return self.parse_kegg_response(response.text)
 
+    @traced("KEGG gene flat file parse", PARSE)
     def parse_kegg_response(self, text):
         """Parsează fișierul plat KEGG într-un dicționar"""
         result = {}
@@ -93,5 +98,6 @@ class GeneDrugTargetFinder:
 
 
 if __name__ == "__main__":
+    mark_interactive()
     finder = GeneDrugTargetFinder("EGFR")  # Poți schimba cu orice genă
     finder.find_info()
@@ -1,10 +1,35 @@
+import importlib
+import threading
 import tkinter as tk
-from src.geneInfoFetching.GeneInfoFetcher import GeneInfoApp
-from src.clasa import DiseaseGeneApp1
-from src.disease_search.SimilarDiseases import DiseaseGeneApp
+
+from src.common.scheduler import mark_interactive
+
+# Each tab imports its own modules on first use; whatever the visible tab does not need
+# is imported in the background once the window is on screen.
+BACKGROUND_IMPORTS = [
+    "requests",
+    "src.geneInfoFetching.GeneInfoFetcher",
+    "bs4",
+    "src.clasa",
+    "src.disease_search.SimilarDiseases",
+    "numpy",
+]
+
+
+def preload_modules(module_names):
+    def load():
+        for name in module_names:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                print(f"Background import of {name} failed: {e}")
+
+    threading.Thread(target=load, daemon=True).start()
 
 
 def main():
+    # Tk callbacks run on this thread: its requests are the user's
+    mark_interactive()
     root = tk.Tk()
     root.title("Interfață cu taburi rotunjite")
     root.geometry(f"{root.winfo_screenwidth()}x{root.winfo_screenheight()}")
@@ -101,6 +126,7 @@ def main():
             right_placeholder = tk.Frame(section1_frame, bg=MAIN_BG)
             right_placeholder.grid(row=0, column=1, sticky="nsew")
 
+            from src.geneInfoFetching.GeneInfoFetcher import GeneInfoApp
             GeneInfoApp(gene_frame)
 
             sections["section1"] = section1_frame
@@ -127,6 +153,8 @@ def main():
             right_frame.grid(row=0, column=1, sticky="nsew", padx=10, pady=10)
 
             # Inițializează componentele în cele două frame-uri
+            from src.clasa import DiseaseGeneApp1
+            from src.disease_search.SimilarDiseases import DiseaseGeneApp
             DiseaseGeneApp1(left_frame)
             DiseaseGeneApp(right_frame)
 
@@ -146,6 +174,7 @@ def main():
 
     # Inițializare
     show_section1()
+    root.after(300, lambda: preload_modules(BACKGROUND_IMPORTS))
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Tests import like the app does: src.common.* from the repo root, the gene modules by bare name
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+for path in (ROOT, os.path.join(ROOT, "src", "geneInfoFetching")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,90 @@
+import numpy as np
+
+from gene_paths import PathFinder
+from interactome import RELATION_CODES, REVERSE, Interactome
+
+EDGES = [
+    (1, 2, "activation"),
+    (2, 5, "activation"),
+    (1, 3, "inhibition"),
+    (3, 5, "activation"),
+    (2, 3, "binding/association"),
+    (1, 4, "activation"),
+    (4, 6, "activation"),
+    (6, 5, "inhibition"),
+    (8, 9, "activation"),
+]
+
+
+def build_graph(edges):
+    """CSR interactome with each relation stored under both genes, like build_interactome()"""
+    genes = np.array(sorted({g for s, t, _ in edges for g in (s, t)} | {7}), dtype=np.int32)
+    position = {int(g): i for i, g in enumerate(genes)}
+    stored = [[] for _ in genes]
+    for source, target, relation in edges:
+        code = RELATION_CODES[relation]
+        stored[position[source]].append((position[target], code))
+        stored[position[target]].append((position[source], code | REVERSE))
+    indptr = np.cumsum([0] + [len(s) for s in stored]).astype(np.int64)
+    flat = [edge for s in stored for edge in s]
+    indices = np.array([n for n, _ in flat], dtype=np.int32)
+    types = np.array([c for _, c in flat], dtype=np.uint8)
+    return Interactome(genes, indptr, indices, types, np.ones(len(flat), dtype=np.uint16))
+
+
+def simple_paths(edges, source, target, directed=True):
+    adjacent = {}
+    for s, t, _ in edges:
+        adjacent.setdefault(s, set()).add(t)
+        if not directed:
+            adjacent.setdefault(t, set()).add(s)
+    paths, stack = [], [[source]]
+    while stack:
+        path = stack.pop()
+        if path[-1] == target:
+            paths.append(path)
+            continue
+        stack.extend(path + [n] for n in adjacent.get(path[-1], ()) if n not in path)
+    return paths
+
+
+def test_shortest_path_follows_relation_direction():
+    finder = PathFinder(build_graph(EDGES))
+    path = finder.shortest_path(1, 5)
+    assert path.hops == 2
+    assert path.genes[0] == 1 and path.genes[-1] == 5
+    assert finder.shortest_path(5, 1) is None
+    assert finder.shortest_path(1, 9) is None
+    assert finder.shortest_path(1, 7) is None
+    assert finder.shortest_path(1, 12345) is None
+    assert finder.shortest_path(3, 3).hops == 0
+
+
+def test_yen_returns_every_loopless_path_shortest_first():
+    finder = PathFinder(build_graph(EDGES))
+    paths = finder.k_shortest_paths(1, 5, k=100)
+
+    found = [p.genes for p in paths]
+    assert sorted(map(tuple, found)) == sorted(map(tuple, simple_paths(EDGES, 1, 5)))
+    assert [len(g) for g in found] == sorted(len(g) for g in found)
+    assert all(len(set(g)) == len(g) for g in found)
+    assert [p.genes for p in finder.k_shortest_paths(1, 5, k=2)] == found[:2]
+
+
+def test_undirected_paths_match_brute_force():
+    finder = PathFinder(build_graph(EDGES), directed=False)
+    found = [p.genes for p in finder.k_shortest_paths(5, 1, k=100)]
+    assert sorted(map(tuple, found)) == sorted(map(tuple, simple_paths(EDGES, 5, 1, directed=False)))
+    assert [len(g) for g in found] == sorted(len(g) for g in found)
+    assert "(reverse)" in finder.shortest_path(5, 1).steps[0].relation_types[0]
+
+
+def test_path_signs():
+    finder = PathFinder(build_graph(EDGES))
+    signs = {tuple(p.genes): p.sign for p in finder.k_shortest_paths(1, 5, k=100)}
+    assert signs == {(1, 2, 5): 1, (1, 3, 5): -1, (1, 2, 3, 5): 0, (1, 4, 6, 5): -1}
+
+    inhibiting = finder.k_shortest_paths(1, 5, k=100, sign=-1)
+    assert [p.genes for p in inhibiting] == [[1, 3, 5], [1, 4, 6, 5]]
+    step = inhibiting[0].steps[0]
+    assert (step.source, step.target, step.relation_types, step.sign) == (1, 3, ["inhibition"], -1)
@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from src.common.minhash_index import MinHashLSHIndex, jaccard
+
+PATHWAYS = [f"hsa{n:05d}" for n in range(200)]
+
+
+def random_sets(count, seed=0):
+    rng = random.Random(seed)
+    base = rng.sample(PATHWAYS, 20)
+    sets = {}
+    for i in range(count):
+        # Half the sets share most of `base`, so the query has true neighbours at every similarity
+        if i % 2:
+            kept = rng.sample(base, rng.randint(5, 20))
+            sets[f"H{i:05d}"] = set(kept) | set(rng.sample(PATHWAYS, rng.randint(0, 10)))
+        else:
+            sets[f"H{i:05d}"] = set(rng.sample(PATHWAYS, rng.randint(1, 30)))
+    return base, sets
+
+
+def brute_force(query, sets, top_n):
+    scores = [(key, jaccard(query, items)) for key, items in sets.items()]
+    return sorted((s for s in scores if s[1] > 0), key=lambda s: (-s[1], s[0]))[:top_n]
+
+
+@pytest.fixture
+def index_and_sets():
+    base, sets = random_sets(400)
+    index = MinHashLSHIndex()
+    for key, items in sets.items():
+        index.add(key, items)
+    return index, base, sets
+
+
+def test_rescored_query_matches_brute_force_jaccard(index_and_sets):
+    index, base, sets = index_and_sets
+    results = index.query(base, top_n=20)
+
+    assert results
+    for key, score in results:
+        assert score == jaccard(set(base), sets[key])
+    assert [s for _, s in results] == sorted((s for _, s in results), reverse=True)
+
+    # Same scores as a full scan; keys may differ only where scores tie at the cut-off
+    assert [s for _, s in results] == [s for _, s in brute_force(set(base), sets, 20)]
+
+
+def test_exact_set_is_called_for_the_final_top_n_only(index_and_sets):
+    index, base, sets = index_and_sets
+    calls = []
+
+    def exact_set(key):
+        calls.append(key)
+        return sets[key]
+
+    results = index.query(base, top_n=5, exact_set=exact_set)
+    assert sorted(calls) == sorted(key for key, _ in results)
+    assert len(calls) == 5
+
+
+def test_replace_and_remove_keep_one_row_per_key(tmp_path, index_and_sets):
+    index, base, sets = index_and_sets
+    replacement = {"hsa99998", "hsa99999"}
+    index.add("H00001", replacement)
+    index.remove("H00003")
+    assert len(index) == len(sets) - 1
+    assert index.query(replacement, top_n=5) == [("H00001", 1.0)]
+    assert "H00003" not in {key for key, _ in index.query(sets["H00003"], top_n=len(sets))}
+
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    loaded = MinHashLSHIndex.load(path)
+    assert len(loaded) == len(loaded.keys) == len(index)
+    assert loaded.get_set("H00001") == frozenset(replacement)
+    assert loaded.query(base, top_n=20) == index.query(base, top_n=20)
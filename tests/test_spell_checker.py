@@ -0,0 +1,55 @@
+import random
+import string
+
+from rapidfuzz.distance import Levenshtein
+
+from spell_checker import SymbolIndex
+
+
+def synthetic_symbols(count, seed=0):
+    rng = random.Random(seed)
+    alphabet = string.ascii_uppercase + string.digits
+    return ["".join(rng.choices(alphabet, k=rng.randint(2, 8))) for _ in range(count)]
+
+
+def misspell(symbol, edits, rng):
+    for _ in range(edits):
+        i = rng.randrange(len(symbol) + 1)
+        op = rng.choice("ids")
+        if op == "i" or not symbol:
+            symbol = symbol[:i] + rng.choice("ABCDEF123") + symbol[i:]
+        elif op == "d" and i < len(symbol):
+            symbol = symbol[:i] + symbol[i + 1:]
+        elif i < len(symbol):
+            symbol = symbol[:i] + rng.choice("ABCDEF123") + symbol[i + 1:]
+    return symbol
+
+
+def test_lookup_matches_plain_levenshtein_scan():
+    symbols = synthetic_symbols(2000)
+    index = SymbolIndex(symbols, max_distance=2)
+    rng = random.Random(1)
+
+    for _ in range(300):
+        term = misspell(rng.choice(symbols), rng.randint(0, 3), rng)
+        for k in (1, 2):
+            expected = {s: Levenshtein.distance(term, s) for s in index.symbols}
+            expected = {s: d for s, d in expected.items() if d <= k}
+            if term in index.symbol_set:
+                expected = {term: 0}
+            assert dict(index.lookup(term, k)) == expected, (term, k)
+
+
+def test_closest_prefers_smaller_distance():
+    index = SymbolIndex(["TP53", "TP63", "TP73", "BRCA1", "BRCA2"])
+    assert index.closest("TP53") == "TP53"
+    assert index.closest("BRCA") == "BRCA1"
+    assert index.closest("TTP53") == "TP53"
+    assert index.closest("XXXXX") is None
+    assert index.lookup("TP5") == [("TP53", 1), ("TP63", 2), ("TP73", 2)]
+
+
+def test_lookup_is_capped_at_index_depth():
+    index = SymbolIndex(["ABCDEFGH"], max_distance=1)
+    assert index.lookup("ABCDEF", 3) == []
+    assert index.lookup("ABCDEFG", 3) == [("ABCDEFGH", 1)]
@@ -0,0 +1,42 @@
+import threading
+from concurrent.futures import CancelledError
+
+import pytest
+
+from src.common.task_graph import TaskGraph
+
+
+def test_dependents_get_results():
+    with TaskGraph() as stages:
+        stages.value("a", 2)
+        stages.add("b", lambda a: a + 1, "a")
+        stages.add("c", lambda a, b: a * b, "a", "b")
+        assert stages.result("c", timeout=5) == 6
+
+
+def test_failure_propagates_to_dependents():
+    def fail():
+        raise KeyError("missing")
+
+    with TaskGraph() as stages:
+        stages.add("a", fail)
+        stages.add("b", lambda a: a, "a")
+        stages.add("c", lambda b: b, "b")
+        for name in ("a", "b", "c"):
+            with pytest.raises(KeyError):
+                stages.result(name, timeout=5)
+
+
+def test_exit_cancels_pending_stages():
+    release = threading.Event()
+    stages = TaskGraph(max_workers=1)
+    with stages:
+        stages.add("slow", lambda: release.wait(5) and "done")
+        stages.add("queued", lambda: "never")
+        stages.add("after", lambda slow: slow, "slow")
+    release.set()
+
+    assert stages.result("slow", timeout=5) == "done"
+    for name in ("queued", "after"):
+        with pytest.raises(CancelledError):
+            stages.result(name, timeout=5)